@@ -1,20 +1,34 @@
 # admin_handlers.py
 
+import asyncio
 import random
 import time
+import uuid
 from aiogram import Router, F, types
+from aiogram.filters import Command, CommandObject
 from aiogram.fsm.context import FSMContext
-from aiogram.types import (ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove)
+from aiogram.types import (ReplyKeyboardMarkup, KeyboardButton, ReplyKeyboardRemove, BufferedInputFile)
 
 # Импортируем наши модули
+import audit_log
+import bulk_ops
 import config
+import event_log
 import game_state
-from keyboards import main_menu
+from delivery import split_message, deliver, send_each, outbound
+from keyboards import main_menu, admin_stats_keyboard, STATS_FILTERS, STATS_SORTS
 # --- ИЗМЕНЕННЫЕ ИМПОРТЫ ---
 from handlers import log_action, generate_newspaper_report, format_admin_message  # Добавлен log_action и другие
 # ---------------------------
 from filters import PlayerFilter
 from states import AdminAttack, AdminModify, AdminBroadcast, AdminTools
+import global_events
+import live_progress
+import memory_report
+import metrics
+import round_charts
+import timeseries
+import world_features
 from global_events import EVENT_CLASSES
 
 admin_router = Router()
@@ -28,8 +42,8 @@ admin_router = Router()
 async def admin_choose_event_start(message: types.Message, state: FSMContext):
     """Начинает процесс выбора события для принудительного запуска."""
     if game_state.active_global_event:
-        event_name = EVENT_CLASSES.get(game_state.active_global_event['id'],
-                                       type('', (object,), {'name': 'Неизвестное событие'})).name
+        event_object = global_events.runtime.current(message.bot)
+        event_name = event_object.name if event_object else 'Неизвестное событие'
         return await message.answer(f"Тест невозможен: уже активно событие '{event_name}'.")
 
     kb_rows = [[KeyboardButton(text=f"{event.name}")] for event in EVENT_CLASSES.values()]
@@ -54,15 +68,10 @@ async def admin_force_event_logic(message: types.Message, state: FSMContext):
     if not chosen_event_class:
         return await message.answer("Событие не найдено. Попробуйте еще раз.", reply_markup=main_menu(config.ADMIN_ID))
 
-    new_event_data = {
-        "id": chosen_event_class.ID,
-        "progress": 0,
-        "rounds_left": chosen_event_class.duration
-    }
-    game_state.active_global_event = new_event_data
-    game_state.event_cooldowns[chosen_event_class.ID] = 3
+    event_object = global_events.runtime.start(message.bot, chosen_event_class)
+    game_state.event_cooldowns[chosen_event_class.ID] = config.EVENT_COOLDOWN
+    game_state.record_event(event_log.GLOBAL_EVENT_STARTED, detail=chosen_event_class.ID)
 
-    event_object = chosen_event_class(message.bot, new_event_data)
     start_msg = await event_object.get_start_message()
 
     # --- ЛОГ ДЕЙСТВИЯ ---
@@ -116,6 +125,7 @@ async def admin_attack_choose_city(message: types.Message, state: FSMContext):
     log_text = ""  # Переменная для лога
     if target_player["shields"] > 0:
         target_player["shields"] -= 1
+        game_state.record_event(event_log.ADMIN_ATTACK_SHIELDED, target=target_player, city=city_name)
         result_text = f"⚡ Админ-атака на {city_name} отражена щитом! (Осталось: {target_player['shields']})"
         # --- ЛОГ ДЕЙСТВИЯ ---
         log_text = f"🛡️ <b>Администратор</b> атаковал город <b>{city_name}</b> ({target_player['country']}), но удар был отражен щитом."
@@ -123,6 +133,7 @@ async def admin_attack_choose_city(message: types.Message, state: FSMContext):
     else:
         city = target_player["cities"][city_name]
         city["level"], city["income"], city["qol"] = 0, 0, 0
+        game_state.record_event(event_log.ADMIN_ATTACK, target=target_player, city=city_name)
         result_text = f"💥 Админ разрушил город {city_name} в стране {target_player['country']}."
         # --- ЛОГ ДЕЙСТВИЯ ---
         log_text = f"💥 <b>Администратор</b> разрушил город <b>{city_name}</b> ({target_player['country']})."
@@ -177,14 +188,15 @@ async def admin_broadcast_send(message: types.Message, state: FSMContext):
     await log_action(message.bot, log_text)
     # ---------------------
 
+    game_state.record_event(event_log.ADMIN_MESSAGE,
+                            target=game_state.players.get(target) if target != 'all' else None,
+                            detail=message.text)
+
     if target == 'all':
-        for uid, p in game_state.players.items():
-            if p.get("country") and not p.get("eliminated") and uid != config.ADMIN_ID:
-                try:
-                    await message.bot.send_message(uid, formatted_message, parse_mode="HTML")
-                except Exception as e:
-                    print(f"Error in broadcast to {uid}: {e}")
-        await message.answer("Сообщение отправлено всем игрокам.", reply_markup=main_menu(config.ADMIN_ID))
+        recipients = [uid for uid, p in game_state.players.items()
+                      if p.get("country") and not p.get("eliminated") and uid != config.ADMIN_ID]
+        report = await deliver(message.bot, recipients, split_message(formatted_message), parse_mode="HTML")
+        await message.answer(f"Рассылка завершена.\n{report.summary()}", reply_markup=main_menu(config.ADMIN_ID))
     else:
         try:
             await message.bot.send_message(target, formatted_message, parse_mode="HTML")
@@ -255,7 +267,7 @@ async def admin_modify_choose_city(message: types.Message, state: FSMContext):
 
 
 @admin_router.message(AdminModify.choosing_action)
-async def admin_modify_perform_action(message: types.Message, state: FSMContext):
+async def admin_modify_perform_action(message: types.Message, state: FSMContext, rng: random.Random):
     text = message.text.strip()
     user_data = await state.get_data()
     target_uid = user_data.get('target_uid')
@@ -276,9 +288,9 @@ async def admin_modify_perform_action(message: types.Message, state: FSMContext)
 
     city['income'] = city['level'] * 500 if city['level'] > 0 else 0
     if text == "Улучшить на 1":
-        city['qol'] = min(100, city['qol'] + random.randint(7, 15))
+        city['qol'] = min(100, city['qol'] + rng.randint(7, 15))
     else:
-        city['qol'] = max(0, city['qol'] - random.randint(7, 15)) if city['level'] > 0 else 0
+        city['qol'] = max(0, city['qol'] - rng.randint(7, 15)) if city['level'] > 0 else 0
 
     # --- ЛОГ ДЕЙСТВИЯ ---
     action_word = "улучшил" if text == "Улучшить на 1" else "ухудшил"
@@ -286,6 +298,8 @@ async def admin_modify_perform_action(message: types.Message, state: FSMContext)
     await log_action(message.bot, log_text)
     # ---------------------
 
+    game_state.record_event(event_log.ADMIN_CITY_MODIFIED, target=target_player, city=city_name, amount=city['level'])
+
     await message.answer(f"Город {city_name} изменен. Новый уровень: {city['level']}.",
                          reply_markup=main_menu(config.ADMIN_ID))
     try:
@@ -295,8 +309,143 @@ async def admin_modify_perform_action(message: types.Message, state: FSMContext)
         print(f"Ошибка уведомления об изменении города: {e}")
 
 
+# --- FSM МАССОВЫХ ИЗМЕНЕНИЙ ---
+async def admin_bulk_start(message: types.Message, state: FSMContext):
+    await message.answer(
+        "📦 Пришлите документ .json или .csv с изменениями.\n"
+        "Колонки: <code>country</code> (или <code>id</code>), <code>budget</code>, <code>ready_nukes</code>, "
+        "<code>pending_nukes</code>, <code>shields</code>, <code>actions_left</code>, <code>temp_effects</code>; "
+        "для города — <code>city</code> и <code>level</code>, <code>qol</code>, <code>bunker_level</code>, "
+        "<code>ruined</code>. Числа вида <code>+500</code> меняют значение относительно текущего.\n"
+        "Изменения применяются только если в документе нет ни одной ошибки.",
+        parse_mode="HTML",
+        reply_markup=ReplyKeyboardMarkup(keyboard=[[KeyboardButton(text="Отмена")]], resize_keyboard=True))
+    await state.set_state(AdminTools.uploading_bulk_document)
+
+
+@admin_router.message(AdminTools.uploading_bulk_document)
+async def admin_bulk_apply(message: types.Message, state: FSMContext):
+    if message.text and message.text.strip() == "Отмена":
+        await state.clear()
+        return await message.answer("Действие отменено.", reply_markup=main_menu(config.ADMIN_ID))
+    if not message.document:
+        return await message.answer("Пришлите файл .json или .csv либо нажмите «Отмена».")
+
+    try:
+        data = (await message.bot.download(message.document)).read()
+    except Exception as e:
+        print(f"Ошибка загрузки документа массовых изменений: {e}")
+        return await message.answer("Не удалось скачать документ. Пришлите его ещё раз или нажмите «Отмена».")
+    async with game_state.lock:
+        try:
+            changes = bulk_ops.validate(bulk_ops.parse_document(message.document.file_name or "", data),
+                                        game_state.players)
+        except bulk_ops.BulkOpsError as e:
+            changes, errors = None, e.errors
+        else:
+            diff = bulk_ops.apply(changes, game_state.players)
+            for uid in dict.fromkeys(uid for uid, _, _, _ in changes):
+                game_state.record_event(event_log.ADMIN_BULK_EDIT, target=game_state.players[uid])
+
+    if changes is None:
+        text = "❌ Документ не применён, ошибок: {}\n\n{}".format(len(errors), "\n".join(errors))
+        for chunk in split_message(text, separator="\n"):
+            await message.answer(chunk)
+        await message.answer("Исправьте документ и попробуйте снова.", reply_markup=main_menu(config.ADMIN_ID))
+        return await state.clear()
+
+    # --- ЛОГ ДЕЙСТВИЯ ---
+    log_text = f"📦 <b>Администратор</b> применил массовые изменения: {len(diff)} шт."
+    await log_action(message.bot, log_text)
+    # ---------------------
+    text = f"✅ Применено изменений: {len(diff)}\n\n" + "\n".join(diff)
+    for chunk in split_message(text, separator="\n"):
+        await message.answer(chunk)
+    await message.answer("Готово.", reply_markup=main_menu(config.ADMIN_ID))
+    await state.clear()
+
+
+# --- ЗАПРОСЫ К АУДИТУ ---
+AUDIT_HELP = ("Запрос к журналу действий: <code>/audit ключ=значение ...</code>\n"
+              "Ключи: <code>type</code>, <code>actor</code>, <code>target</code>, <code>city</code>, "
+              "<code>round</code>, <code>game</code> (по умолчанию текущая игра, <code>all</code> — все), "
+              "<code>group</code> (actor/target/type/round/city), <code>limit</code>. "
+              "Несколько значений — через запятую.\n"
+              "Примеры:\n<code>/audit type=ATTACK_SUCCESS,ATTACK_SHIELDED target=Израиль</code>\n"
+              "<code>/audit type=AID_SENT group=actor</code>")
+
+
+@admin_router.message(PlayerFilter(is_admin=True), Command("audit"))
+async def admin_audit_query(message: types.Message, command: CommandObject):
+    if not command.args:
+        return await message.answer(AUDIT_HELP, parse_mode="HTML")
+    try:
+        filters, group, limit = audit_log.parse_query(command.args)
+    except ValueError as e:
+        return await message.answer(f"❌ {e}")
+    # Свежие записи ещё могут ждать в буфере — сначала сбрасываем их
+    await audit_log.flush()
+    started = time.perf_counter()
+    rows = await asyncio.to_thread(audit_log.query, filters, group, limit)
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    if not rows:
+        return await message.answer(f"Ничего не найдено ({elapsed_ms:.1f} мс).")
+    if group:
+        lines = [f"• {key}: {count} раз, сумма {total or 0}" for key, count, total in rows]
+    else:
+        lines = [f"• р.{round_number} {event_type}: {actor or '—'} → {target or '—'}"
+                 f"{f' ({city})' if city else ''}{f' ${amount}' if amount else ''}{f' [{detail}]' if detail else ''}"
+                 for round_number, event_type, actor, target, city, amount, detail in rows]
+    text = f"🔎 Найдено строк: {len(rows)} ({elapsed_ms:.1f} мс)\n" + "\n".join(lines)
+    for chunk in split_message(text, separator="\n"):
+        await message.answer(chunk)
+
+
+@admin_router.message(PlayerFilter(is_admin=True), Command("history"))
+async def admin_history_export(message: types.Message):
+    if not len(timeseries.series):
+        return await message.answer("История раундов пока пуста.")
+    data = timeseries.series.to_csv().encode("utf-8-sig")  # BOM — чтобы Excel понял кодировку
+    await message.answer_document(BufferedInputFile(data, filename=f"history_{game_state.game_id}.csv"),
+                                  caption=f"📈 История стран по раундам, строк: {len(timeseries.series)}")
+
+
+MEMORY_HELP = ("Память по подсистемам: /memory\n"
+               "Трассировка выделений: /memory trace on | /memory trace off\n"
+               "Топ мест выделения: /memory top\n"
+               "Разница между двумя последними раундами: /memory diff")
+
+
+@admin_router.message(PlayerFilter(is_admin=True), Command("memory"))
+async def admin_memory_report(message: types.Message, command: CommandObject):
+    args = (command.args or "").split()
+    if not args:
+        text = "🧠 Память по подсистемам:\n" + await memory_report.report.render()
+    elif args == ["trace", "on"]:
+        memory_report.start_tracing()
+        text = "🔬 Трассировка выделений включена. Снимки памяти снимаются на начале каждого раунда."
+    elif args == ["trace", "off"]:
+        memory_report.stop_tracing()
+        text = "Трассировка выделений выключена."
+    elif args[0] in ("top", "diff") and not memory_report.tracemalloc.is_tracing():
+        text = "Трассировка выключена. Включите её: /memory trace on"
+    elif args == ["top"]:
+        text = "🔬 Топ мест выделения:\n" + "\n".join(memory_report.top_allocations())
+    elif args == ["diff"]:
+        diff = memory_report.round_diff()
+        if diff is None:
+            text = "Нужны снимки двух границ раундов после включения трассировки."
+        else:
+            (old_label, new_label), lines = diff
+            text = f"🔬 Рост выделений: {old_label} → {new_label}\n" + "\n".join(lines)
+    else:
+        text = MEMORY_HELP
+    for chunk in split_message(text, separator="\n"):
+        await message.answer(chunk)
+
+
 # --- ОБРАБОТКА ОТВЕТОВ НА ВЫЗОВ ---
-@admin_router.callback_query(F.data.startswith("admin_call_"))
+@admin_router.callback_query(F.data.startswith("admin_call_"), flags={"idempotent": True})
 async def handle_admin_call_response(callback: types.CallbackQuery):
     action, player_id_str = callback.data.split(":")
     player_id = int(player_id_str)
@@ -336,7 +485,8 @@ async def admin_panel_menu(message: types.Message, state: FSMContext):
         [KeyboardButton(text="Изменить уровень города"), KeyboardButton(text="Админ-удар")],
         [KeyboardButton(text="Отправить сообщение"), KeyboardButton(text="Проверить таймер")],
         [KeyboardButton(text="📰 Сводка новостей (для себя)"), KeyboardButton(text="Разослать газету")],
-        [KeyboardButton(text="⚙️ Вызвать событие (Тест)"), KeyboardButton(text="Рестарт игры")],
+        [KeyboardButton(text="⚙️ Вызвать событие (Тест)"), KeyboardButton(text="⚖️ Веса событий")],
+        [KeyboardButton(text="📦 Массовые изменения"), KeyboardButton(text="Рестарт игры")],
         [KeyboardButton(text="Назад в главное меню")]
     ], resize_keyboard=True)
     await message.answer("Админка:", reply_markup=keyboard)
@@ -348,8 +498,8 @@ async def handle_admin_start_game(message: types.Message, state: FSMContext):
 
 
 @admin_router.message(PlayerFilter(is_admin=True), F.text == "Начать следующий раунд")
-async def handle_admin_next_round(message: types.Message, state: FSMContext):
-    await admin_next_round_logic(message, state)
+async def handle_admin_next_round(message: types.Message, state: FSMContext, rng: random.Random):
+    await admin_next_round_logic(message, state, rng)
 
 
 @admin_router.message(PlayerFilter(is_admin=True), F.text == "Просмотреть статистику всех")
@@ -392,15 +542,21 @@ async def handle_admin_broadcast_newspaper(message: types.Message, state: FSMCon
     newspaper_text = await generate_newspaper_report()
     if not newspaper_text:
         return await message.answer("🗞 Новостей для рассылки нет.")
-    sent_count = 0
-    for uid, p in game_state.players.items():
-        if p.get("country") and not p.get("eliminated") and uid != config.ADMIN_ID:
-            try:
-                await message.bot.send_message(uid, newspaper_text, parse_mode="Markdown")
-                sent_count += 1
-            except Exception as e:
-                print(f"Error broadcasting newspaper to {uid}: {e}")
-    await message.answer(f"✅ Газета успешно разослана {sent_count} игрокам.")
+    recipients = [uid for uid, p in game_state.players.items()
+                  if p.get("country") and not p.get("eliminated") and uid != config.ADMIN_ID]
+    chunks = split_message(newspaper_text, markdown=True)
+    report = await deliver(message.bot, recipients, chunks, parse_mode="Markdown")
+    await message.answer(f"✅ Газета разослана.\n{report.summary()}")
+
+
+@admin_router.message(PlayerFilter(is_admin=True), F.text == "⚖️ Веса событий")
+async def handle_admin_event_weights(message: types.Message, state: FSMContext):
+    await admin_event_weights_logic(message, state)
+
+
+@admin_router.message(PlayerFilter(is_admin=True), F.text == "📦 Массовые изменения")
+async def handle_admin_bulk_start(message: types.Message, state: FSMContext):
+    await admin_bulk_start(message, state)
 
 
 @admin_router.message(PlayerFilter(is_admin=True), F.text == "Рестарт игры")
@@ -454,17 +610,21 @@ async def admin_start_game_logic(message: types.Message, state: FSMContext):
     await log_action(message.bot, log_text)
     # ---------------------
 
-    msg = "🎉 <b>Игра началась! Раунд 1 запущен.</b>"
+    game_state.record_event(event_log.GAME_STARTED)
+    # Исходная точка истории стран
     for uid, p in game_state.players.items():
-        if p.get("country") and not p.get("eliminated") and uid != config.ADMIN_ID:
-            try:
-                await message.bot.send_message(uid, msg, parse_mode="HTML")
-            except Exception as e:
-                print(f"Error broadcasting start game to {uid}: {e}")
-    await message.answer("✅ Игра началась!", reply_markup=main_menu(config.ADMIN_ID))
+        if p.get("country") and not p.get("eliminated"):
+            timeseries.series.append(1, uid, p)
+    await timeseries.series.flush()
+
+    msg = "🎉 <b>Игра началась! Раунд 1 запущен.</b>"
+    recipients = [uid for uid, p in game_state.players.items()
+                  if p.get("country") and not p.get("eliminated") and uid != config.ADMIN_ID]
+    report = await deliver(message.bot, recipients, [msg], parse_mode="HTML")
+    await message.answer(f"✅ Игра началась!\n{report.summary()}", reply_markup=main_menu(config.ADMIN_ID))
 
 
-async def admin_next_round_logic(message: types.Message, state: FSMContext):
+async def admin_next_round_logic(message: types.Message, state: FSMContext, rng: random.Random):
     if game_state.is_processing_next_round:
         return await message.answer("⏳ Пожалуйста, подождите, идёт обработка предыдущего раунда...")
 
@@ -475,61 +635,63 @@ async def admin_next_round_logic(message: types.Message, state: FSMContext):
         await log_action(message.bot, log_text)
         # ---------------------
 
-        cooldowns_to_remove = []
-        for event_id, rounds_left in game_state.event_cooldowns.items():
-            game_state.event_cooldowns[event_id] -= 1
-            if game_state.event_cooldowns[event_id] <= 0:
-                cooldowns_to_remove.append(event_id)
-        for event_id in cooldowns_to_remove:
-            del game_state.event_cooldowns[event_id]
-
-        if game_state.active_global_event:
-            game_state.active_global_event['rounds_left'] -= 1
-            if game_state.active_global_event['rounds_left'] <= 0:
-                event_id = game_state.active_global_event['id']
-                event_class = EVENT_CLASSES[event_id]
-                event_object = event_class(message.bot, game_state.active_global_event)
+        global_events.advance_cooldowns(game_state.event_cooldowns)
+
+        # Истечение события решается под блокировкой: взнос или сделка, ждущие её,
+        # уже не увидят событие активным, и у него не будет сразу успеха и провала
+        expired = None
+        async with game_state.lock:
+            active_event = game_state.active_global_event
+            if active_event:
+                active_event['rounds_left'] -= 1
+                if active_event['rounds_left'] <= 0:
+                    event_id = active_event['id']
+                    expired = global_events.runtime.current(message.bot), event_id
+                    game_state.record_event(event_log.GLOBAL_EVENT_FAILED, detail=event_id)
+                    game_state.event_cooldowns[event_id] = config.EVENT_COOLDOWN
+                    global_events.runtime.finish()
+
+        if expired:
+            event_object, event_id = expired
+            if event_object:
+                await live_progress.tracker.close(message.bot, event_object, "❌ Время вышло, цель не достигнута.")
                 await event_object.on_fail(game_state.players)
-                log_text = f"⌛️ Событие <b>'{event_class.name}'</b> провалилось по истечению времени."
-                await log_action(message.bot, log_text)
-                await message.bot.send_message(config.ADMIN_ID, f"🔔 (Для админа) {log_text}", parse_mode="HTML")
-                game_state.event_cooldowns[event_id] = 3
-                game_state.active_global_event = None
-
-
-        elif random.random() < 0.33:
-
-            available_events = [eid for eid in EVENT_CLASSES.keys() if eid not in game_state.event_cooldowns]
-
-            if available_events:
-                world_state = get_world_state_analysis()
-                event_weights = calculate_event_weights(available_events, world_state)
-                event_id = random.choices(available_events, weights=event_weights, k=1)[0]
-
+            event_name = event_object.name if event_object else event_id
+            log_text = f"⌛️ Событие <b>'{event_name}'</b> провалилось по истечению времени."
+            await log_action(message.bot, log_text)
+            await message.bot.send_message(config.ADMIN_ID, f"🔔 (Для админа) {log_text}", parse_mode="HTML")
+        elif active_event:
+            if global_events.runtime.current(message.bot):
+                # Обновляем число оставшихся раундов в живых сообщениях участников
+                live_progress.tracker.refresh(message.bot, global_events.runtime.current())
+        else:
+            event_id = global_events.roll_event(game_state.event_cooldowns, world_features.features.snapshot(), rng)
+            if event_id:
                 event_class = EVENT_CLASSES[event_id]
-                new_event_data = {
-                    "id": event_id,
-                    "progress": 0,
-                    "rounds_left": event_class.duration
-
-                }
-                game_state.active_global_event = new_event_data
-                game_state.event_cooldowns[event_id] = 3
-                event_object = event_class(message.bot, new_event_data)
+                event_object = global_events.runtime.start(message.bot, event_class)
+                game_state.event_cooldowns[event_id] = config.EVENT_COOLDOWN
+                game_state.record_event(event_log.GLOBAL_EVENT_STARTED, detail=event_id)
                 start_msg = await event_object.get_start_message()
 
                 log_text = f"🌍 <b>Началось новое событие: {event_class.name}</b> (Выбрано на основе ситуации в мире)."
                 await log_action(message.bot, log_text)
                 await message.bot.send_message(config.ADMIN_ID, f"🔔 (Для админа) {log_text}", parse_mode="HTML")
-                for uid, p in game_state.players.items():
-                    if p.get("country") and not p.get("eliminated"):
-                        await message.bot.send_message(uid, start_msg, parse_mode="Markdown")
+                recipients = [uid for uid, p in game_state.players.items()
+                              if p.get("country") and not p.get("eliminated")]
+                await deliver(message.bot, recipients, [start_msg], parse_mode="Markdown")
+
+        # Выпуск за завершившийся раунд уходит в архив до смены номера раунда
+        edition = await generate_newspaper_report()
+        if edition:
+            game_state.newspaper_archive.add(game_state.current_round, edition)
 
-        game_state.round_events.clear()
         game_state.current_round += 1
         game_state.round_end_time = time.time() + config.ROUND_DURATION
         game_state.round_notifications = {'5_min': False, '3_min': False, '1_min': False, 'end': False}
 
+        # Игроки обновляются без await: снимок состояния не увидит раунд наполовину.
+        # Сообщения копятся и уходят после обновления всех игроков.
+        outgoing = []
         for uid, p in game_state.players.items():
             if not p.get('country') or p.get('eliminated'): continue
 
@@ -548,10 +710,7 @@ async def admin_next_round_logic(message: types.Message, state: FSMContext):
                     effect_data['rounds_left'] -= 1
                     if effect_data['rounds_left'] <= 0:
                         effects_to_remove.append(effect_name)
-                        try:
-                            await message.bot.send_message(uid, f"📈 Эффект '{effect_name}' в вашей стране закончился.")
-                        except Exception:
-                            pass
+                        outgoing.append((uid, f"📈 Эффект '{effect_name}' в вашей стране закончился.", {}))
                 for effect_name in effects_to_remove:
                     del p['temp_effects'][effect_name]
 
@@ -559,11 +718,10 @@ async def admin_next_round_logic(message: types.Message, state: FSMContext):
             income_details = []
 
             global_income_modifier = 1.0
-            if game_state.active_global_event:
-                event_id = game_state.active_global_event['id']
-                event_class = EVENT_CLASSES[event_id]
-                if hasattr(event_class, 'on_start_effect'):
-                    effect = event_class.on_start_effect
+            event_object = global_events.runtime.current(message.bot)
+            if event_object:
+                if hasattr(event_object, 'on_start_effect'):
+                    effect = event_object.on_start_effect
                     if effect and effect.get('type') == 'income_modifier':
                         global_income_modifier = 1.0 + effect.get('value', 0)
 
@@ -591,6 +749,7 @@ async def admin_next_round_logic(message: types.Message, state: FSMContext):
                     income_details.append(f"  • {city_name}: ${base_income}")
 
             p['budget'] += total_income
+            timeseries.series.append(game_state.current_round, uid, p, total_income)
 
             income_report = f"Доход: **${total_income}**.\n"
             if income_details:
@@ -601,128 +760,139 @@ async def admin_next_round_logic(message: types.Message, state: FSMContext):
                    f"Ваш бюджет: **${p['budget']}**")
             if game_state.current_round == 10: msg += "\n\n🎉 **Бонус:** Вы получаете +1 дополнительное действие!"
 
-            try:
-                await message.bot.send_message(uid, msg, parse_mode="Markdown", reply_markup=main_menu(uid))
-            except Exception as e:
-                print(f"Error sending next round message to {uid}: {e}")
+            outgoing.append((uid, msg, {"parse_mode": "Markdown", "reply_markup": main_menu(uid)}))
 
+        game_state.record_event(event_log.ROUND_STARTED)
+        await timeseries.series.flush()
+        await game_state.event_log.spill_rounds_before(game_state.current_round - config.EVENT_LOG_KEEP_ROUNDS)
+        # Сообщения о начале раунда и график — рассылки под учётом: остановка бота их дошлёт
+        await outbound(send_each(message.bot, outgoing))
+        # График рисуется в отдельном процессе и уходит следом за сообщениями о начале раунда
+        recipients = [uid for uid, p in game_state.players.items() if p.get('country') and not p.get('eliminated')]
+        await outbound(round_charts.charts.send(message.bot, recipients, game_state.current_round))
         await message.answer(f"✅ Раунд {game_state.current_round} начат!", reply_markup=main_menu(config.ADMIN_ID))
 
     finally:
         game_state.is_processing_next_round = False
 
 
-def get_world_state_analysis():
-    """
-    Анализирует game_state и возвращает простую сводку о состоянии мира.
-    """
-    total_nukes = 0
-    total_cities = 0
-    total_qol = 0
-
-    # Собираем данные только по живым игрокам
-    active_players = [p for p in game_state.players.values() if p.get("country") and not p.get("eliminated")]
-    if not active_players:
-        # Если игроков нет, возвращаем "мирное" состояние
-        return {'total_nukes': 0, 'avg_qol': 70}
-
-    for player in active_players:
-        # Считаем общее количество ракет в производстве и готовых
-        total_nukes += player.get('ready_nukes', 0) + player.get('pending_nukes', 0)
-
-        # Считаем средний уровень жизни
-        player_cities = player.get('cities', {}).values()
-        if player_cities:
-            for city in player_cities:
-                total_qol += city.get('qol', 50)
-                total_cities += 1
-
-    # Рассчитываем средние значения
-    avg_qol = (total_qol / total_cities) if total_cities > 0 else 70
-
-    return {
-        'total_nukes': total_nukes,
-        'avg_qol': avg_qol
-    }
-
-
-def calculate_event_weights(available_events, world_state):
-    weights = []
-
-    total_nukes = world_state.get('total_nukes', 0)
-    avg_qol = world_state.get('avg_qol', 70)
+async def admin_restart_game_logic(message: types.Message, state: FSMContext):
+    admin_data = game_state.players.get(config.ADMIN_ID)
+    game_state.players.clear()
+    if admin_data: game_state.players[config.ADMIN_ID] = admin_data
+    game_state.current_round, game_state.round_end_time = 1, None
+    game_state.game_id = uuid.uuid4().hex[:12]
+    game_state.event_log = game_state.new_event_log(game_state.game_id)
+    game_state.newspaper_archive = game_state.new_newspaper_archive(game_state.game_id)
+    global_events.runtime.finish()
+    game_state.record_event(event_log.GAME_RESTARTED)
 
-    for event_id in available_events:
-        base_weight = 10  # Базовый шанс
+    # --- ЛОГ ДЕЙСТВИЯ ---
+    log_text = "🔥 <b>Администратор</b> полностью перезапустил игру. Все данные сброшены."
+    await log_action(message.bot, log_text)
+    # ---------------------
 
-        if event_id == "PANDEMIC":
-            if avg_qol < 40:
-                base_weight += 50
-            if avg_qol > 80:
-                base_weight = 1
+    await message.answer("🔥 Игра полностью сброшена!", reply_markup=main_menu(config.ADMIN_ID))
 
-        if event_id == "ENERGY_CRISIS":
-            if total_nukes > 5:
-                base_weight += 60
-            if total_nukes == 0:
-                base_weight = 1
 
+STATS_PAGE_SIZE = 5  # Стран на одной странице статистики
 
-        if event_id == "TECH_BREAKTHROUGH":
-            if avg_qol > 75:
-                base_weight += 40
-            if total_nukes > 3:
-                base_weight = 1
 
-        if event_id == "BLACK_MARKET":
-            if total_nukes > 0:
-                base_weight += 20
-            if avg_qol < 50:
-                base_weight += 20
+def _avg_qol(player):
+    cities = player.get('cities', {}).values()
+    return sum(city['qol'] for city in cities) / len(cities) if cities else 0
 
 
-        if event_id == "SOLAR_FLARE":
-            base_weight = 5
+STATS_SORT_KEYS = {
+    "budget": lambda p: p.get('budget', 0),
+    "nukes": lambda p: p.get('ready_nukes', 0) + p.get('pending_nukes', 0),
+    "qol": _avg_qol,
+}
 
-        if event_id == "GLOBAL_ESPIONAGE":
-            if total_nukes > 2:
-                base_weight += 30
 
-        weights.append(max(1, base_weight))
+def _render_country(uid, p):
+    display_text = f"<b>{p['country']} ({p.get('nickname', 'N/A')})</b>"
+    if p.get('eliminated'):
+        display_text += " ☠️"
+    lines = [f"{display_text} (ID: <code>{uid}</code>)\n"
+             f"💰 Бюджет: {p.get('budget', 0)}\n"
+             f"🚀 Ракеты: {p.get('ready_nukes', 0)}/{p.get('pending_nukes', 0)}\n"
+             f"🛡 Щиты: {p.get('shields', 0)}\n"]
+    for city, data in p.get('cities', {}).items():
+        lines.append(f"  • {city}: ур. {data['level']}, QoL {data['qol']}%\n")
+    return "".join(lines)
 
-    return weights
-async def admin_restart_game_logic(message: types.Message, state: FSMContext):
-    admin_data = game_state.players.get(config.ADMIN_ID)
-    game_state.players.clear()
-    if admin_data: game_state.players[config.ADMIN_ID] = admin_data
-    game_state.current_round, game_state.round_end_time = 1, None
-    game_state.round_events.clear()
-    game_state.active_global_event = None
 
-    # --- ЛОГ ДЕЙСТВИЯ ---
-    log_text = "🔥 <b>Администратор</b> полностью перезапустил игру. Все данные сброшены."
-    await log_action(message.bot, log_text)
-    # ---------------------
+class StatsPages:
+    """
+    Страницы статистики стран для админа. Для каждой пары (фильтр, сортировка)
+    все страницы собираются за один проход и живут, пока не изменилась версия
+    журнала событий: повторные просмотры в течение раунда ничего не пересчитывают.
+    """
 
-    await message.answer("🔥 Игра полностью сброшена!", reply_markup=main_menu(config.ADMIN_ID))
+    def __init__(self, page_size):
+        self.page_size = page_size
+        self._version = None
+        self._pages = {}  # (фильтр, сортировка) -> [текст страницы, ...]
+
+    def get(self, filter_name, sort_key):
+        version = (game_state.game_id, game_state.event_log.version)
+        if version != self._version:
+            self._version = version
+            self._pages.clear()
+        pages = self._pages.get((filter_name, sort_key))
+        if pages is None:
+            pages = self._pages[(filter_name, sort_key)] = self._build(filter_name, sort_key)
+            metrics.inc("admin_stats_rebuilds")
+        return pages
+
+    def _build(self, filter_name, sort_key):
+        players = [(uid, p) for uid, p in game_state.players.items() if p.get('country')]
+        if filter_name == "active":
+            players = [(uid, p) for uid, p in players if not p.get('eliminated')]
+        elif filter_name == "eliminated":
+            players = [(uid, p) for uid, p in players if p.get('eliminated')]
+        sort_by = STATS_SORT_KEYS[sort_key]
+        players.sort(key=lambda item: sort_by(item[1]), reverse=True)
+        title = (f"📊 <b>Статистика стран</b> ({STATS_FILTERS[filter_name]}, "
+                 f"сортировка: {STATS_SORTS[sort_key]}), всего: {len(players)}\n\n")
+        if not players:
+            return [title + "Нет стран под этот фильтр."]
+        return [title + "—————————\n".join(_render_country(uid, p) for uid, p in players[i:i + self.page_size])
+                for i in range(0, len(players), self.page_size)]
+
+
+stats_pages = StatsPages(STATS_PAGE_SIZE)
+memory_report.register("admin_stats_cache", lambda: [stats_pages])
+memory_report.register("timeseries", lambda: [timeseries.series])
+
+
+def _stats_view(filter_name, sort_key, page):
+    pages = stats_pages.get(filter_name, sort_key)
+    page = min(max(page, 0), len(pages) - 1)
+    return pages[page], admin_stats_keyboard(filter_name, sort_key, page, len(pages))
 
 
 async def admin_show_all_stats_logic(message: types.Message, state: FSMContext):
-    active_players = [p for p in game_state.players.values() if p.get('country')]
-    if not active_players:
+    if not any(p.get('country') for p in game_state.players.values()):
         return await message.answer("Нет зарегистрированных игроков.")
-    stats_text = "📊 <b>Статистика всех стран:</b>\n\n"
-    for uid, p in game_state.players.items():
-        if not p.get('country'): continue
-        display_text = f"<b>{p['country']} ({p.get('nickname', 'N/A')})</b>"
-        stats_text += (f"{display_text} (ID: <code>{uid}</code>)\n"
-                       f"💰 Бюджет: {p.get('budget', 0)}\n"
-                       f"🚀 Ракеты: {p.get('ready_nukes', 0)}/{p.get('pending_nukes', 0)}\n"
-                       f"🛡 Щиты: {p.get('shields', 0)}\n")
-        for city, data in p.get('cities', {}).items():
-            stats_text += f"  • {city}: ур. {data['level']}, QoL {data['qol']}%\n"
-        stats_text += "—————————\n"
-    await message.answer(stats_text, parse_mode="HTML")
+    text, keyboard = _stats_view("all", "budget", 0)
+    await message.answer(text, parse_mode="HTML", reply_markup=keyboard)
+
+
+@admin_router.callback_query(PlayerFilter(is_admin=True), F.data.startswith("ast:"), flags={"throttle": "view"})
+async def handle_admin_stats_page(callback: types.CallbackQuery):
+    """Листает статистику стран, редактируя одно сообщение."""
+    _, filter_name, sort_key, page = callback.data.split(":")
+    if filter_name not in STATS_FILTERS or sort_key not in STATS_SORTS:
+        return await callback.answer()
+    text, keyboard = _stats_view(filter_name, sort_key, int(page))
+    try:
+        await callback.message.edit_text(text, parse_mode="HTML", reply_markup=keyboard)
+    except Exception as e:
+        # Повторное нажатие на текущую страницу даёт "message is not modified"
+        print(f"Error showing admin stats page: {e}")
+    await callback.answer()
 
 
 async def admin_show_ready_list_logic(message: types.Message, state: FSMContext):
@@ -738,6 +908,25 @@ async def admin_show_ready_list_logic(message: types.Message, state: FSMContext)
     await message.answer(text, parse_mode="HTML")
 
 
+async def admin_event_weights_logic(message: types.Message, state: FSMContext):
+    """Таблица весов глобальных событий при текущем состоянии мира."""
+    features = world_features.features.snapshot()
+    text = "⚖️ <b>Признаки мира:</b>\n"
+    text += "".join(f"• {name}: <code>{value:g}</code>\n" for name, value in features.items())
+    weights = {event_id: global_events.event_weight(event_class, features)
+               for event_id, event_class in EVENT_CLASSES.items()}
+    available_total = sum(w for event_id, w in weights.items() if event_id not in game_state.event_cooldowns)
+    text += "\n<b>Веса событий</b> (шанс среди доступных):\n"
+    for event_id, weight in sorted(weights.items(), key=lambda item: -item[1]):
+        cooldown = game_state.event_cooldowns.get(event_id)
+        if cooldown:
+            chance = f"перезарядка {cooldown} р."
+        else:
+            chance = f"{weight / available_total:.0%}" if available_total else "—"
+        text += f"• {EVENT_CLASSES[event_id].name}: <code>{weight:g}</code> ({chance})\n"
+    await message.answer(text, parse_mode="HTML")
+
+
 async def admin_check_timer_logic(message: types.Message, state: FSMContext):
     if game_state.round_end_time is None:
         return await message.answer("Таймер раунда неактивен.")
@@ -751,6 +940,7 @@ async def admin_check_timer_logic(message: types.Message, state: FSMContext):
 async def show_newspaper_logic_wrapper(message: types.Message, state: FSMContext):
     newspaper_text = await generate_newspaper_report()
     if newspaper_text:
-        await message.answer(newspaper_text, parse_mode="Markdown")
+        for chunk in split_message(newspaper_text, markdown=True):
+            await message.answer(chunk, parse_mode="Markdown")
     else:
         await message.answer("🗞 В мире пока затишье. Новостей по итогам прошлого раунда нет.")
\ No newline at end of file
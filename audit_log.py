@@ -0,0 +1,146 @@
+# audit_log.py
+
+import asyncio
+import os
+import sqlite3
+
+import config
+import event_log
+import game_state
+import metrics
+
+COLUMNS = ("game_id", "seq", "round", "type", "actor_id", "actor", "target_id", "target",
+           "city", "amount", "detail", "ts")
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS audit (
+    game_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    round INTEGER NOT NULL,
+    type TEXT NOT NULL,
+    actor_id INTEGER,
+    actor TEXT,
+    target_id INTEGER,
+    target TEXT,
+    city TEXT,
+    amount INTEGER NOT NULL DEFAULT 0,
+    detail TEXT,
+    ts REAL NOT NULL,
+    PRIMARY KEY (game_id, seq)
+);
+CREATE INDEX IF NOT EXISTS idx_audit_round ON audit (game_id, round);
+CREATE INDEX IF NOT EXISTS idx_audit_actor ON audit (actor);
+CREATE INDEX IF NOT EXISTS idx_audit_target ON audit (target);
+CREATE INDEX IF NOT EXISTS idx_audit_type ON audit (type, game_id);
+"""
+# Фильтры команды /audit: ключ -> колонка
+FILTERS = {"type": "type", "actor": "actor", "target": "target", "city": "city", "round": "round", "game": "game_id"}
+GROUPS = {"actor", "target", "type", "round", "city"}
+
+# Записи журнала, ещё не записанные в базу. Пишет их фоновая задача пачками.
+_pending = []
+
+
+def on_event(event):
+    """Подписчик журнала событий: каждая запись попадает и в аудит."""
+    _pending.append((game_state.game_id, *event))
+
+
+event_log.subscribe(on_event)
+
+
+def connect(path=None):
+    path = path or config.AUDIT_DB_PATH
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA journal_mode=WAL")  # Чтение запросов не блокирует запись
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def write_batch(rows, path=None):
+    """Записывает пачку записей одной транзакцией (вызывается в потоке)."""
+    connection = connect(path)
+    try:
+        with connection:
+            connection.executemany(
+                f"INSERT OR IGNORE INTO audit ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+    finally:
+        connection.close()
+
+
+async def flush():
+    """Забирает накопленные записи и пишет их в базу в отдельном потоке."""
+    while _pending:
+        batch = _pending[:config.AUDIT_BATCH_SIZE]
+        del _pending[:len(batch)]
+        try:
+            await asyncio.to_thread(write_batch, batch)
+            metrics.inc("audit_written", len(batch))
+        except Exception as e:
+            # Пачка возвращается в начало очереди, следующая попытка — на следующем цикле
+            _pending[:0] = batch
+            print(f"Ошибка записи аудита: {e}")
+            return
+
+
+async def audit_writer_task():
+    """Фоновая задача: периодически сбрасывает записи аудита в SQLite."""
+    try:
+        while True:
+            await asyncio.sleep(config.AUDIT_FLUSH_INTERVAL)
+            await flush()
+    finally:
+        await flush()
+
+
+def parse_query(text: str):
+    """
+    Разбирает аргументы команды /audit: `ключ=значение` через пробел.
+    Возвращает (фильтры, группировка, лимит). Значения с запятыми — несколько вариантов.
+    """
+    filters, group, limit = {}, None, config.AUDIT_QUERY_LIMIT
+    for token in text.split():
+        key, sep, value = token.partition("=")
+        if not sep or not value:
+            raise ValueError(f"Ожидается ключ=значение, получено {token!r}")
+        key = key.lower()
+        if key == "group":
+            if value not in GROUPS:
+                raise ValueError(f"Группировка возможна по: {', '.join(sorted(GROUPS))}")
+            group = value
+        elif key == "limit":
+            limit = max(1, min(int(value), 200))
+        elif key in FILTERS:
+            values = value.split(",")
+            if key == "type":
+                values = [v.upper() for v in values]
+            elif key == "round":
+                values = [int(v) for v in values]
+            filters[key] = values
+        else:
+            raise ValueError(f"Неизвестный ключ {key!r}. Доступны: {', '.join(FILTERS)}, group, limit")
+    if "game" not in filters:
+        filters["game"] = [game_state.game_id]
+    elif filters["game"] == ["all"]:
+        del filters["game"]
+    return filters, group, limit
+
+
+def query(filters: dict, group=None, limit=20, path=None):
+    """Выполняет запрос к аудиту (в потоке). Возвращает строки результата."""
+    where, params = [], []
+    for key, values in filters.items():
+        where.append(f"{FILTERS[key]} IN ({', '.join('?' * len(values))})")
+        params.extend(values)
+    clause = f"WHERE {' AND '.join(where)}" if where else ""
+    if group:
+        sql = (f"SELECT {group}, COUNT(*), SUM(amount) FROM audit {clause} "
+               f"GROUP BY {group} ORDER BY COUNT(*) DESC LIMIT ?")
+    else:
+        sql = (f"SELECT round, type, actor, target, city, amount, detail FROM audit {clause} "
+               f"ORDER BY ts DESC, seq DESC LIMIT ?")
+    connection = connect(path)
+    try:
+        return connection.execute(sql, (*params, limit)).fetchall()
+    finally:
+        connection.close()
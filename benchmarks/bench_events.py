@@ -0,0 +1,71 @@
+# benchmarks/bench_events.py
+#
+# Стоимость обращения к активному глобальному событию: прежний способ
+# (поиск класса и новый объект на каждое нажатие и каждую отрисовку меню)
+# против кэшированного объекта в global_events.runtime, а также время импорта
+# реестра событий с ленивой подгрузкой плагинов и без неё.
+#
+# Пример:  python benchmarks/bench_events.py -n 100000
+
+import argparse
+import os
+import subprocess
+import sys
+import timeit
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import game_state  # noqa: E402
+import global_events  # noqa: E402
+from global_events import EVENT_CLASSES  # noqa: E402
+
+
+def legacy_interaction(bot):
+    """Прежний путь обработчика: класс по ID и новый объект на каждое нажатие."""
+    event_class = EVENT_CLASSES.get(game_state.active_global_event['id'])
+    return event_class(bot, game_state.active_global_event)
+
+
+def legacy_button():
+    """Прежняя отрисовка главного меню."""
+    event_class = EVENT_CLASSES.get(game_state.active_global_event.get('id'))
+    if event_class and hasattr(event_class, 'type') and event_class.type in ['crisis', 'opportunity']:
+        return getattr(event_class, "button_text", "🌍 Глобальное событие")
+    return None
+
+
+def import_time(statement, repeat):
+    """Лучшее время холодного импорта в отдельном интерпретаторе, мс."""
+    code = f"import time; t = time.perf_counter(); {statement}; print(time.perf_counter() - t)"
+    # config при импорте может печатать предупреждения, время — последняя строка вывода
+    timings = [float(subprocess.check_output([sys.executable, "-c", code], cwd=ROOT, text=True).split()[-1])
+               for _ in range(repeat)]
+    return min(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк обращения к глобальным событиям")
+    parser.add_argument("-n", "--number", type=int, default=100000)
+    parser.add_argument("-r", "--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    bot = object()
+    global_events.runtime.start(bot, EVENT_CLASSES["PANDEMIC"])
+
+    def measure(func):
+        return min(timeit.repeat(func, number=args.number, repeat=args.repeat)) / args.number * 1e9
+
+    print(f"Нажатие, новый объект:        {measure(lambda: legacy_interaction(bot)):8.0f} нс")
+    print(f"Нажатие, кэшированный объект: {measure(lambda: global_events.runtime.current(bot)):8.0f} нс")
+    print(f"Меню, поиск класса:           {measure(legacy_button):8.0f} нс")
+    print(f"Меню, кэшированная кнопка:    {measure(global_events.runtime.button):8.0f} нс")
+
+    lazy = import_time("import global_events", args.repeat)
+    full = import_time("import global_events; global_events.EVENT_CLASSES['PANDEMIC']", args.repeat)
+    print(f"Импорт реестра (плагины не загружены): {lazy:8.2f} мс")
+    print(f"Импорт реестра + загрузка плагинов:    {full:8.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+# benchmarks/bench_newspaper.py
+#
+# Сравнивает прежнюю сборку газеты (повторные проходы по событиям раунда)
+# с однопроходной сборкой по корзинам журнала.
+#
+# Пример:  python benchmarks/bench_newspaper.py -n 10000
+
+import argparse
+import os
+import random
+import sys
+import timeit
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import event_log  # noqa: E402
+from event_log import EventLog  # noqa: E402
+from newspaper import build_newspaper  # noqa: E402
+from newspaper_templates import TEMPLATES  # noqa: E402
+
+COUNTRIES = ["Украина", "Россия", "США", "Германия", "Франция", "Великобритания", "Израиль", "Иран"]
+REGULAR = [event_log.BUNKER_BUILT, event_log.SOCIAL_PROGRAM, event_log.SHIELD_BUILT,
+           event_log.NUKE_PRODUCED, event_log.CITY_UPGRADED]
+PRIORITY = [event_log.ATTACK_SUCCESS, event_log.ATTACK_SHIELDED]
+# Типы без шаблонов газеты тоже попадают в журнал и должны пропускаться дёшево
+OTHER = [event_log.AID_SENT, event_log.ESPIONAGE, event_log.EVENT_CONTRIBUTION]
+
+
+def fill_log(n, seed=1):
+    rng = random.Random(seed)
+    log = EventLog()
+    for i in range(n):
+        roll = rng.random()
+        event_type = rng.choice(PRIORITY) if roll < 0.02 else rng.choice(OTHER) if roll < 0.3 else rng.choice(REGULAR)
+        actor, target = rng.sample(COUNTRIES, 2)
+        log.append(event_type, 1, actor_id=i % 8, actor=actor, target_id=(i + 1) % 8, target=target, city="Город")
+    return log
+
+
+def legacy_newspaper(round_events):
+    """Прежний алгоритм generate_newspaper_report (для сравнения)."""
+    priority_types = ['ATTACK_SUCCESS', 'ATTACK_SHIELDED', 'COUNTRY_ELIMINATED', 'SURRENDERED']
+    headlines = []
+    priority_events = [e for e in round_events if e['type'] in priority_types]
+    for event in priority_events:
+        template_info = TEMPLATES.get(event['type'])
+        if template_info:
+            headlines.append(f"⚡ {random.choice(template_info[1]).format(**event)}")
+    regular_events = [e for e in round_events if e['type'] not in priority_types]
+    event_counts = Counter(e['type'] for e in regular_events)
+    for event_type, count in event_counts.items():
+        template_info = TEMPLATES.get(event_type)
+        if not template_info:
+            continue
+        summary_threshold, specific_templates, summary_templates = template_info
+        if summary_threshold and count >= summary_threshold:
+            headlines.append(f"📌 {random.choice(summary_templates)}")
+        else:
+            for event in [e for e in regular_events if e['type'] == event_type]:
+                headlines.append(f"🔹 {random.choice(specific_templates).format(**event)}")
+    random.shuffle(headlines)
+    return "\n\n".join(headlines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк сборки газеты")
+    parser.add_argument("-n", "--events", type=int, default=10000)
+    parser.add_argument("-r", "--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    log = fill_log(args.events)
+    legacy_events = [dict(e.template_fields(), type=e.type) for e in log.round_slice(1)]
+
+    legacy = min(timeit.repeat(lambda: legacy_newspaper(legacy_events), number=1, repeat=args.repeat))
+    single_pass = min(timeit.repeat(lambda: build_newspaper(1, event_log.group_by_type(log.round_slice(1)), seed=1),
+                                    number=1, repeat=args.repeat))
+    bucketed = min(timeit.repeat(lambda: build_newspaper(1, log.round_buckets(1), seed=1),
+                                 number=1, repeat=args.repeat))
+
+    assert build_newspaper(1, log.round_buckets(1), seed=7) == build_newspaper(1, log.round_buckets(1), seed=7)
+    print(f"Событий в раунде: {args.events}")
+    print(f"Прежний алгоритм:         {legacy * 1000:8.2f} мс")
+    print(f"Один проход по раунду:    {single_pass * 1000:8.2f} мс")
+    print(f"Готовые корзины журнала:  {bucketed * 1000:8.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# benchmarks/bench_snapshot.py
+#
+# Пауза цикла событий при снимке состояния: прежний способ (pickle всего
+# game_state прямо в цикле) против заморозки копии со структурным разделением.
+# Сериализация и сжатие копии идут в потоке и на паузу не влияют — их время
+# печатается отдельно.
+#
+# Пример:  python benchmarks/bench_snapshot.py --players 1000 --events 20000
+
+import argparse
+import os
+import pickle
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config  # noqa: E402
+import event_log  # noqa: E402
+import game_state  # noqa: E402
+import persistence  # noqa: E402
+
+CITY_TEMPLATE = next(iter(config.countries))
+
+
+def fill_game(players, events, seed=1):
+    rng = random.Random(seed)
+    game_state.event_log = event_log.EventLog()
+    game_state.players = {}
+    for uid in range(1, players + 1):
+        player = game_state.new_player(uid)
+        player["country"], player["nickname"] = f"Страна {uid}", f"Игрок {uid}"
+        player["cities"] = game_state.new_cities(CITY_TEMPLATE)
+        player["budget"] = rng.randint(0, 50000)
+        player["temp_effects"] = {"recession": {"rounds_left": 2}} if rng.random() < 0.1 else {}
+        game_state.players[uid] = player
+    for i in range(events):
+        actor, target = rng.randint(1, players), rng.randint(1, players)
+        game_state.record_event(event_log.CITY_UPGRADED, actor=game_state.players[actor],
+                                target=game_state.players[target], city="Город", amount=i)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Бенчмарк снимка состояния")
+    parser.add_argument("--players", type=int, default=1000)
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--dirty", type=int, default=20, help="игроков, изменившихся между снимками")
+    parser.add_argument("-r", "--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    fill_game(args.players, args.events)
+    freezer = persistence.SnapshotFreezer()
+
+    def measure(func, setup=lambda: None):
+        timings = []
+        for _ in range(args.repeat):
+            setup()
+            timings.append(timeit.timeit(func, number=1))
+        return min(timings) * 1000
+
+    def touch():
+        for uid in random.sample(range(1, args.players + 1), args.dirty):
+            freezer.mark_dirty(uid)
+
+    legacy = measure(lambda: pickle.dumps(persistence.build_snapshot(), protocol=pickle.HIGHEST_PROTOCOL))
+    full = measure(freezer.freeze, freezer.mark_all_dirty)
+    incremental = measure(freezer.freeze, touch)
+    data = freezer.freeze()
+    background = measure(lambda: persistence.serialize(data))
+
+    print(f"Игроков: {args.players}, записей журнала: {args.events}, изменилось между снимками: {args.dirty}")
+    print(f"Пауза, pickle в цикле событий:          {legacy:8.2f} мс")
+    print(f"Пауза, заморозка всех игроков:          {full:8.2f} мс")
+    print(f"Пауза, заморозка изменившихся игроков:  {incremental:8.2f} мс")
+    print(f"Сериализация и сжатие в потоке:         {background:8.2f} мс ({len(persistence.serialize(data))} байт)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+# benchmarks/loadgen.py
+#
+# Генератор нагрузки для режима вебхука: отправляет синтетические апдейты
+# прямо на локальный сервер бота, минуя Telegram.
+#
+# Пример:  python benchmarks/loadgen.py --url http://127.0.0.1:8080/webhook --secret XXX -n 5000 -c 50
+
+import argparse
+import asyncio
+import random
+import time
+from collections import Counter
+
+from aiohttp import ClientSession
+
+TEXTS = ["Обзор стран", "Статистика", "🏢 Строительство", "💥 Военное дело", "⬅️ Назад"]
+
+
+def make_update(update_id, user_id, text):
+    """Собирает минимальный апдейт с текстовым сообщением от игрока."""
+    user = {"id": user_id, "is_bot": False, "first_name": f"load{user_id}"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": user,
+            "text": text,
+        },
+    }
+
+
+async def run(url, secret, total, concurrency, users):
+    statuses = Counter()
+    latencies = []
+    counter = iter(range(1, total + 1))
+    headers = {"X-Telegram-Bot-Api-Secret-Token": secret} if secret else {}
+
+    async def worker(session):
+        for update_id in counter:
+            update = make_update(update_id, random.randint(1, users), random.choice(TEXTS))
+            started = time.perf_counter()
+            try:
+                async with session.post(url, json=update, headers=headers) as response:
+                    statuses[response.status] += 1
+            except Exception as e:
+                statuses[type(e).__name__] += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    async with ClientSession() as session:
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2] * 1000
+    p99 = latencies[int(len(latencies) * 0.99) - 1] * 1000
+    print(f"Отправлено {total} апдейтов за {elapsed:.2f} сек ({total / elapsed:.0f} апд/сек)")
+    print(f"Задержка: p50 {p50:.1f} мс, p99 {p99:.1f} мс")
+    print("Ответы:", dict(statuses))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Нагрузочный тест вебхука бота")
+    parser.add_argument("--url", default="http://127.0.0.1:8080/webhook")
+    parser.add_argument("--secret", default="")
+    parser.add_argument("-n", "--total", type=int, default=1000)
+    parser.add_argument("-c", "--concurrency", type=int, default=20)
+    parser.add_argument("-u", "--users", type=int, default=13, help="Сколько разных игроков имитировать")
+    args = parser.parse_args()
+    asyncio.run(run(args.url, args.secret, args.total, args.concurrency, args.users))
+
+
+if __name__ == "__main__":
+    main()
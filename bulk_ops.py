@@ -0,0 +1,243 @@
+# bulk_ops.py
+#
+# Массовые изменения состояния игры из документа JSON или CSV.
+# Модуль не знает про Telegram: разбирает документ, проверяет все строки
+# и применяет изменения за один проход, только если ошибок нет.
+#
+# Формат строки (JSON — список объектов или {"changes": [...]}, CSV — те же колонки):
+#   country  — страна (или id — Telegram ID игрока)
+#   budget, ready_nukes, pending_nukes, shields, actions_left — поля страны
+#   city + level, qol, bunker_level, ruined — поля города
+#   temp_effects — {"recession": {"rounds_left": 2}} (в CSV — JSON в ячейке)
+# Числа можно менять относительно: "+500" или "-1". Пустые ячейки CSV пропускаются.
+# Кодировка — UTF-8 или cp1251 (так сохраняет CSV русский Excel).
+
+import csv
+import io
+import json
+
+import config
+import game_state
+
+
+class BulkOpsError(ValueError):
+    """Документ не прошёл проверку; `errors` — список всех найденных ошибок."""
+
+    def __init__(self, errors):
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+
+# Поле -> (минимум, максимум или None)
+PLAYER_FIELDS = {
+    "budget": (0, None),
+    "ready_nukes": (0, None),
+    "pending_nukes": (0, None),
+    "shields": (0, config.MAX_TOTAL_SHIELDS),
+    "actions_left": (0, None),
+}
+CITY_FIELDS = {
+    "level": (0, config.MAX_CITY_LEVEL),
+    "qol": (0, 100),
+    "bunker_level": (0, config.MAX_BUNKER_LEVEL),
+}
+SERVICE_COLUMNS = {"country", "id", "city"}
+ENCODINGS = ("utf-8-sig", "cp1251")
+
+
+def _decode(data: bytes) -> str:
+    for encoding in ENCODINGS:
+        try:
+            return data.decode(encoding)
+        except UnicodeDecodeError:
+            continue
+    raise BulkOpsError([f"Не удалось прочитать документ: ожидается кодировка {' или '.join(ENCODINGS)}"])
+
+
+def parse_document(filename: str, data: bytes) -> list:
+    """Строки изменений из файла .json или .csv."""
+    text = _decode(data)
+    if filename.lower().endswith(".csv"):
+        rows, errors = [], []
+        try:
+            for number, row in enumerate(csv.DictReader(io.StringIO(text)), 1):
+                row = {key.strip(): value.strip() for key, value in row.items()
+                       if isinstance(key, str) and key.strip() and isinstance(value, str) and value.strip()}
+                if "temp_effects" in row:
+                    try:
+                        row["temp_effects"] = json.loads(row["temp_effects"])
+                    except json.JSONDecodeError as e:
+                        errors.append(f"Строка {number}: temp_effects не JSON ({e})")
+                rows.append(row)
+        except csv.Error as e:
+            errors.append(f"Строка {len(rows) + 1}: ошибка CSV ({e})")
+        if errors:
+            raise BulkOpsError(errors)
+        return rows
+    try:
+        document = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise BulkOpsError([f"Документ не является JSON: {e}"])
+    rows = document.get("changes") if isinstance(document, dict) else document
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise BulkOpsError(["Ожидается список изменений или объект {\"changes\": [...]}"])
+    return rows
+
+
+def _parse_int(raw):
+    """Целое число из ячейки CSV или JSON. Дробные значения не округляются, а считаются ошибкой."""
+    if isinstance(raw, float) and raw.is_integer():
+        return int(raw)
+    if isinstance(raw, int) and not isinstance(raw, bool):
+        return raw
+    if isinstance(raw, str):
+        try:
+            return int(raw.strip())
+        except ValueError:
+            pass
+    raise ValueError(f"ожидается целое число, получено {raw!r}")
+
+
+def _parse_value(raw, current, bounds):
+    """Новое значение поля: число или изменение "+N"/"-N" относительно текущего."""
+    relative = isinstance(raw, str) and raw.strip()[:1] in ("+", "-")
+    value = _parse_int(raw)
+    if relative:
+        value += current
+    low, high = bounds
+    if value < low or (high is not None and value > high):
+        raise ValueError(f"значение {value} вне диапазона {low}..{high if high is not None else '∞'}")
+    return value
+
+
+def _parse_bool(raw):
+    if isinstance(raw, bool):
+        return raw
+    if str(raw).lower() in ("1", "true", "yes", "да"):
+        return True
+    if str(raw).lower() in ("0", "false", "no", "нет"):
+        return False
+    raise ValueError(f"ожидается да/нет, получено {raw!r}")
+
+
+def _find_player(row, players, staged):
+    if "id" in row:
+        try:
+            uid = _parse_int(row["id"])
+        except ValueError:
+            raise ValueError(f"неверный id {row['id']!r}")
+        if uid in players:
+            return uid
+        raise ValueError(f"игрок {uid} не найден")
+    country = row.get("country")
+    if not country:
+        raise ValueError("нужна колонка country или id")
+    if not isinstance(country, str):
+        raise ValueError(f"страна должна быть строкой, получено {country!r}")
+    for known in (players, staged or {}):
+        for uid, p in known.items():
+            if p.get("country") == country:
+                return uid
+    if staged is not None and country in config.countries:
+        # Сценарий для симулятора и бенчмарков: создаём страну с условным ID
+        uid = -(len(staged) + 1)
+        player = game_state.new_player(uid)
+        player["country"], player["nickname"], player["cities"] = country, country, game_state.new_cities(country)
+        staged[uid] = player
+        return uid
+    raise ValueError(f"страна {country!r} не найдена")
+
+
+def validate(rows: list, players: dict, create_missing: bool = False) -> list:
+    """
+    Проверяет все строки и возвращает список изменений
+    (uid, город или None, поле, новое значение). Если есть хоть одна ошибка,
+    бросает BulkOpsError со всеми ошибками сразу — ничего не применяется.
+    """
+    errors, changes = [], []
+    staged = {} if create_missing else None  # Новые страны сценария, попадут в players только без ошибок
+    # Значения с учётом предыдущих строк: "+500" в двух строках даёт +1000
+    pending = {}
+
+    def player_of(uid):
+        return players[uid] if uid in players else staged[uid]
+
+    def current(uid, city, field):
+        key = (uid, city, field)
+        if key in pending:
+            return pending[key]
+        player = player_of(uid)
+        return player.get(field, 0) if city is None else player["cities"][city].get(field, 0)
+
+    for number, row in enumerate(rows, 1):
+        try:
+            uid = _find_player(row, players, staged)
+        except (ValueError, TypeError, KeyError) as e:
+            errors.append(f"Строка {number}: {e}")
+            continue
+        city = row.get("city")
+        if city is not None and not isinstance(city, str):
+            errors.append(f"Строка {number}: город должен быть строкой, получено {city!r}")
+            continue
+        if city and city not in player_of(uid)["cities"]:
+            errors.append(f"Строка {number}: у страны {player_of(uid)['country']} нет города {city!r}")
+            continue
+        for field, raw in row.items():
+            if field in SERVICE_COLUMNS:
+                continue
+            try:
+                if field in PLAYER_FIELDS:
+                    value = _parse_value(raw, current(uid, None, field), PLAYER_FIELDS[field])
+                    key = (uid, None, field)
+                elif field == "temp_effects":
+                    if not isinstance(raw, dict) or not all(
+                            isinstance(effect, dict) and isinstance(effect.get("rounds_left"), int)
+                            for effect in raw.values()):
+                        raise ValueError("ожидается {\"эффект\": {\"rounds_left\": N}}")
+                    value, key = raw, (uid, None, field)
+                elif field in CITY_FIELDS or field == "ruined":
+                    if not city:
+                        raise ValueError(f"поле {field} требует колонку city")
+                    value = (_parse_bool(raw) if field == "ruined"
+                             else _parse_value(raw, current(uid, city, field), CITY_FIELDS[field]))
+                    key = (uid, city, field)
+                else:
+                    raise ValueError(f"неизвестное поле {field!r}")
+            except (ValueError, TypeError, KeyError) as e:
+                errors.append(f"Строка {number}, {field}: {e}")
+                continue
+            pending[key] = value
+            changes.append((uid, key[1], field, value))
+
+    if errors:
+        raise BulkOpsError(errors)
+    players.update(staged or {})
+    return changes
+
+
+def apply(changes: list, players: dict) -> list:
+    """Применяет проверенные изменения. Возвращает строки диффа "страна[/город]: поле старое → новое"."""
+    diff = []
+    for uid, city, field, value in changes:
+        player = players[uid]
+        if city is None:
+            target, label = player, player["country"]
+        else:
+            target, label = player["cities"][city], f"{player['country']}/{city}"
+        old = target.get(field)
+        if field == "temp_effects":
+            old = dict(old or {})
+            target.setdefault("temp_effects", {}).update(value)
+        else:
+            target[field] = value
+        if field == "level":
+            # Доход города следует за уровнем, как в пошаговом изменении города
+            target["income"] = value * 500
+        if old != value:
+            diff.append(f"{label}: {field} {old} → {value}")
+    return diff
+
+
+def apply_document(filename: str, data: bytes, players: dict, create_missing: bool = False) -> list:
+    """Разбор, проверка и применение документа целиком."""
+    return apply(validate(parse_document(filename, data), players, create_missing), players)
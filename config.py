@@ -43,12 +43,78 @@ BUNKER_EFFECTS = {
     3: (55, 0.75)
 }
 MAX_BUNKER_LEVEL = 3
+EVENT_CHANCE = 0.33  # Шанс начала глобального события в раунде без активного события
+EVENT_COOLDOWN = 3  # Сколько раундов событие не может повториться
 
 # --- Настройки времени ---
 ROUND_DURATION = 600  # 10 минут
 ADMIN_CALL_BAN_DURATION = 120  # 2 минуты
 MAX_TOTAL_SHIELDS = 3
 
+# --- Защита от дублей (повторные апдейты и двойные нажатия) ---
+DEDUP_TTL = 600  # 10 минут
+DEDUP_MAX_KEYS = 10000
+
+# --- Анти-флуд (вёдра токенов на игрока) ---
+THROTTLE_RATES = {
+    "view": (0.5, 3),    # Отчёты (статистика, обзор, рейтинг, история, архив): 1 запрос в 2 сек, всплеск до 3
+    "action": (1, 5),    # Действия, меняющие состояние игры
+    "admin": (5, 20)     # Админские команды
+}
+THROTTLE_VIEW_MERGE_WINDOW = 3  # Повтор того же экрана за 3 сек склеивается
+THROTTLE_IDLE_TTL = 600  # Вёдра неактивных игроков удаляются через 10 минут
+
+# --- Фоновые задачи, сохранение и остановка ---
+DATA_DIR = os.getenv("DATA_DIR", "data")
+SNAPSHOT_PATH = os.getenv("SNAPSHOT_PATH", os.path.join(DATA_DIR, "game_state.pickle"))
+EVENT_LOG_KEEP_ROUNDS = 3  # Сколько последних раундов журнала держать в памяти
+SNAPSHOT_INTERVAL = 60  # Сохранять состояние раз в минуту
+SNAPSHOT_COMPRESS_LEVEL = 6  # Уровень gzip для снимка (сжатие идёт в потоке)
+AUDIT_DB_PATH = os.getenv("AUDIT_DB_PATH", os.path.join(DATA_DIR, "audit.sqlite3"))
+AUDIT_FLUSH_INTERVAL = 2  # Как часто сбрасывать записи аудита в базу, сек
+AUDIT_BATCH_SIZE = 500  # Записей в одной транзакции
+AUDIT_QUERY_LIMIT = 20  # Строк в ответе /audit по умолчанию
+HISTORY_ROUNDS = 10  # Сколько последних раундов показывать в «📈 История»
+LEADERBOARD_TOP = 5  # Мест в каждом разделе «🏆 Рейтинг»
+ROUND_CHARTS = os.getenv("ROUND_CHARTS", "0") == "1"  # График итогов раунда (нужен matplotlib)
+CHART_WORKERS = 1  # Процессов для отрисовки графиков
+CHART_MAX_COUNTRIES = 12  # Стран на графике (самые богатые)
+REPLAY_DIR = os.getenv("REPLAY_DIR", os.path.join(DATA_DIR, "replays"))  # Пустая строка — запись реплеев отключена
+REPLAY_FLUSH_INTERVAL = 2  # Как часто дописывать реплей на диск, сек
+REPLAY_MAX_DIVERGENCE_REPORTS = 20  # Сколько расхождений с записью печатать при воспроизведении
+LOG_QUEUE_SIZE = 1000
+SHUTDOWN_DRAIN_TIMEOUT = 10  # Сколько секунд досылать очередь при остановке
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))  # 0 — сервер метрик отключён
+DASHBOARD_HOST = "127.0.0.1"
+DASHBOARD_PORT = int(os.getenv("DASHBOARD_PORT", "0"))  # 0 — дашборд отключён
+DASHBOARD_REFRESH_INTERVAL = 1  # Как часто проверять версию состояния, сек
+DASHBOARD_MAX_AGE = 10  # Пересобирать срез не реже, чем раз в 10 сек (готовность, таймер)
+DASHBOARD_EVENTS = 200  # Сколько последних записей журнала показывать
+MEMORY_REPORT_MAX_AGE = 30  # Отчёт о памяти для /metrics пересчитывается не чаще раза в 30 сек
+MEMORY_REPORT_STEP = 5000  # Обход памяти уступает цикл событий каждые 5000 объектов
+MEMORY_TOP_LIMIT = 15  # Строк в выводе tracemalloc
+TRACEMALLOC_FRAMES = 1  # Глубина стека выделений при трассировке
+
+# --- Лимиты исходящих сообщений (ограничения Telegram) ---
+SEND_GLOBAL_RATE = 25  # сообщений в секунду на весь бот
+SEND_GLOBAL_BURST = 30
+SEND_PER_CHAT_RATE = 1  # сообщений в секунду в один чат
+SEND_PER_CHAT_BURST = 3
+DELIVERY_CONCURRENCY = 50  # Сколько получателей рассылки обслуживается одновременно
+LIVE_PROGRESS_EDIT_INTERVAL = 1  # Живой прогресс события правится не чаще раза в секунду на чат
+
+# --- Режим получения апдейтов: "polling" или "webhook" ---
+BOT_MODE = os.getenv("BOT_MODE", "polling")
+WEBHOOK_BASE_URL = os.getenv("WEBHOOK_BASE_URL", "")  # Публичный https-адрес бота
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/webhook")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8080"))
+WEBHOOK_QUEUE_SIZE = 1000  # Сколько апдейтов может ждать обработки
+WEBHOOK_WORKERS = 8  # Сколько апдейтов обрабатывается одновременно
+WEBHOOK_ENQUEUE_TIMEOUT = 5  # Сколько секунд ждать места в очереди, прежде чем ответить 503
+
 
 DEVELOPMENT_LEVELS = {
     0:  "Начальное развитие",
@@ -0,0 +1,170 @@
+# dashboard.py
+
+import asyncio
+import html
+import json
+import time
+from typing import NamedTuple
+
+from aiohttp import web
+
+import config
+import game_state
+import global_events
+import metrics
+
+
+class DashboardSnapshot(NamedTuple):
+    """Неизменяемый срез состояния для дашборда: данные и уже готовые ответы."""
+    version: tuple
+    built_at: float
+    sections: dict  # раздел -> готовый JSON (bytes)
+    state_json: bytes
+    html: str
+
+
+def collect_state() -> dict:
+    """Копирует из game_state всё, что показывает дашборд. Единственное место, где читается живое состояние."""
+    players = []
+    for uid, p in game_state.players.items():
+        if not p.get('country'):
+            continue
+        players.append({
+            'id': uid,
+            'country': p['country'],
+            'nickname': p.get('nickname'),
+            'budget': p.get('budget', 0),
+            'ready_nukes': p.get('ready_nukes', 0),
+            'pending_nukes': p.get('pending_nukes', 0),
+            'shields': p.get('shields', 0),
+            'eliminated': bool(p.get('eliminated')),
+            'ready': bool(p.get('ready_for_next_round')),
+            'cities': {name: {'level': c['level'], 'qol': c['qol'], 'income': c.get('income', 0),
+                              'bunker_level': c.get('bunker_level', 0), 'ruined': bool(c.get('ruined'))}
+                       for name, c in p.get('cities', {}).items()},
+        })
+
+    active = None
+    event_object = global_events.runtime.current()
+    if event_object:
+        active = {
+            'id': event_object.ID,
+            'name': event_object.name,
+            'type': event_object.type,
+            'progress': event_object.data.get('progress', 0),
+            'goal': getattr(event_object, 'goal_amount', None),
+            'rounds_left': event_object.data.get('rounds_left'),
+        }
+
+    log = game_state.event_log
+    events = [event._asdict() for event in log.since(log.version - config.DASHBOARD_EVENTS)]
+
+    return {
+        'game_id': game_state.game_id,
+        'round': {'current': game_state.current_round, 'end_time': game_state.round_end_time},
+        'players': players,
+        'ready': {'ready': [p['country'] for p in players if p['ready'] and not p['eliminated']],
+                  'not_ready': [p['country'] for p in players if not p['ready'] and not p['eliminated']]},
+        'active_event': active,
+        'cooldowns': dict(game_state.event_cooldowns),
+        'events': events,
+    }
+
+
+def _table(headers, rows):
+    head = "".join(f"<th>{html.escape(str(h))}</th>" for h in headers)
+    body = "".join("<tr>" + "".join(f"<td>{html.escape(str(cell))}</td>" for cell in row) + "</tr>" for row in rows)
+    return f"<table><tr>{head}</tr>{body}</table>"
+
+
+def render_html(state: dict) -> str:
+    end_time = state['round']['end_time']
+    timer = time.strftime("%H:%M:%S", time.localtime(end_time)) if end_time else "не запущен"
+    event = state['active_event']
+    event_text = (f"{event['name']} — {event['progress']}/{event['goal']}, осталось раундов: {event['rounds_left']}"
+                  if event else "нет")
+    players = _table(
+        ["Страна", "Игрок", "Бюджет", "Ракеты", "Щиты", "Города (ур./QoL)", "Готов", "Статус"],
+        [(p['country'], p['nickname'], p['budget'], f"{p['ready_nukes']}/{p['pending_nukes']}", p['shields'],
+          ", ".join(f"{name} {c['level']}/{c['qol']}%" for name, c in p['cities'].items()),
+          "✅" if p['ready'] else "—", "выбыл" if p['eliminated'] else "в игре")
+         for p in state['players']])
+    cooldowns = _table(["Событие", "Раундов"], sorted(state['cooldowns'].items()))
+    events = _table(["#", "Раунд", "Тип", "Кто", "Кого", "Город", "Сумма", "Детали"],
+                    [(e['seq'], e['round'], e['type'], e['actor'] or "", e['target'] or "", e['city'] or "",
+                      e['amount'] or "", e['detail'] or "") for e in reversed(state['events'])])
+    return (
+        "<!doctype html><html><head><meta charset='utf-8'><title>Игра</title>"
+        "<meta http-equiv='refresh' content='10'>"
+        "<style>body{font-family:sans-serif}table{border-collapse:collapse;margin-bottom:1em}"
+        "td,th{border:1px solid #ccc;padding:2px 6px}</style></head><body>"
+        f"<h1>Игра {html.escape(state['game_id'])}, раунд {state['round']['current']}</h1>"
+        f"<p>Конец раунда: {timer}. Глобальное событие: {html.escape(event_text)}</p>"
+        f"<h2>Страны</h2>{players}<h2>Перезарядка событий</h2>{cooldowns}"
+        f"<h2>Журнал событий</h2>{events}</body></html>"
+    )
+
+
+def serialize(version, state: dict) -> DashboardSnapshot:
+    """Готовит все ответы заранее; работает с копией, поэтому может выполняться в потоке."""
+    sections = {name: json.dumps(value, ensure_ascii=False).encode("utf-8") for name, value in state.items()}
+    return DashboardSnapshot(version, time.time(), sections,
+                             json.dumps(state, ensure_ascii=False).encode("utf-8"), render_html(state))
+
+
+class Dashboard:
+    """
+    Локальный дашборд только для чтения. Запросы отдают последний готовый срез
+    и никогда не обходят game_state; срез пересобирается, когда меняется версия
+    журнала событий (или раз в DASHBOARD_MAX_AGE секунд — для изменений вне журнала).
+    """
+
+    def __init__(self):
+        self.snapshot = None
+
+    async def refresh(self):
+        version = (game_state.game_id, game_state.event_log.version)
+        if (self.snapshot and self.snapshot.version == version
+                and time.time() - self.snapshot.built_at < config.DASHBOARD_MAX_AGE):
+            return
+        state = collect_state()
+        self.snapshot = await asyncio.to_thread(serialize, version, state)
+        metrics.inc("dashboard_refreshes")
+
+    async def handle_html(self, request):
+        return web.Response(text=self.snapshot.html, content_type="text/html")
+
+    async def handle_state(self, request):
+        return web.Response(body=self.snapshot.state_json, content_type="application/json")
+
+    async def handle_section(self, request):
+        body = self.snapshot.sections.get(request.match_info["section"])
+        if body is None:
+            raise web.HTTPNotFound()
+        return web.Response(body=body, content_type="application/json")
+
+    async def run(self):
+        await self.refresh()
+        app = web.Application()
+        app.router.add_get("/", self.handle_html)
+        app.router.add_get("/api/state", self.handle_state)
+        app.router.add_get("/api/{section}", self.handle_section)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, config.DASHBOARD_HOST, config.DASHBOARD_PORT)
+        await site.start()
+        print(f"Дашборд доступен на http://{config.DASHBOARD_HOST}:{config.DASHBOARD_PORT}/")
+        try:
+            while True:
+                await asyncio.sleep(config.DASHBOARD_REFRESH_INTERVAL)
+                await self.refresh()
+        finally:
+            await runner.cleanup()
+
+
+dashboard = Dashboard()
+
+
+async def dashboard_task():
+    """Фоновая задача: HTTP-сервер дашборда и обновление среза."""
+    await dashboard.run()
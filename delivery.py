@@ -0,0 +1,212 @@
+# delivery.py
+
+import asyncio
+import time
+
+from aiogram.exceptions import TelegramForbiddenError
+
+import config
+import game_state
+import metrics
+
+MAX_MESSAGE_LENGTH = 4096  # Ограничение Telegram на длину одного сообщения
+MARKDOWN_BOLD = "**"
+
+
+def _hard_split(block, limit):
+    """Режет блок длиннее лимита по строкам, а одну слишком длинную строку — по пробелам."""
+    pieces, current = [], ""
+    for line in block.split("\n"):
+        while len(line) > limit:
+            cut = line.rfind(" ", 0, limit)
+            cut = cut if cut > 0 else limit
+            if current:
+                pieces.append(current)
+                current = ""
+            pieces.append(line[:cut])
+            line = line[cut:].lstrip(" ")
+        candidate = f"{current}\n{line}" if current else line
+        if len(candidate) > limit:
+            pieces.append(current)
+            current = line
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _balance_bold(chunks):
+    """Если жирный текст разрезан между сообщениями, закрывает его в одном и открывает в следующем."""
+    balanced, carry = [], False
+    for chunk in chunks:
+        if carry:
+            chunk = MARKDOWN_BOLD + chunk
+        carry = chunk.count(MARKDOWN_BOLD) % 2 == 1
+        if carry:
+            chunk += MARKDOWN_BOLD
+        balanced.append(chunk)
+    return balanced
+
+
+def split_message(text: str, limit: int = MAX_MESSAGE_LENGTH, separator: str = "\n\n", markdown: bool = False):
+    """
+    Делит длинный текст на сообщения не длиннее `limit`, разрезая только по
+    границам блоков (`separator` — между заголовками газеты или странами в статистике).
+    Блок длиннее лимита режется по строкам. Для Markdown разметка остаётся парной в каждом куске.
+    """
+    if len(text) <= limit:
+        return [text]
+    # Запас под закрывающую и открывающую разметку при разрезе жирного текста
+    budget = limit - 2 * len(MARKDOWN_BOLD) if markdown else limit
+    chunks, current = [], ""
+    for block in text.split(separator):
+        blocks = [block] if len(block) <= budget else _hard_split(block, budget)
+        for piece in blocks:
+            candidate = f"{current}{separator}{piece}" if current else piece
+            if len(candidate) <= budget:
+                current = candidate
+            else:
+                if current:
+                    chunks.append(current)
+                current = piece
+    if current:
+        chunks.append(current)
+    return _balance_bold(chunks) if markdown else chunks
+
+
+class DeliveryReport:
+    """Итоги рассылки: сколько доставлено, сколько не удалось и сколько это заняло."""
+
+    def __init__(self):
+        self.sent = 0
+        self.failed = {}  # chat_id -> текст ошибки
+        self.blocked = []  # Заблокировали бота во время этой рассылки
+        self.skipped = 0  # Пропущены как недоступные ещё до рассылки
+        self.latencies = []
+        self.elapsed = 0.0
+
+    def summary(self) -> str:
+        text = (f"📬 Доставлено: {self.sent}, ошибок: {len(self.failed)}, "
+                f"заблокировали бота: {len(self.blocked)}, пропущено недоступных: {self.skipped}, "
+                f"время: {self.elapsed:.1f} сек")
+        if self.latencies:
+            latencies = sorted(self.latencies)
+            text += (f" (в среднем {sum(latencies) / len(latencies):.2f} сек на получателя, "
+                     f"максимум {latencies[-1]:.2f} сек)")
+        return text
+
+
+# Рассылки, которые ещё идут. Каждая — отдельная задача: отмена обработчика её не
+# прерывает, а остановка бота дожидается её (drain), прежде чем закрыть сессию
+_outbound = set()
+
+
+def outbound(coro):
+    """Запускает рассылку отдельной задачей под учётом drain(). Результат ждут через await."""
+    task = asyncio.create_task(coro)
+    _outbound.add(task)
+    task.add_done_callback(_outbound.discard)
+    return asyncio.shield(task)
+
+
+async def drain(timeout: float):
+    """Ждёт незавершённые рассылки при остановке бота, но не дольше `timeout` секунд."""
+    loop = asyncio.get_running_loop()
+    deadline = loop.time() + timeout
+    while _outbound:
+        remaining = deadline - loop.time()
+        if remaining <= 0:
+            break
+        await asyncio.wait(list(_outbound), timeout=remaining)
+        # Обработчик, дождавшийся рассылки, мог сразу начать следующую
+        await asyncio.sleep(0)
+    if _outbound:
+        print(f"Не успели завершить {len(_outbound)} рассылок при остановке.")
+        for task in list(_outbound):
+            task.cancel()
+
+
+async def send_each(bot, messages):
+    """Персональные сообщения по очереди: [(chat_id, текст, параметры send_message), ...]."""
+    for chat_id, text, kwargs in messages:
+        await send_one(bot, chat_id, text, **kwargs)
+
+
+def reachable(chat_ids) -> list:
+    """Получатели без тех, кто заблокировал бота."""
+    return [chat_id for chat_id in chat_ids if chat_id not in game_state.unreachable]
+
+
+def mark_unreachable(chat_id):
+    """Игрок заблокировал бота: до его следующего сообщения рассылки его пропускают."""
+    if chat_id not in game_state.unreachable:
+        game_state.unreachable.add(chat_id)
+        metrics.inc("delivery_blocked")
+
+
+async def _guarded(chat_id, send):
+    """Отправка одному получателю из рассылки: недоступных пропускает, заблокировавших бота помечает."""
+    if chat_id in game_state.unreachable:
+        return None
+    try:
+        return await send()
+    except TelegramForbiddenError:
+        mark_unreachable(chat_id)
+    except Exception as e:
+        print(f"Error delivering message to {chat_id}: {e}")
+    return None
+
+
+async def send_one(bot, chat_id, text, **kwargs) -> bool:
+    """Одиночная отправка из рассылки с персональным текстом. Возвращает True, если сообщение ушло."""
+    return await _guarded(chat_id, lambda: bot.send_message(chat_id, text, **kwargs)) is not None
+
+
+async def send_photo_one(bot, chat_id, photo, **kwargs):
+    """Картинка из рассылки (файл или file_id). Возвращает отправленное сообщение или None."""
+    return await _guarded(chat_id, lambda: bot.send_photo(chat_id, photo, **kwargs))
+
+
+async def deliver(bot, chat_ids, chunks, parse_mode=None, reply_markup=None) -> DeliveryReport:
+    """
+    Отправляет все куски сообщения каждому получателю. Получатели обслуживаются
+    параллельно (не больше DELIVERY_CONCURRENCY одновременно), а общий лимит
+    Telegram соблюдает лимитер сессии бота. Игроки, заблокировавшие бота, пропускаются.
+    Рассылка идёт отдельной задачей (outbound): при остановке бота она досылается.
+    """
+    if isinstance(chunks, str):
+        chunks = [chunks]
+    return await outbound(_deliver(bot, list(chat_ids), chunks, parse_mode, reply_markup))
+
+
+async def _deliver(bot, chat_ids, chunks, parse_mode, reply_markup) -> DeliveryReport:
+    report = DeliveryReport()
+    semaphore = asyncio.Semaphore(config.DELIVERY_CONCURRENCY)
+    recipients = reachable(chat_ids)
+    report.skipped = len(chat_ids) - len(recipients)
+
+    async def send_to(chat_id):
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                for i, chunk in enumerate(chunks):
+                    # Клавиатуру прикрепляем к последнему куску
+                    markup = reply_markup if i == len(chunks) - 1 else None
+                    await bot.send_message(chat_id, chunk, parse_mode=parse_mode, reply_markup=markup)
+                report.sent += 1
+            except TelegramForbiddenError:
+                report.blocked.append(chat_id)
+                mark_unreachable(chat_id)
+            except Exception as e:
+                report.failed[chat_id] = str(e)
+                print(f"Error delivering message to {chat_id}: {e}")
+            report.latencies.append(time.monotonic() - started)
+
+    started = time.monotonic()
+    await asyncio.gather(*(send_to(chat_id) for chat_id in recipients))
+    report.elapsed = time.monotonic() - started
+    metrics.inc("delivery_sent", report.sent)
+    metrics.inc("delivery_failed", len(report.failed))
+    metrics.inc("delivery_skipped", report.skipped)
+    return report
@@ -0,0 +1,245 @@
+# event_log.py
+
+import asyncio
+import json
+import os
+import time
+from collections import Counter
+from typing import NamedTuple, Optional
+
+# --- Типы событий ---
+# Действия игроков
+PLAYER_JOINED = "PLAYER_JOINED"
+ESPIONAGE = "ESPIONAGE"
+BUNKER_BUILT = "BUNKER_BUILT"
+SOCIAL_PROGRAM = "SOCIAL_PROGRAM"
+CITY_UPGRADED = "CITY_UPGRADED"
+NUKE_PRODUCED = "NUKE_PRODUCED"
+SHIELD_BUILT = "SHIELD_BUILT"
+AID_SENT = "AID_SENT"
+ATTACK_SHIELDED = "ATTACK_SHIELDED"
+ATTACK_SUCCESS = "ATTACK_SUCCESS"
+CITY_LOOTED = "CITY_LOOTED"
+CITY_BURNED = "CITY_BURNED"
+COUNTRY_ELIMINATED = "COUNTRY_ELIMINATED"
+SURRENDERED = "SURRENDERED"
+# Глобальные события
+EVENT_CONTRIBUTION = "EVENT_CONTRIBUTION"
+EVENT_INVESTMENT = "EVENT_INVESTMENT"
+BLACK_MARKET_DEAL = "BLACK_MARKET_DEAL"
+GLOBAL_EVENT_STARTED = "GLOBAL_EVENT_STARTED"
+GLOBAL_EVENT_SUCCEEDED = "GLOBAL_EVENT_SUCCEEDED"
+GLOBAL_EVENT_FAILED = "GLOBAL_EVENT_FAILED"
+# Ход игры и действия администратора
+GAME_STARTED = "GAME_STARTED"
+ROUND_STARTED = "ROUND_STARTED"
+GAME_RESTARTED = "GAME_RESTARTED"
+ADMIN_ATTACK = "ADMIN_ATTACK"
+ADMIN_ATTACK_SHIELDED = "ADMIN_ATTACK_SHIELDED"
+ADMIN_CITY_MODIFIED = "ADMIN_CITY_MODIFIED"
+ADMIN_MESSAGE = "ADMIN_MESSAGE"
+ADMIN_BULK_EDIT = "ADMIN_BULK_EDIT"
+
+
+class Event(NamedTuple):
+    """Одна запись журнала. Кортеж: компактно в памяти и неизменяемо."""
+    seq: int
+    round: int
+    type: str
+    actor_id: Optional[int] = None
+    actor: Optional[str] = None  # Страна-инициатор
+    target_id: Optional[int] = None
+    target: Optional[str] = None  # Страна-цель
+    city: Optional[str] = None
+    amount: int = 0
+    detail: Optional[str] = None  # ID глобального события, текст сообщения и т.п.
+    ts: float = 0.0
+
+    def template_fields(self) -> dict:
+        """Поля для шаблонов газеты ({country}, {attacker}, {target}, {city})."""
+        country = self.target if self.type == COUNTRY_ELIMINATED else self.actor
+        return {"country": country, "attacker": self.actor, "target": self.target, "city": self.city}
+
+
+class EventSlice:
+    """Срез журнала по номерам записей. Ничего не копирует: читает записи из журнала при обходе."""
+    __slots__ = ("_log", "start", "stop")
+
+    def __init__(self, log, start: int, stop: int):
+        self._log = log
+        self.start = start
+        self.stop = stop
+
+    def __len__(self):
+        return self.stop - self.start
+
+    def __iter__(self):
+        return self._log._iter_range(self.start, self.stop)
+
+    def __bool__(self):
+        return self.stop > self.start
+
+
+def group_by_type(events) -> dict:
+    """Раскладывает записи по типам за один проход, сохраняя порядок внутри типа."""
+    buckets = {}
+    for event in events:
+        bucket = buckets.get(event.type)
+        if bucket is None:
+            buckets[event.type] = [event]
+        else:
+            bucket.append(event)
+    return buckets
+
+
+# Подписчики получают каждую новую запись (газета, аудит, метрики и т.д.)
+_subscribers = []
+
+
+def subscribe(callback):
+    """Регистрирует функцию, которая вызывается для каждой новой записи журнала."""
+    _subscribers.append(callback)
+    return callback
+
+
+class EventLog:
+    """
+    Журнал всех изменений состояния игры, только на дописывание.
+    Хранит счётчики по типам и границы раундов; старые раунды выгружаются
+    на диск (JSONL), чтобы память не росла на длинных играх.
+    """
+
+    def __init__(self, spill_dir: str = None):
+        self.spill_dir = spill_dir
+        self.version = 0  # Номер следующей записи, он же версия состояния игры
+        self.type_counts = Counter()
+        self._events = []  # Записи в памяти
+        self._base = 0  # Номер первой записи в памяти
+        self._round_bounds = {}  # раунд -> [первая запись, следующая за последней]
+        self._round_buckets = {}  # раунд -> {тип: [записи этого типа по порядку]}
+        self._spilled_rounds = set()
+
+    def append(self, event_type: str, round_number: int, **fields) -> Event:
+        event = Event(self.version, round_number, event_type, ts=time.time(), **fields)
+        self._events.append(event)
+        self.version += 1
+
+        bounds = self._round_bounds.get(round_number)
+        if bounds is None:
+            self._round_bounds[round_number] = [event.seq, event.seq + 1]
+            self._round_buckets[round_number] = {}
+        else:
+            bounds[1] = event.seq + 1
+        bucket = self._round_buckets[round_number].get(event_type)
+        if bucket is None:
+            self._round_buckets[round_number][event_type] = [event]
+        else:
+            bucket.append(event)
+        self.type_counts[event_type] += 1
+
+        for callback in _subscribers:
+            try:
+                callback(event)
+            except Exception as e:
+                print(f"Ошибка подписчика журнала событий {callback.__name__}: {e}")
+        return event
+
+    def _iter_range(self, start, stop):
+        events, base = self._events, self._base
+        if start < base:
+            raise LookupError(f"Записи {start}..{base - 1} уже выгружены на диск")
+        return map(events.__getitem__, range(start - base, stop - base))
+
+    def since(self, seq: int) -> EventSlice:
+        """Все записи, начиная с номера `seq` (для потребителей, читающих журнал по порядку)."""
+        return EventSlice(self, max(seq, self._base), self.version)
+
+    def round_slice(self, round_number: int):
+        """Записи одного раунда. Для выгруженного раунда читает их с диска."""
+        if round_number in self._spilled_rounds:
+            return self._read_spilled(round_number)
+        bounds = self._round_bounds.get(round_number)
+        if bounds is None:
+            return EventSlice(self, self.version, self.version)
+        return EventSlice(self, bounds[0], bounds[1])
+
+    def round_buckets(self, round_number: int) -> dict:
+        """Записи раунда, разложенные по типам. Корзины ведутся при добавлении, ничего не пересчитывается."""
+        buckets = self._round_buckets.get(round_number)
+        if buckets is not None:
+            return buckets
+        if round_number in self._spilled_rounds:
+            return group_by_type(self._read_spilled(round_number))
+        return {}
+
+    def round_type_counts(self, round_number: int) -> Counter:
+        return Counter({t: len(events) for t, events in self.round_buckets(round_number).items()})
+
+    def __len__(self):
+        return self.version
+
+    def frozen_copy(self) -> "EventLog":
+        """
+        Копия журнала для снимка состояния: дальнейшие записи её не меняют.
+        Сами записи неизменяемы, поэтому копируются только списки и словари.
+        """
+        clone = EventLog.__new__(EventLog)
+        clone.__dict__.update(self.__dict__)
+        clone.type_counts = Counter(self.type_counts)
+        clone._events = self._events[:]
+        clone._round_bounds = {r: bounds[:] for r, bounds in self._round_bounds.items()}
+        clone._round_buckets = {r: {t: events[:] for t, events in buckets.items()}
+                                for r, buckets in self._round_buckets.items()}
+        clone._spilled_rounds = set(self._spilled_rounds)
+        return clone
+
+    # --- Выгрузка старых раундов на диск ---
+
+    def _spill_path(self, round_number):
+        return os.path.join(self.spill_dir, f"round_{round_number:04d}.jsonl")
+
+    async def spill_rounds_before(self, round_number: int):
+        """
+        Выгружает на диск все раунды раньше `round_number` и освобождает память.
+        Каждый раунд пишется в свой файл через временный файл и переименование,
+        поэтому повторная выгрузка (повтор после ошибки, восстановление из снимка,
+        сделанного до выгрузки) перезаписывает файл раунда, а не дописывает его.
+        """
+        if not self.spill_dir:
+            return
+        old_rounds = sorted(r for r in self._round_bounds if r < round_number and r not in self._spilled_rounds)
+        if not old_rounds:
+            return
+        # Записи неизменяемы, поэтому в поток уходят готовые списки, а не живой журнал
+        rounds = {self._spill_path(r): list(self.round_slice(r)) for r in old_rounds}
+        try:
+            await asyncio.to_thread(_write_rounds, self.spill_dir, rounds)
+        except OSError as e:
+            # Раунды остаются в памяти, выгрузка повторится на следующем раунде
+            print(f"Ошибка выгрузки журнала событий в {self.spill_dir}: {e}")
+            return
+        for r in old_rounds:
+            self._spilled_rounds.add(r)
+            self._round_buckets.pop(r, None)
+
+        # Записи хранятся по порядку, раунды тоже идут по порядку: отрезаем голову списка
+        keep_from = min((self._round_bounds[r][0] for r in self._round_bounds if r not in self._spilled_rounds),
+                        default=self.version)
+        if keep_from > self._base:
+            del self._events[:keep_from - self._base]
+            self._base = keep_from
+
+    def _read_spilled(self, round_number):
+        with open(self._spill_path(round_number), encoding="utf-8") as f:
+            return [Event(*json.loads(line)) for line in f]
+
+
+def _write_rounds(spill_dir, rounds):
+    """Пишет выгруженные раунды: {путь: записи}. Вызывается в потоке."""
+    os.makedirs(spill_dir, exist_ok=True)
+    for path, events in rounds.items():
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for event in events:
+                f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, path)
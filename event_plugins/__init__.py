@@ -0,0 +1,4 @@
+# event_plugins/__init__.py
+#
+# Глобальные события: один модуль — одно событие (подкласс BaseEvent с атрибутом ID).
+# Модули импортируются лениво, при первом обращении к global_events.EVENT_CLASSES.
@@ -0,0 +1,57 @@
+# event_plugins/black_market.py
+
+import random
+
+from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+
+from events_base import BaseEvent, WeightRule
+
+
+class BlackMarketEvent(BaseEvent):
+    ID = "BLACK_MARKET"
+    name = "Чёрный рынок"
+    button_text = "💰 Связаться с торговцем"
+    duration = 2
+    goal_amount = 7500
+    type = 'opportunity'
+    weight_rules = (
+        WeightRule("total_nukes", ">", 0, "+", 20),
+        WeightRule("avg_qol", "<", 50, "+", 20),
+    )
+
+    async def get_start_message(self):
+        return (f"🤫 **ЧЁРНЫЙ РЫНОК!** В нейтральных водах появился торговец оружием. "
+                f"Первый, кто заплатит ему **${self.goal_amount}**, немедленно получит **2 готовые ядерные ракеты** в обход производственных циклов!")
+
+    async def on_fail(self, players):
+        fail_message = "Торговец оружием покинул регион, не дождавшись покупателей. Возможность упущена."
+        await self.notify(players, fail_message)
+
+    async def on_success(self, players, winner_player=None, rng=random):
+        winner_player['ready_nukes'] += 2
+        success_msg = (f"🚀 **СДЕЛКА СОСТОЯЛАСЬ!**\n\n"
+                       f"Страна **{winner_player['country']}** заключила контракт на чёрном рынке и немедленно получила 2 готовые боеголовки!")
+        await self.notify(players, success_msg, parse_mode="Markdown")
+
+    async def handle_interaction(self, message, state, player):
+        from keyboards import main_menu
+        from states import GlobalEvent
+
+        cost = self.goal_amount
+        if player['budget'] >= cost:
+            keyboard = ReplyKeyboardMarkup(
+                keyboard=[[KeyboardButton(text="✅ Подтвердить сделку"), KeyboardButton(text="❌ Отказаться")]],
+                resize_keyboard=True,
+                one_time_keyboard=True
+            )
+            await message.answer(
+                f"Вы уверены, что хотите потратить ${cost} на 2 готовые ракеты?\n"
+                "Это рискованная сделка, но она может дать вам преимущество.",
+                reply_markup=keyboard
+            )
+            await state.set_state(GlobalEvent.confirming_black_market)
+        else:
+            await message.answer(
+                f"У вас недостаточно средств для заключения контракта. Требуется: ${cost}, у вас: ${player['budget']}",
+                reply_markup=main_menu(message.from_user.id)
+            )
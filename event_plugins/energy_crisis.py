@@ -0,0 +1,50 @@
+# event_plugins/energy_crisis.py
+
+import random
+
+from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+
+from events_base import BaseEvent, WeightRule
+
+
+class EnergyCrisisEvent(BaseEvent):
+    ID = "ENERGY_CRISIS"
+    name = "Энергетический коллапс"
+    button_text = "🔧 Помочь в восстановлении"
+    duration = 3
+    goal_amount = 15000
+    type = 'crisis'
+    weight_rules = (
+        WeightRule("total_nukes", ">", 5, "+", 60),
+        WeightRule("total_nukes", "==", 0, "=", 1),
+    )
+
+    async def get_start_message(self):
+        return (f"📉 **ЭНЕРГЕТИЧЕСКИЙ КОЛЛАПС!** Глобальный сбой в энергосетях привел к остановке промышленности. "
+                f"**Производство щитов и ядерных ракет невозможно**, пока не будет собрана сумма в **${self.goal_amount}** на ремонт инфраструктуры.")
+
+    async def on_fail(self, players):
+        fail_message = ("**ПРОМЫШЛЕННЫЙ КОЛЛАПС!** Восстановить энергосеть не удалось. "
+                        "В следующем раунде стоимость производства щитов и ракет будет удвоена из-за дефицита ресурсов.")
+        await self.notify(players, fail_message, parse_mode="Markdown")
+
+    async def on_success(self, players, winner_player=None, rng=random):
+        success_message = ("**СИСТЕМА ВОССТАНОВЛЕНА!** Энергосеть снова в строю! "
+                           "Промышленность возвращается к работе. В благодарность за сотрудничество, "
+                           "все страны получают +1 очко действия в следующем раунде.")
+        for player_id, p_data in players.items():
+            if p_data.get("country"):
+                p_data['actions_left'] += 1
+        await self.notify(players, success_message)
+
+    async def handle_interaction(self, message, state, player):
+        from states import GlobalEvent
+        goal = self.goal_amount
+        progress = self.data.get('progress', 0)
+        await message.answer(
+            f"**{self.name}**\n\nСобрано на ремонт: **${progress} / ${goal}**\n\n"
+            f"Ваш бюджет: ${player['budget']}\nСколько вы хотите пожертвовать на восстановление?",
+            parse_mode="Markdown",
+            reply_markup=ReplyKeyboardMarkup(keyboard=[[KeyboardButton(text="Отмена")]], resize_keyboard=True)
+        )
+        await state.set_state(GlobalEvent.entering_contribution)
@@ -0,0 +1,17 @@
+# event_plugins/global_espionage.py
+
+from events_base import BaseEvent, WeightRule
+
+
+class GlobalEspionageEvent(BaseEvent):
+    ID = "GLOBAL_ESPIONAGE"
+    name = "Глобальный шпионаж"
+    duration = 1
+    type = 'shift'
+    weight_rules = (
+        WeightRule("total_nukes", ">", 2, "+", 30),
+    )
+
+    async def get_start_message(self):
+        return ("👁️ **ТОТАЛЬНАЯ СЛЕЖКА!** Произошла утечка финансовых данных всех мировых держав. "
+                "На этот раунд **бюджет каждой страны становится известен всем** в меню 'Обзор стран'!")
@@ -0,0 +1,56 @@
+# event_plugins/pandemic.py
+
+import random
+
+from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+
+from events_base import BaseEvent, WeightRule
+
+
+class PandemicEvent(BaseEvent):
+    ID = "PANDEMIC"
+    name = "Глобальная Пандемия"
+    button_text = "💉 Сделать взнос в фонд"
+    duration = 3
+    goal_amount = 20000
+    type = 'crisis'
+    on_start_effect = {"type": "income_modifier", "value": -0.20}
+    weight_rules = (
+        WeightRule("avg_qol", "<", 40, "+", 50),
+        WeightRule("avg_qol", ">", 80, "=", 1),
+    )
+
+    async def get_start_message(self):
+        return (f"🚨 **ГЛОБАЛЬНАЯ УГРОЗА!** В мире началась пандемия! "
+                f"Доход всех городов снижен на 20%, пока не будет собран "
+                f"фонд здравоохранения в размере **${self.goal_amount}**.")
+
+    async def on_fail(self, players):
+        fail_message = ("**КОЛЛАПС!** Мировым лидерам не удалось договориться. Пандемия выходит из-под контроля. "
+                        "В следующие 2 раунда мировая экономика будет в рецессии (-50% ко всему доходу).")
+        for player_id, p_data in players.items():
+            if p_data.get("country"):
+                p_data['temp_effects']['recession'] = {'rounds_left': 2}
+        await self.notify(players, fail_message, parse_mode="Markdown")
+
+    async def on_success(self, players, winner_player=None, rng=random):
+        success_message = ("**ПОБЕДА НАД БОЛЕЗНЬЮ!** Глобальный фонд собран! Учёные разработали вакцину. "
+                           "Экономические санкции снимаются!")
+        qol_bonus = rng.randint(3, 5)
+        for player_id, p_data in players.items():
+            if p_data.get("country"):
+                for city in p_data['cities'].values():
+                    city['qol'] = min(100, city['qol'] + qol_bonus)
+        await self.notify(players, success_message)
+
+    async def handle_interaction(self, message, state, player):
+        from states import GlobalEvent
+        goal = self.goal_amount
+        progress = self.data.get('progress', 0)
+        await message.answer(
+            f"**{self.name}**\n\nСобрано: **${progress} / ${goal}**\n\n"
+            f"Ваш бюджет: ${player['budget']}\nСколько вы хотите внести в общий фонд?",
+            parse_mode="Markdown",
+            reply_markup=ReplyKeyboardMarkup(keyboard=[[KeyboardButton(text="Отмена")]], resize_keyboard=True)
+        )
+        await state.set_state(GlobalEvent.entering_contribution)
@@ -0,0 +1,15 @@
+# event_plugins/solar_flare.py
+
+from events_base import BaseEvent
+
+
+class SolarFlareEvent(BaseEvent):
+    ID = "SOLAR_FLARE"
+    name = "Солнечная Вспышка"
+    duration = 1
+    type = 'shift'
+    base_weight = 5
+
+    async def get_start_message(self):
+        return ("💥 **КОСМИЧЕСКАЯ АНОМАЛИЯ!** Мощный выброс корональной массы обрушился на планету. "
+                "**Все защитные щиты в мире временно отключены** на этот раунд!")
@@ -0,0 +1,49 @@
+# event_plugins/tech_breakthrough.py
+
+import random
+
+from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+
+from events_base import BaseEvent, WeightRule
+
+
+class TechBreakthroughEvent(BaseEvent):
+    ID = "TECH_BREAKTHROUGH"
+    name = "Технологический Прорыв"
+    button_text = "✅ Инвестировать в проект"
+    duration = 3
+    goal_amount = 10000
+    type = 'opportunity'
+    weight_rules = (
+        WeightRule("avg_qol", ">", 75, "+", 40),
+        WeightRule("total_nukes", ">", 3, "=", 1),
+    )
+
+    async def get_start_message(self):
+        return (f"💡 **ШАНС ВЕКА!** Учёные на пороге открытия термоядерного синтеза. "
+                f"Нация, которая первой суммарно инвестирует **${self.goal_amount}**, "
+                f"получит вечный бонус +15% к доходу всех своих городов!")
+
+    async def on_fail(self, players):
+        fail_message = "УПУЩЕННАЯ ВОЗМОЖНОСТЬ! Никто не успел полностью профинансировать проект. Все вложенные средства утеряны."
+        await self.notify(players, fail_message)
+
+    async def on_success(self, players, winner_player=None, rng=random):
+        winner_player['income_modifier'] = winner_player.get('income_modifier', 1.0) + 0.15
+        success_msg = (f"🏆 **{self.name} ЗАВЕРШЕНО!**\n\n"
+                       f"Страна **{winner_player['country']}** первой достигла цели инвестиций и получает вечный бонус к доходу!")
+        await self.notify(players, success_msg, parse_mode="Markdown")
+
+    async def handle_interaction(self, message, state, player):
+        from states import GlobalEvent
+        goal = self.goal_amount
+        investors = self.data.get('investors', {})
+        my_progress = investors.get(message.from_user.id, 0)
+        await message.answer(
+            f"**{self.name}**\n\nЦель инвестиций: **${goal}**\n"
+            f"Ваш текущий вклад: **${my_progress}**\n\n"
+            f"Ваш бюджет: ${player['budget']}\nСколько вы хотите инвестировать?",
+            parse_mode="Markdown",
+            reply_markup=ReplyKeyboardMarkup(keyboard=[[KeyboardButton(text="Отмена")]], resize_keyboard=True)
+        )
+        await state.set_state(GlobalEvent.entering_investment)
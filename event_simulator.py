@@ -0,0 +1,162 @@
+# event_simulator.py
+#
+# Монте-Карло симулятор баланса глобальных событий. Прогоняет настоящую логику
+# выбора (global_events.roll_event с весами из правил событий) и перезарядки
+# (global_events.advance_cooldowns) на случайно блуждающих состояниях мира
+# и печатает частоты событий, исходы и долю раундов под кризисом.
+# Игры распределяются по процессам, у каждой игры свой seed — результат воспроизводим.
+#
+# Пример:  python event_simulator.py --games 20000 --rounds 50 --workers 4
+
+import argparse
+import random
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import bulk_ops
+import config
+import global_events
+import world_features
+from global_events import EVENT_CLASSES
+
+
+def sample_world(rng, previous=None, start=None):
+    """Следующее состояние мира: случайное блуждание признаков из world_features."""
+    if previous is None and start is not None:
+        return dict(start)
+    if previous is None:
+        players = rng.randint(3, 12)
+        return {
+            'active_players': players,
+            'total_nukes': rng.randint(0, 3),
+            'avg_qol': rng.uniform(30, 60),
+            'ruined_cities': 0,
+            'budget_gini': rng.uniform(0, 0.2),
+        }
+    players = previous['active_players']
+    if players > 2 and rng.random() < 0.03:
+        players -= 1  # Кто-то выбыл
+    ruined = previous['ruined_cities'] + (rng.random() < 0.1 * previous['total_nukes'] / players)
+    return {
+        'active_players': players,
+        'total_nukes': max(0, previous['total_nukes'] + rng.choice((-1, 0, 0, 1, 1))),
+        'avg_qol': min(100.0, max(0.0, previous['avg_qol'] + rng.gauss(0.5, 4))),
+        'ruined_cities': ruined,
+        'budget_gini': min(0.9, max(0.0, previous['budget_gini'] + rng.gauss(0, 0.02))),
+    }
+
+
+def spending(rng, contribution):
+    """Сколько один игрок вкладывает в событие за раунд (экспоненциальное распределение)."""
+    return rng.expovariate(1 / contribution) if contribution > 0 else 0
+
+
+def simulate_game(seed, rounds, contribution, start=None):
+    """Одна игра: раунды подряд с той же очерёдностью шагов, что и в admin_next_round_logic."""
+    rng = random.Random(seed)
+    stats = Counter()
+    cooldowns = {}
+    active = None  # [ID, осталось раундов, вклады игроков]
+    world = sample_world(rng, start=start)
+
+    for _ in range(rounds):
+        world = sample_world(rng, world)
+        global_events.advance_cooldowns(cooldowns)
+
+        if active:
+            event_id = active[0]
+            active[1] -= 1
+            if active[1] <= 0:
+                stats[f"fail:{event_id}"] += 1
+                cooldowns[event_id] = config.EVENT_COOLDOWN
+                active = None
+        else:
+            event_id = global_events.roll_event(cooldowns, world, rng)
+            if event_id:
+                event_class = EVENT_CLASSES[event_id]
+                cooldowns[event_id] = config.EVENT_COOLDOWN
+                active = [event_id, event_class.duration, [0] * world['active_players']]
+                stats[f"start:{event_id}"] += 1
+
+        stats["rounds"] += 1
+        if not active:
+            continue
+        event_class = EVENT_CLASSES[active[0]]
+        stats[f"active:{event_class.type}"] += 1
+        stats[f"active_rounds:{active[0]}"] += 1
+
+        # Взносы игроков за раунд: кризис закрывается общей суммой, возможность — вкладом одного игрока
+        goal = getattr(event_class, "goal_amount", 0)
+        if not goal or event_class.type not in global_events.INTERACTIVE_TYPES:
+            continue
+        investments = active[2]
+        for i in range(len(investments)):
+            investments[i] += spending(rng, contribution)
+        reached = sum(investments) >= goal if event_class.type == 'crisis' else max(investments) >= goal
+        if reached:
+            stats[f"success:{active[0]}"] += 1
+            active = None
+    return stats
+
+
+def simulate_batch(args):
+    seeds, rounds, contribution, start = args
+    total = Counter()
+    for seed in seeds:
+        total.update(simulate_game(seed, rounds, contribution, start))
+    return total
+
+
+def report(stats, games):
+    rounds = stats["rounds"]
+    print(f"Игр: {games}, раундов: {rounds}")
+    print(f"\n{'Событие':<20}{'запусков':>10}{'на 100 р.':>11}{'успех':>8}{'провал':>8}{'ср. длит.':>11}")
+    for event_id in EVENT_CLASSES:
+        started = stats[f"start:{event_id}"]
+        success, fail = stats[f"success:{event_id}"], stats[f"fail:{event_id}"]
+        finished = success + fail
+        avg_length = stats[f"active_rounds:{event_id}"] / started if started else 0
+        print(f"{event_id:<20}{started:>10}{started / rounds * 100:>11.2f}"
+              f"{(success / finished if finished else 0):>8.0%}{(fail / finished if finished else 0):>8.0%}"
+              f"{avg_length:>11.2f}")
+    print()
+    for event_type in ('crisis', 'opportunity', 'shift'):
+        print(f"Доля раундов с событием типа {event_type}: {stats[f'active:{event_type}'] / rounds:.1%}")
+    quiet = rounds - sum(stats[f"active:{t}"] for t in ('crisis', 'opportunity', 'shift'))
+    print(f"Доля раундов без события: {quiet / rounds:.1%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Монте-Карло симулятор глобальных событий")
+    parser.add_argument("--games", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=50, help="раундов в одной игре")
+    parser.add_argument("--workers", type=int, default=None, help="процессов (по умолчанию — число ядер)")
+    parser.add_argument("--contribution", type=float, default=1000,
+                        help="средний взнос одного игрока в событие за раунд, $")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--scenario", help="документ .json/.csv массовых изменений (bulk_ops): стартовый мир всех игр")
+    args = parser.parse_args()
+
+    start = None
+    if args.scenario:
+        players = {}
+        with open(args.scenario, "rb") as f:
+            try:
+                bulk_ops.apply_document(args.scenario, f.read(), players, create_missing=True)
+            except bulk_ops.BulkOpsError as e:
+                parser.error(f"сценарий не прошёл проверку:\n{e}")
+        start = world_features.compute(players)
+        print(f"Стартовый мир из {args.scenario}: {start}")
+
+    seeds = [args.seed * 1_000_003 + i for i in range(args.games)]
+    batch_size = max(1, len(seeds) // 64)
+    batches = [(seeds[i:i + batch_size], args.rounds, args.contribution, start) for i in range(0, len(seeds), batch_size)]
+    stats = Counter()
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        for batch_stats in pool.map(simulate_batch, batches):
+            stats.update(batch_stats)
+    report(stats, args.games)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,43 @@
 # events_base.py
 
+import operator
+import random
+from typing import NamedTuple
+
+from delivery import deliver
+
+# Сравнения, доступные в правилах весов
+RULE_OPERATORS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge, "==": operator.eq}
+
+
+class WeightRule(NamedTuple):
+    """
+    Правило веса события: если признак мира `feature` удовлетворяет условию
+    `op threshold`, к весу прибавляется `value` (action "+") или вес становится
+    равен `value` (action "="). Правила применяются по порядку.
+    """
+    feature: str
+    op: str
+    threshold: float
+    action: str
+    value: float
+
+    def apply(self, weight, features):
+        if not RULE_OPERATORS[self.op](features[self.feature], self.threshold):
+            return weight
+        return weight + self.value if self.action == "+" else self.value
+
+
 class BaseEvent:
     """
     Базовый класс (интерфейс) для всех глобальных событий.
     Определяет, какие "кнопки" должен иметь каждый пульт.
     """
+    ID = None  # Уникальный ID; по нему событие находится в реестре (global_events.EVENT_CLASSES)
+    type = None  # 'crisis', 'opportunity' или 'shift'
+    base_weight = 10  # Базовый шанс при случайном выборе события
+    weight_rules = ()  # Правила WeightRule над признаками мира (см. world_features)
+
     def __init__(self, bot, event_data):
         self.bot = bot
         self.data = event_data # Данные из game_state.active_global_event
@@ -25,10 +58,15 @@ class BaseEvent:
         """Обрабатывает нажатие игроком на кнопку события."""
         pass
 
-    async def on_success(self, players, winner_player=None):
-        """Выполняется, когда событие успешно завершается."""
+    async def on_success(self, players, winner_player=None, rng=random):
+        """Выполняется, когда событие успешно завершается. `rng` — генератор случайных чисел апдейта (для реплея)."""
         pass
 
     async def on_fail(self, players):
         """Выполняется, когда время события истекает."""
-        pass
\ No newline at end of file
+        pass
+
+    async def notify(self, players, text, parse_mode=None):
+        """Рассылает сообщение о событии всем странам (заблокировавшие бота пропускаются)."""
+        recipients = [player_id for player_id, p_data in players.items() if p_data.get("country")]
+        return await deliver(self.bot, recipients, [text], parse_mode=parse_mode)
\ No newline at end of file
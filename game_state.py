@@ -1,5 +1,13 @@
 # game_state.py
 
+import asyncio
+import os
+import uuid
+
+import config
+from event_log import EventLog
+from newspaper_archive import NewspaperArchive
+
 # --- Состояние игры (внутри-игровые данные) ---
 players = {}
 attack_sessions = {}
@@ -16,6 +24,55 @@ current_round = 1
 round_end_time = None
 round_notifications = {}
 
-round_events = []
 active_global_event = None
-is_processing_next_round = False
\ No newline at end of file
+is_processing_next_round = False
+
+# Игроки, заблокировавшие бота: рассылки их пропускают, пока игрок снова не напишет боту
+unreachable = set()
+
+# Критическая секция игры: проверка, списание и изменение общего прогресса
+# выполняются под ней целиком, даже если между ними есть await
+lock = asyncio.Lock()
+
+
+def new_player(user_id):
+    """Данные нового игрока (страна выбирается при регистрации)."""
+    return {
+        "id": user_id, "country": None, "nickname": None, "budget": config.START_BUDGET, "cities": {},
+        "pending_nukes": 0, "ready_nukes": 0, "shields": 0, "actions_left": 4,
+        "income_modifier": 1.0, "temp_effects": {},
+        "attacked_countries_this_round": [], "eliminated": False,
+        "shields_built_this_round": 0, "upgrades_this_round": 0,
+        "social_programs_this_round": 0, "ready_for_next_round": False
+    }
+
+
+def new_cities(country):
+    """Стартовые города страны."""
+    return {city: {"level": 1, "income": 500, "qol": 35, "bunker_level": 0, 'ruined': False}
+            for city in config.countries[country]}
+
+
+def new_event_log(game):
+    """Создаёт пустой журнал событий для игры `game`."""
+    return EventLog(spill_dir=os.path.join(config.DATA_DIR, "events", game))
+
+
+def new_newspaper_archive(game):
+    """Создаёт архив выпусков газеты для игры `game`."""
+    return NewspaperArchive(os.path.join(config.DATA_DIR, "newspapers", game))
+
+
+game_id = uuid.uuid4().hex[:12]
+event_log = new_event_log(game_id)
+newspaper_archive = new_newspaper_archive(game_id)
+
+
+def record_event(event_type, actor=None, target=None, city=None, amount=0, detail=None):
+    """Записывает событие текущего раунда в журнал. `actor` и `target` — словари игроков."""
+    return event_log.append(
+        event_type, current_round,
+        actor_id=actor["id"] if actor else None, actor=actor["country"] if actor else None,
+        target_id=target["id"] if target else None, target=target["country"] if target else None,
+        city=city, amount=amount, detail=detail
+    )
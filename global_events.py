@@ -1,230 +1,153 @@
 # global_events.py
 
+import importlib
+import pkgutil
 import random
-from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+from collections.abc import Mapping
 
-from events_base import BaseEvent
+import config
 import game_state
+from events_base import BaseEvent
+
+PLUGIN_PACKAGE = "event_plugins"  # Пакет, из которого подгружаются события
+DEFAULT_BUTTON_TEXT = "🌍 Глобальное событие"
+INTERACTIVE_TYPES = ("crisis", "opportunity")  # У этих событий есть кнопка в главном меню
+
 
+def discover_events(package_name: str = PLUGIN_PACKAGE) -> dict:
+    """Импортирует все модули пакета и собирает из них классы событий по ID."""
+    package = importlib.import_module(package_name)
+    classes = {}
+    for module_info in pkgutil.iter_modules(package.__path__):
+        module = importlib.import_module(f"{package_name}.{module_info.name}")
+        for obj in vars(module).values():
+            if (isinstance(obj, type) and issubclass(obj, BaseEvent) and obj.__module__ == module.__name__
+                    and getattr(obj, "ID", None)):
+                if obj.ID in classes:
+                    print(f"Событие {obj.ID} объявлено повторно в {module.__name__}, используется первое")
+                    continue
+                classes[obj.ID] = obj
+    return classes
+
+
+class EventRegistry(Mapping):
+    """Словарь ID -> класс события. Плагины импортируются при первом обращении, а не при старте бота."""
+
+    def __init__(self, package_name: str = PLUGIN_PACKAGE):
+        self.package_name = package_name
+        self._classes = None
+        self._button_texts = None
+
+    def _load(self):
+        if self._classes is None:
+            self._classes = discover_events(self.package_name)
+            self._button_texts = frozenset(getattr(cls, "button_text", DEFAULT_BUTTON_TEXT)
+                                           for cls in self._classes.values() if cls.type in INTERACTIVE_TYPES)
+        return self._classes
+
+    def __getitem__(self, event_id):
+        return self._load()[event_id]
+
+    def __iter__(self):
+        return iter(self._load())
+
+    def __len__(self):
+        return len(self._load())
+
+    def button_texts(self) -> frozenset:
+        self._load()
+        return self._button_texts
+
+
+EVENT_CLASSES = EventRegistry()
+
+
+def event_weight(event_class, features: dict):
+    """Вес события при случайном выборе: базовый вес, изменённый правилами класса."""
+    weight = event_class.base_weight
+    for rule in event_class.weight_rules:
+        weight = rule.apply(weight, features)
+    return max(1, weight)
+
+
+def event_weights(event_ids, features: dict) -> list:
+    return [event_weight(EVENT_CLASSES[event_id], features) for event_id in event_ids]
+
+
+def advance_cooldowns(cooldowns: dict):
+    """Уменьшает перезарядку событий на раунд и снимает истёкшие."""
+    for event_id in list(cooldowns):
+        cooldowns[event_id] -= 1
+        if cooldowns[event_id] <= 0:
+            del cooldowns[event_id]
+
+
+def roll_event(cooldowns: dict, features: dict, rng=random):
+    """
+    Выбор нового события в начале раунда: с шансом EVENT_CHANCE берётся одно из
+    событий без перезарядки пропорционально весам. Возвращает ID или None.
+    Той же функцией пользуется симулятор баланса (event_simulator.py).
+    """
+    if rng.random() >= config.EVENT_CHANCE:
+        return None
+    available = [event_id for event_id in EVENT_CLASSES if event_id not in cooldowns]
+    if not available:
+        return None
+    return rng.choices(available, weights=event_weights(available, features), k=1)[0]
+
+
+def is_event_button(text) -> bool:
+    """Фильтр для кнопок глобальных событий в главном меню."""
+    return text in EVENT_CLASSES.button_texts()
+
+
+class EventRuntime:
+    """
+    Активное глобальное событие. Объект события создаётся один раз при старте,
+    текст кнопки и тип кэшируются для клавиатуры. Состояние события по-прежнему
+    лежит в game_state.active_global_event (его сохраняет снимок), а объект
+    пересоздаётся, только если этот словарь подменили (новое событие, рестарт, загрузка).
+    """
+
+    def __init__(self):
+        self._data = None
+        self.event = None
+        self.button_text = None
+
+    def _sync(self, bot=None):
+        data = game_state.active_global_event
+        if data is not self._data:
+            self._data = data
+            event_class = EVENT_CLASSES.get(data['id']) if data else None
+            self.event = event_class(bot, data) if event_class else None
+            self.button_text = (getattr(event_class, "button_text", DEFAULT_BUTTON_TEXT)
+                                if event_class and event_class.type in INTERACTIVE_TYPES else None)
+        if bot is not None and self.event is not None and self.event.bot is None:
+            self.event.bot = bot  # Объект мог быть создан при отрисовке меню, ещё без бота
+
+    def start(self, bot, event_class) -> BaseEvent:
+        """Запускает событие и возвращает его объект."""
+        game_state.active_global_event = {
+            "id": event_class.ID,
+            "progress": 0,
+            "rounds_left": event_class.duration
+        }
+        self._sync(bot)
+        return self.event
+
+    def current(self, bot=None):
+        """Объект активного события или None."""
+        self._sync(bot)
+        return self.event
+
+    def button(self):
+        """Текст кнопки активного события для главного меню или None."""
+        self._sync()
+        return self.button_text
 
-class PandemicEvent(BaseEvent):
-    ID = "PANDEMIC"
-    name = "Глобальная Пандемия"
-    button_text = "💉 Сделать взнос в фонд"
-    duration = 3
-    goal_amount = 20000
-    type = 'crisis'
-    on_start_effect = {"type": "income_modifier", "value": -0.20}
-
-    async def get_start_message(self):
-        return (f"🚨 **ГЛОБАЛЬНАЯ УГРОЗА!** В мире началась пандемия! "
-                f"Доход всех городов снижен на 20%, пока не будет собран "
-                f"фонд здравоохранения в размере **${self.goal_amount}**.")
-
-    async def on_fail(self, players):
-        fail_message = ("**КОЛЛАПС!** Мировым лидерам не удалось договориться. Пандемия выходит из-под контроля. "
-                        "В следующие 2 раунда мировая экономика будет в рецессии (-50% ко всему доходу).")
-        for player_id, p_data in players.items():
-            if p_data.get("country"):
-                p_data['temp_effects']['recession'] = {'rounds_left': 2}
-                try:
-                    await self.bot.send_message(player_id, fail_message, parse_mode="Markdown")
-                except Exception: pass
-
-    async def on_success(self, players, winner_player=None):
-        success_message = ("**ПОБЕДА НАД БОЛЕЗНЬЮ!** Глобальный фонд собран! Учёные разработали вакцину. "
-                           "Экономические санкции снимаются!")
-        qol_bonus = random.randint(3, 5)
-        for player_id, p_data in players.items():
-            if p_data.get("country"):
-                for city in p_data['cities'].values():
-                    city['qol'] = min(100, city['qol'] + qol_bonus)
-                try:
-                    await self.bot.send_message(player_id, success_message)
-                except Exception: pass
-
-    async def handle_interaction(self, message, state, player):
-        from states import GlobalEvent
-        goal = self.goal_amount
-        progress = self.data.get('progress', 0)
-        await message.answer(
-            f"**{self.name}**\n\nСобрано: **${progress} / ${goal}**\n\n"
-            f"Ваш бюджет: ${player['budget']}\nСколько вы хотите внести в общий фонд?",
-            parse_mode="Markdown",
-            reply_markup=ReplyKeyboardMarkup(keyboard=[[KeyboardButton(text="Отмена")]], resize_keyboard=True)
-        )
-        await state.set_state(GlobalEvent.entering_contribution)
-
-class TechBreakthroughEvent(BaseEvent):
-    ID = "TECH_BREAKTHROUGH"
-    name = "Технологический Прорыв"
-    button_text = "✅ Инвестировать в проект"
-    duration = 3
-    goal_amount = 10000
-    type = 'opportunity'
-
-    async def get_start_message(self):
-        return (f"💡 **ШАНС ВЕКА!** Учёные на пороге открытия термоядерного синтеза. "
-                f"Нация, которая первой суммарно инвестирует **${self.goal_amount}**, "
-                f"получит вечный бонус +15% к доходу всех своих городов!")
-
-    async def on_fail(self, players):
-        fail_message = "УПУЩЕННАЯ ВОЗМОЖНОСТЬ! Никто не успел полностью профинансировать проект. Все вложенные средства утеряны."
-        for player_id, p_data in players.items():
-            if p_data.get("country"):
-                try:
-                    await self.bot.send_message(player_id, fail_message)
-                except Exception: pass
-
-    async def on_success(self, players, winner_player=None):
-        winner_player['income_modifier'] = winner_player.get('income_modifier', 1.0) + 0.15
-        success_msg = (f"🏆 **{self.name} ЗАВЕРШЕНО!**\n\n"
-                       f"Страна **{winner_player['country']}** первой достигла цели инвестиций и получает вечный бонус к доходу!")
-        for player_id, p_data in players.items():
-            if p_data.get("country"):
-                try:
-                    await self.bot.send_message(player_id, success_msg, parse_mode="Markdown")
-                except Exception: pass
-
-    async def handle_interaction(self, message, state, player):
-        from states import GlobalEvent
-        goal = self.goal_amount
-        investors = self.data.get('investors', {})
-        my_progress = investors.get(message.from_user.id, 0)
-        await message.answer(
-            f"**{self.name}**\n\nЦель инвестиций: **${goal}**\n"
-            f"Ваш текущий вклад: **${my_progress}**\n\n"
-            f"Ваш бюджет: ${player['budget']}\nСколько вы хотите инвестировать?",
-            parse_mode="Markdown",
-            reply_markup=ReplyKeyboardMarkup(keyboard=[[KeyboardButton(text="Отмена")]], resize_keyboard=True)
-        )
-        await state.set_state(GlobalEvent.entering_investment)
-
-class SolarFlareEvent(BaseEvent):
-    ID = "SOLAR_FLARE"
-    name = "Солнечная Вспышка"
-    duration = 1
-    type = 'shift'
-
-    async def get_start_message(self):
-        return ("💥 **КОСМИЧЕСКАЯ АНОМАЛИЯ!** Мощный выброс корональной массы обрушился на планету. "
-                "**Все защитные щиты в мире временно отключены** на этот раунд!")
-
-class EnergyCrisisEvent(BaseEvent):
-    ID = "ENERGY_CRISIS"
-    name = "Энергетический коллапс"
-    button_text = "🔧 Помочь в восстановлении"
-    duration = 3
-    goal_amount = 15000
-    type = 'crisis'
-
-    async def get_start_message(self):
-        return (f"📉 **ЭНЕРГЕТИЧЕСКИЙ КОЛЛАПС!** Глобальный сбой в энергосетях привел к остановке промышленности. "
-                f"**Производство щитов и ядерных ракет невозможно**, пока не будет собрана сумма в **${self.goal_amount}** на ремонт инфраструктуры.")
-
-    async def on_fail(self, players):
-        fail_message = ("**ПРОМЫШЛЕННЫЙ КОЛЛАПС!** Восстановить энергосеть не удалось. "
-                        "В следующем раунде стоимость производства щитов и ракет будет удвоена из-за дефицита ресурсов.")
-        for player_id, p_data in players.items():
-            if p_data.get("country"):
-                try:
-                    await self.bot.send_message(player_id, fail_message, parse_mode="Markdown")
-                except Exception: pass
-
-    async def on_success(self, players, winner_player=None):
-        success_message = ("**СИСТЕМА ВОССТАНОВЛЕНА!** Энергосеть снова в строю! "
-                           "Промышленность возвращается к работе. В благодарность за сотрудничество, "
-                           "все страны получают +1 очко действия в следующем раунде.")
-        for player_id, p_data in players.items():
-            if p_data.get("country"):
-                p_data['actions_left'] += 1
-                try:
-                    await self.bot.send_message(player_id, success_message)
-                except Exception: pass
-
-    async def handle_interaction(self, message, state, player):
-        from states import GlobalEvent
-        goal = self.goal_amount
-        progress = self.data.get('progress', 0)
-        await message.answer(
-            f"**{self.name}**\n\nСобрано на ремонт: **${progress} / ${goal}**\n\n"
-            f"Ваш бюджет: ${player['budget']}\nСколько вы хотите пожертвовать на восстановление?",
-            parse_mode="Markdown",
-            reply_markup=ReplyKeyboardMarkup(keyboard=[[KeyboardButton(text="Отмена")]], resize_keyboard=True)
-        )
-        await state.set_state(GlobalEvent.entering_contribution)
-
-class BlackMarketEvent(BaseEvent):
-    ID = "BLACK_MARKET"
-    name = "Чёрный рынок"
-    button_text = "💰 Связаться с торговцем"
-    duration = 2
-    goal_amount = 7500
-    type = 'opportunity'
-
-    async def get_start_message(self):
-        return (f"🤫 **ЧЁРНЫЙ РЫНОК!** В нейтральных водах появился торговец оружием. "
-                f"Первый, кто заплатит ему **${self.goal_amount}**, немедленно получит **2 готовые ядерные ракеты** в обход производственных циклов!")
-
-    async def on_fail(self, players):
-        fail_message = "Торговец оружием покинул регион, не дождавшись покупателей. Возможность упущена."
-        for player_id, p_data in players.items():
-            if p_data.get("country"):
-                try:
-                    await self.bot.send_message(player_id, fail_message)
-                except Exception:
-                    pass
-
-    async def on_success(self, players, winner_player=None):
-        winner_player['ready_nukes'] += 2
-        success_msg = (f"🚀 **СДЕЛКА СОСТОЯЛАСЬ!**\n\n"
-                       f"Страна **{winner_player['country']}** заключила контракт на чёрном рынке и немедленно получила 2 готовые боеголовки!")
-        for player_id, p_data in players.items():
-            if p_data.get("country"):
-                try:
-                    await self.bot.send_message(player_id, success_msg, parse_mode="Markdown")
-                except Exception:
-                    pass
-
-    async def handle_interaction(self, message, state, player):
-        from keyboards import main_menu
-        from states import GlobalEvent
-
-        cost = self.goal_amount
-        if player['budget'] >= cost:
-            keyboard = ReplyKeyboardMarkup(
-                keyboard=[[KeyboardButton(text="✅ Подтвердить сделку"), KeyboardButton(text="❌ Отказаться")]],
-                resize_keyboard=True,
-                one_time_keyboard=True
-            )
-            await message.answer(
-                f"Вы уверены, что хотите потратить ${cost} на 2 готовые ракеты?\n"
-                "Это рискованная сделка, но она может дать вам преимущество.",
-                reply_markup=keyboard
-            )
-            await state.set_state(GlobalEvent.confirming_black_market)
-        else:
-            await message.answer(
-                f"У вас недостаточно средств для заключения контракта. Требуется: ${cost}, у вас: ${player['budget']}",
-                reply_markup=main_menu(message.from_user.id)
-            )
-
-class GlobalEspionageEvent(BaseEvent):
-    ID = "GLOBAL_ESPIONAGE"
-    name = "Глобальный шпионаж"
-    duration = 1
-    type = 'shift'
-
-    async def get_start_message(self):
-        return ("👁️ **ТОТАЛЬНАЯ СЛЕЖКА!** Произошла утечка финансовых данных всех мировых держав. "
-                "На этот раунд **бюджет каждой страны становится известен всем** в меню 'Обзор стран'!")
-
-
-EVENT_CLASSES = {
-    "PANDEMIC": PandemicEvent,
-    "TECH_BREAKTHROUGH": TechBreakthroughEvent,
-    "SOLAR_FLARE": SolarFlareEvent,
-    "ENERGY_CRISIS": EnergyCrisisEvent,
-    "GLOBAL_ESPIONAGE": GlobalEspionageEvent,
-    "BLACK_MARKET": BlackMarketEvent
-}
\ No newline at end of file
+    def finish(self):
+        game_state.active_global_event = None
+        self._sync()
+
+
+runtime = EventRuntime()
@@ -2,7 +2,6 @@
 
 import random
 import time
-from collections import Counter
 from aiogram import Router, F, types
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
@@ -11,14 +10,20 @@ from aiogram.types import (ReplyKeyboardMarkup, KeyboardButton,
 
 # Импортируем наши модули
 import config
+import event_log
 import game_state
-from keyboards import (main_menu, construction_menu, diplomacy_menu, military_menu)
-from newspaper_templates import TEMPLATES
+import live_progress
+import log_sink
+from leaderboard import leaderboard, METRICS as LEADERBOARD_METRICS
+import timeseries
+from delivery import split_message, MAX_MESSAGE_LENGTH
+from keyboards import (main_menu, construction_menu, diplomacy_menu, military_menu, newspaper_archive_keyboard)
+from newspaper import build_newspaper, EditionCache
 from filters import PlayerFilter
 from states import (Registration, Attack, Negotiation, Surrender, Upgrade, LendLease, SocialProgram, GlobalEvent,
                     Bunker,
                     CorsairChoice, Espionage)
-from global_events import EVENT_CLASSES
+import global_events
 
 router = Router()
 
@@ -28,14 +33,11 @@ router = Router()
 # =====================================================================================
 
 async def log_action(bot, text: str):
-    """Отправляет отформатрованное сообщение в лог-канал."""
+    """Ставит отформатированное сообщение в очередь лог-канала (отправляет фоновая задача)."""
     if not hasattr(config, 'LOG_CHANNEL_ID') or not config.LOG_CHANNEL_ID:
         print(f"Log channel ID not configured. Log: {text}")
         return
-    try:
-        await bot.send_message(config.LOG_CHANNEL_ID, text, parse_mode="HTML")
-    except Exception as e:
-        print(f"Error sending log to channel: {e}")
+    log_sink.enqueue(text)
 
 
 # =====================================================================================
@@ -93,14 +95,7 @@ async def start_command(message: types.Message, state: FSMContext):
     await state.clear()
     user_id = message.from_user.id
     if user_id not in game_state.players:
-        game_state.players[user_id] = {
-            "id": user_id, "country": None, "nickname": None, "budget": config.START_BUDGET, "cities": {},
-            "pending_nukes": 0, "ready_nukes": 0, "shields": 0, "actions_left": 4,
-            "income_modifier": 1.0, "temp_effects": {},
-            "attacked_countries_this_round": [], "eliminated": False,
-            "shields_built_this_round": 0, "upgrades_this_round": 0,
-            "social_programs_this_round": 0, "ready_for_next_round": False
-        }
+        game_state.players[user_id] = game_state.new_player(user_id)
 
     if user_id == config.ADMIN_ID:
         return await message.answer("✅ Вы вошли как администратор.", reply_markup=main_menu(user_id))
@@ -129,8 +124,7 @@ async def process_country_selection(message: types.Message, state: FSMContext):
 
     player = game_state.players[user_id]
     player["country"] = text
-    player["cities"] = {city: {"level": 1, "income": 500, "qol": 35, "bunker_level": 0, 'ruined': False} for city in
-                        config.countries[text]}
+    player["cities"] = game_state.new_cities(text)
 
     await state.set_state(Registration.entering_nickname)
     await message.answer(f"Вы выбрали {text}. Теперь введите ваш игровой никнейм:", reply_markup=ReplyKeyboardRemove())
@@ -154,6 +148,8 @@ async def process_nickname(message: types.Message, state: FSMContext):
     await log_action(message.bot, log_text)
     # ---------------------
 
+    game_state.record_event(event_log.PLAYER_JOINED, actor=player, detail=nickname)
+
     await message.answer(f"Отлично, {nickname}! Вы в игре. Удачи!", reply_markup=main_menu(user_id))
 
 
@@ -170,26 +166,26 @@ async def cancel_handler(message: types.Message, state: FSMContext):
 # --- ОБРАБОТЧИКИ МЕНЮ И ПОДМЕНЮ ---
 # =====================================================================================
 
-@router.message(PlayerFilter(is_admin=False), F.text == "🏢 Строительство")
+@router.message(PlayerFilter(is_admin=False), F.text == "🏢 Строительство", flags={"throttle": "nav"})
 async def show_construction_menu(message: types.Message):
     if not is_player_in_game(message): return await not_in_game_answer(message)
     await message.answer("Вы вошли в меню строительства и развития.", reply_markup=construction_menu())
 
 
-@router.message(PlayerFilter(is_admin=False), F.text == "💥 Военное дело")
+@router.message(PlayerFilter(is_admin=False), F.text == "💥 Военное дело", flags={"throttle": "nav"})
 async def show_military_menu(message: types.Message):
     if not is_player_in_game(message): return await not_in_game_answer(message)
     actions_left = game_state.players[message.from_user.id].get('actions_left', 0)
     await message.answer(f"Вы вошли в военный штаб. Действий осталось: {actions_left}", reply_markup=military_menu())
 
 
-@router.message(PlayerFilter(is_admin=False), F.text == "🏛️ Политика")
+@router.message(PlayerFilter(is_admin=False), F.text == "🏛️ Политика", flags={"throttle": "nav"})
 async def show_diplomacy_menu(message: types.Message):
     if not is_player_in_game(message): return await not_in_game_answer(message)
     await message.answer("Вы вошли в министерство иностранных дел.", reply_markup=diplomacy_menu())
 
 
-@router.message(PlayerFilter(is_admin=False), F.text == "⬅️ Назад")
+@router.message(PlayerFilter(is_admin=False), F.text == "⬅️ Назад", flags={"throttle": "nav"})
 async def back_to_main_menu(message: types.Message):
     if not is_player_in_game(message): return await not_in_game_answer(message)
     await message.answer("Вы вернулись в главное меню.", reply_markup=main_menu(message.from_user.id))
@@ -199,13 +195,13 @@ async def back_to_main_menu(message: types.Message):
 # --- ОБРАБОТЧИКИ ОДИНОЧНЫХ ДЕЙСТВИЙ ИГРОКА ---
 # =====================================================================================
 
-@router.message(PlayerFilter(is_admin=False), F.text == "Статистика")
+@router.message(PlayerFilter(is_admin=False), F.text == "Статистика", flags={"throttle": "view"})
 async def show_statistics_handler(message: types.Message):
     if not is_player_in_game(message): return await not_in_game_answer(message)
     await show_statistics_logic(message)
 
 
-@router.message(PlayerFilter(is_admin=False), F.text == "Обзор стран")
+@router.message(PlayerFilter(is_admin=False), F.text == "Обзор стран", flags={"throttle": "view"})
 async def overview_countries_handler(message: types.Message):
     if not is_player_in_game(message): return await not_in_game_answer(message)
     await overview_countries_logic(message)
@@ -223,6 +219,24 @@ async def call_admin_handler(message: types.Message):
     await call_admin_logic(message)
 
 
+@router.message(PlayerFilter(is_admin=False), F.text == "📰 Архив газет", flags={"throttle": "view"})
+async def newspaper_archive_handler(message: types.Message):
+    if not is_player_in_game(message): return await not_in_game_answer(message)
+    await newspaper_archive_logic(message)
+
+
+@router.message(PlayerFilter(is_admin=False), F.text == "🏆 Рейтинг", flags={"throttle": "view"})
+async def leaderboard_handler(message: types.Message):
+    if not is_player_in_game(message): return await not_in_game_answer(message)
+    await show_leaderboard_logic(message)
+
+
+@router.message(PlayerFilter(is_admin=False), F.text == "📈 История", flags={"throttle": "view"})
+async def history_handler(message: types.Message):
+    if not is_player_in_game(message): return await not_in_game_answer(message)
+    await show_history_logic(message)
+
+
 # =====================================================================================
 # --- FSM ПРОЦЕССЫ ИГРОКА ---
 # =====================================================================================
@@ -251,7 +265,7 @@ async def espionage_start(message: types.Message, state: FSMContext):
 
 
 @router.message(Espionage.choosing_target)
-async def espionage_process_target(message: types.Message, state: FSMContext):
+async def espionage_process_target(message: types.Message, state: FSMContext, rng: random.Random):
     await state.clear()
     target_country = message.text.strip()
     user_id = message.from_user.id
@@ -271,7 +285,9 @@ async def espionage_process_target(message: types.Message, state: FSMContext):
     await log_action(message.bot, log_text)
     # ---------------------
 
-    intel_type = random.choice(['budget', 'nukes', 'shields', 'bunker'])
+    intel_type = rng.choice(['budget', 'nukes', 'shields', 'bunker'])
+    game_state.record_event(event_log.ESPIONAGE, actor=player, target=target_player_data,
+                            amount=config.SPY_COST, detail=intel_type)
     report = f"**Секретный отчет по стране {target_country}:**\n\n"
     if intel_type == 'budget':
         report += f"💰 Наши агенты докладывают, что текущий бюджет цели составляет: **${target_player_data.get('budget', 0)}**."
@@ -353,7 +369,7 @@ async def bunker_process(message: types.Message, state: FSMContext):
     await log_action(message.bot, log_text)
     # ---------------------
 
-    game_state.round_events.append({'type': 'BUNKER_BUILT', 'country': player['country']})
+    game_state.record_event(event_log.BUNKER_BUILT, actor=player, city=city_name, amount=cost)
     await message.answer(
         f"✅ Бункер в городе **{city_name}** улучшен до **уровня {next_level}** за ${cost}!\n\n"
         f"Ваш бюджет: ${player['budget']}\n"
@@ -382,7 +398,7 @@ async def social_program_start(message: types.Message, state: FSMContext):
 
 
 @router.message(SocialProgram.choosing_city)
-async def social_program_process_city(message: types.Message, state: FSMContext):
+async def social_program_process_city(message: types.Message, state: FSMContext, rng: random.Random):
     await state.clear()
     city_name = message.text.strip()
     user_id = message.from_user.id
@@ -398,13 +414,13 @@ async def social_program_process_city(message: types.Message, state: FSMContext)
     city_data = player['cities'][city_name]
     old_qol = city_data['qol']
     if old_qol >= 90:
-        qol_increase = random.randint(2, 4)
+        qol_increase = rng.randint(2, 4)
     elif old_qol >= 80:
-        qol_increase = random.randint(3, 5)
+        qol_increase = rng.randint(3, 5)
     elif old_qol >= 70:
-        qol_increase = random.randint(3, 7)
+        qol_increase = rng.randint(3, 7)
     else:
-        qol_increase = random.randint(5, 10)
+        qol_increase = rng.randint(5, 10)
     city_data['qol'] = min(100, old_qol + qol_increase)
 
     # --- ЛОГ ДЕЙСТВИЯ ---
@@ -412,7 +428,7 @@ async def social_program_process_city(message: types.Message, state: FSMContext)
     await log_action(message.bot, log_text)
     # ---------------------
 
-    game_state.round_events.append({'type': 'SOCIAL_PROGRAM', 'country': player['country']})
+    game_state.record_event(event_log.SOCIAL_PROGRAM, actor=player, city=city_name, amount=config.SOCIAL_PROGRAM_COST)
     await message.answer(f"🎉 Соц. программа в городе {city_name} запущена за ${config.SOCIAL_PROGRAM_COST}!\n"
                          f"Уровень жизни: {old_qol}% ↗️ {city_data['qol']}% (+{qol_increase}%)\n\n"
                          f"Ваш бюджет: ${player['budget']}.",
@@ -437,7 +453,7 @@ async def upgrade_city_start(message: types.Message, state: FSMContext):
 
 
 @router.message(Upgrade.choosing_city)
-async def upgrade_city_process(message: types.Message, state: FSMContext):
+async def upgrade_city_process(message: types.Message, state: FSMContext, rng: random.Random):
     await state.clear()
     city_name = message.text.strip()
     user_id = message.from_user.id
@@ -446,7 +462,7 @@ async def upgrade_city_process(message: types.Message, state: FSMContext):
         return await message.answer("Действие отменено.", reply_markup=main_menu(user_id))
     if city_name not in game_state.players[user_id]["cities"]:
         return await message.answer("Неверный город.", reply_markup=main_menu(user_id))
-    await upgrade_city_logic(message)
+    await upgrade_city_logic(message, rng)
 
 
 # --- Ленд-лиз ---
@@ -538,6 +554,8 @@ async def lend_lease_confirm(message: types.Message, state: FSMContext):
     await log_action(message.bot, log_text)
     # ---------------------
 
+    game_state.record_event(event_log.AID_SENT, actor=sender, target=receiver, amount=amount)
+
     await message.answer(f"✅ Успешно! Вы отправили ${amount} в страну {receiver['country']}.\n"
                          f"Ваш новый бюджет: ${sender['budget']}.\n"
                          f"Осталось действий: {sender['actions_left']}.",
@@ -592,14 +610,14 @@ async def attack_choose_target(message: types.Message, state: FSMContext):
 
 
 @router.message(Attack.choosing_city)
-async def attack_choose_city(message: types.Message, state: FSMContext):
+async def attack_choose_city(message: types.Message, state: FSMContext, rng: random.Random):
     user_data = await state.get_data()
     target_uid = user_data.get("target_uid")
     if message.text.strip() == "Отмена":
         await state.clear()
         return await message.answer("Атака отменена.", reply_markup=main_menu(message.from_user.id))
     # Важно: Не очищаем state здесь, так как он нужен в attack_final_step_logic
-    await attack_final_step_logic(message, target_uid, state)
+    await attack_final_step_logic(message, target_uid, state, rng)
 
 
 # --- Переговоры ---
@@ -646,8 +664,7 @@ async def surrender_process(message: types.Message, state: FSMContext):
 # --- ГЛОБАЛЬНЫЕ СОБЫТИЯ ---
 # =====================================================================================
 
-@router.message(PlayerFilter(is_admin=False), F.text.in_(
-    {"💉 Сделать взнос в фонд", "✅ Инвестировать в проект", "🔧 Помочь в восстановлении", "💰 Связаться с торговцем"}))
+@router.message(PlayerFilter(is_admin=False), F.text.func(global_events.is_event_button))
 async def handle_global_event_interaction(message: types.Message, state: FSMContext):
     """Единый обработчик для всех кнопок глобальных событий."""
     if not is_player_in_game(message): return await not_in_game_answer(message)
@@ -656,16 +673,13 @@ async def handle_global_event_interaction(message: types.Message, state: FSMCont
 
     user_id = message.from_user.id
     player = game_state.players[user_id]
-    event_id = game_state.active_global_event['id']
-    event_class = EVENT_CLASSES.get(event_id)
-
-    if event_class:
-        event_object = event_class(message.bot, game_state.active_global_event)
+    event_object = global_events.runtime.current(message.bot)
+    if event_object:
         await event_object.handle_interaction(message, state, player)
 
 
 @router.message(GlobalEvent.entering_investment)
-async def global_event_process_investment(message: types.Message, state: FSMContext):
+async def global_event_process_investment(message: types.Message, state: FSMContext, rng: random.Random):
     await state.clear()
     if message.text.strip().lower() == "отмена":
         return await message.answer("Действие отменено.", reply_markup=main_menu(message.from_user.id))
@@ -678,23 +692,30 @@ async def global_event_process_investment(message: types.Message, state: FSMCont
 
     user_id = message.from_user.id
     player = game_state.players[user_id]
-    if player['budget'] < amount:
-        return await message.answer(f"У вас недостаточно средств.", reply_markup=main_menu(user_id))
-
-    player['budget'] -= amount
-    if 'investors' not in game_state.active_global_event:
-        game_state.active_global_event['investors'] = {}
-
-    current_investment = game_state.active_global_event['investors'].get(user_id, 0)
-    new_total_investment = current_investment + amount
-    game_state.active_global_event['investors'][user_id] = new_total_investment
-
-    event_id = game_state.active_global_event['id']
-    event_class = EVENT_CLASSES[event_id]
-    goal = event_class.goal_amount
+    async with game_state.lock:
+        event_object = global_events.runtime.current(message.bot)
+        if not event_object:
+            error = "Событие уже закончилось."
+        elif player['budget'] < amount:
+            error = "У вас недостаточно средств."
+        else:
+            error = None
+            player['budget'] -= amount
+            investors = event_object.data.setdefault('investors', {})
+            new_total_investment = investors.get(user_id, 0) + amount
+            investors[user_id] = new_total_investment
+            event_id = event_object.ID
+            goal = event_object.goal_amount
+            game_state.record_event(event_log.EVENT_INVESTMENT, actor=player, amount=amount, detail=event_id)
+            # Цель достигнута — событие снимается здесь же, чтобы следующая инвестиция не завершила его повторно
+            completed = new_total_investment >= goal
+            if completed:
+                global_events.runtime.finish()
+    if error:
+        return await message.answer(error, reply_markup=main_menu(user_id))
 
     # --- ЛОГ ДЕЙСТВИЯ ---
-    log_text = f"💡 <b>{player['country']}</b> инвестировал(а) <code>${amount}</code> в проект <b>'{event_class.name}'</b>."
+    log_text = f"💡 <b>{player['country']}</b> инвестировал(а) <code>${amount}</code> в проект <b>'{event_object.name}'</b>."
     await log_action(message.bot, log_text)
     # ---------------------
 
@@ -702,17 +723,16 @@ async def global_event_process_investment(message: types.Message, state: FSMCont
                          f"Ваш новый бюджет: ${player['budget']}",
                          parse_mode="Markdown", reply_markup=main_menu(user_id))
 
-    if new_total_investment >= goal:
-        log_text = f"🏆 Событие <b>'{event_class.name}'</b> успешно завершено! Победитель: <b>{player['country']}</b>."
+    if completed:
+        log_text = f"🏆 Событие <b>'{event_object.name}'</b> успешно завершено! Победитель: <b>{player['country']}</b>."
         await log_action(message.bot, log_text)
         await message.bot.send_message(config.ADMIN_ID, f"🔔 (Для админа) {log_text}", parse_mode="HTML")
-        event_object = event_class(message.bot, game_state.active_global_event)
-        await event_object.on_success(game_state.players, winner_player=player)
-        game_state.active_global_event = None
+        await event_object.on_success(game_state.players, winner_player=player, rng=rng)
+        game_state.record_event(event_log.GLOBAL_EVENT_SUCCEEDED, actor=player, detail=event_id)
 
 
 @router.message(GlobalEvent.confirming_black_market)
-async def global_event_process_black_market(message: types.Message, state: FSMContext):
+async def global_event_process_black_market(message: types.Message, state: FSMContext, rng: random.Random):
     """Обрабатывает подтверждение сделки на Чёрном рынке."""
     await state.clear()
     user_id = message.from_user.id
@@ -720,19 +740,24 @@ async def global_event_process_black_market(message: types.Message, state: FSMCo
     if message.text != "✅ Подтвердить сделку":
         return await message.answer("Сделка отменена.", reply_markup=main_menu(user_id))
 
-    if not game_state.active_global_event or game_state.active_global_event.get('id') != 'BLACK_MARKET':
-        return await message.answer("Торговец уже уплыл. Сделка невозможна.", reply_markup=main_menu(user_id))
-
     player = game_state.players[user_id]
-    event_class = EVENT_CLASSES['BLACK_MARKET']
-    cost = event_class.goal_amount
-
-    if player['budget'] < cost:
-        return await message.answer(f"За время раздумий у вас стало недостаточно средств. Сделка отменена.",
-                                    reply_markup=main_menu(user_id))
-
-    player['budget'] -= cost
-    log_text = f"🏆 Событие <b>'{event_class.name}'</b> успешно завершено! Победитель: <b>{player['country']}</b>."
+    async with game_state.lock:
+        event_object = global_events.runtime.current(message.bot)
+        if not event_object or event_object.ID != 'BLACK_MARKET':
+            error = "Торговец уже уплыл. Сделка невозможна."
+        elif player['budget'] < event_object.goal_amount:
+            error = "За время раздумий у вас стало недостаточно средств. Сделка отменена."
+        else:
+            error = None
+            cost = event_object.goal_amount
+            player['budget'] -= cost
+            game_state.record_event(event_log.BLACK_MARKET_DEAL, actor=player, amount=cost, detail='BLACK_MARKET')
+            # Сделка одна: второй покупатель, ждавший блокировку, увидит, что торговец уплыл
+            global_events.runtime.finish()
+    if error:
+        return await message.answer(error, reply_markup=main_menu(user_id))
+
+    log_text = f"🏆 Событие <b>'{event_object.name}'</b> успешно завершено! Победитель: <b>{player['country']}</b>."
     await log_action(message.bot, log_text)
     await message.bot.send_message(config.ADMIN_ID, f"🔔 (Для админа) {log_text}", parse_mode="HTML")
     # --- ЛОГ ДЕЙСТВИЯ ---
@@ -740,10 +765,8 @@ async def global_event_process_black_market(message: types.Message, state: FSMCo
     await log_action(message.bot, log_text)
     # ---------------------
 
-    event_object = event_class(message.bot, game_state.active_global_event)
-    await event_object.on_success(players=game_state.players, winner_player=player)
-
-    game_state.active_global_event = None
+    await event_object.on_success(players=game_state.players, winner_player=player, rng=rng)
+    game_state.record_event(event_log.GLOBAL_EVENT_SUCCEEDED, actor=player, detail='BLACK_MARKET')
 
     await message.answer(
         f"✅ Контракт подписан! Вы потратили ${cost}. 2 ракеты добавлены в ваш арсенал.\n"
@@ -753,7 +776,7 @@ async def global_event_process_black_market(message: types.Message, state: FSMCo
 
 
 @router.message(GlobalEvent.entering_contribution)
-async def global_event_process_contribution(message: types.Message, state: FSMContext):
+async def global_event_process_contribution(message: types.Message, state: FSMContext, rng: random.Random):
     """Универсальный обработчик для всех событий-кризисов."""
     await state.clear()
     if message.text.strip().lower() == "отмена":
@@ -766,50 +789,64 @@ async def global_event_process_contribution(message: types.Message, state: FSMCo
         return await message.answer("Пожалуйста, введите корректное положительное число.",
                                     reply_markup=main_menu(message.from_user.id))
 
-    player = game_state.players[message.from_user.id]
-    if player['budget'] < amount:
-        return await message.answer(f"У вас недостаточно средств.", reply_markup=main_menu(message.from_user.id))
-
-    if not game_state.active_global_event:
-        return await message.answer("Событие уже закончилось.", reply_markup=main_menu(message.from_user.id))
-
-    player['budget'] -= amount
-    game_state.active_global_event['progress'] = game_state.active_global_event.get('progress', 0) + amount
-
-    event_id = game_state.active_global_event['id']
-    event_class = EVENT_CLASSES[event_id]
-    goal = event_class.goal_amount
+    user_id = message.from_user.id
+    player = game_state.players[user_id]
+    async with game_state.lock:
+        event_object = global_events.runtime.current(message.bot)
+        if not event_object:
+            error = "Событие уже закончилось."
+        elif player['budget'] < amount:
+            error = "У вас недостаточно средств."
+        else:
+            error = None
+            player['budget'] -= amount
+            event_object.data['progress'] = event_object.data.get('progress', 0) + amount
+            event_id = event_object.ID
+            game_state.record_event(event_log.EVENT_CONTRIBUTION, actor=player, amount=amount, detail=event_id)
+            # Цель достигнута — событие снимается здесь же, чтобы следующий взнос не завершил его повторно
+            completed = event_object.data['progress'] >= event_object.goal_amount
+            if completed:
+                global_events.runtime.finish()
+    if error:
+        return await message.answer(error, reply_markup=main_menu(user_id))
 
     # --- ЛОГ ДЕЙСТВИЯ ---
-    log_text = f"🌍 <b>{player['country']}</b> внёс(внесла) <code>${amount}</code> в общий фонд события <b>'{event_class.name}'</b>."
+    log_text = f"🌍 <b>{player['country']}</b> внёс(внесла) <code>${amount}</code> в общий фонд события <b>'{event_object.name}'</b>."
     await log_action(message.bot, log_text)
     # ---------------------
 
-    progress = game_state.active_global_event['progress']
-    await message.answer(f"✅ Вы внесли ${amount} в общий фонд.\nПрогресс: **${progress} / ${goal}**\n"
-                         f"Ваш новый бюджет: ${player['budget']}",
-                         parse_mode="Markdown", reply_markup=main_menu(message.from_user.id))
+    await message.answer(f"✅ Вы внесли ${amount} в общий фонд.\nВаш новый бюджет: ${player['budget']}",
+                         reply_markup=main_menu(user_id))
 
-    if progress >= goal:
-        log_text = f"✅ Кризис <b>'{event_class.name}'</b> успешно преодолён общими усилиями."
+    if completed:
+        await live_progress.tracker.close(message.bot, event_object, "✅ Цель достигнута!")
+        log_text = f"✅ Кризис <b>'{event_object.name}'</b> успешно преодолён общими усилиями."
         await log_action(message.bot, log_text)
         await message.bot.send_message(config.ADMIN_ID, f"🔔 (Для админа) {log_text}", parse_mode="HTML")
-        event_object = event_class(message.bot, game_state.active_global_event)
-        await event_object.on_success(game_state.players)
-        game_state.active_global_event = None
+        await event_object.on_success(game_state.players, rng=rng)
+        game_state.record_event(event_log.GLOBAL_EVENT_SUCCEEDED, detail=event_id)
+    else:
+        # Текущая сумма видна всем участникам в закреплённом сообщении
+        await live_progress.tracker.attach(message.bot, user_id, event_object)
+        live_progress.tracker.refresh(message.bot, event_object)
 
 
 # =====================================================================================
 # --- КОЛЛБЭКИ (ИНЛАЙН-КНОПКИ) ---
 # =====================================================================================
 
-@router.callback_query(F.data.startswith("neg_"))
+@router.callback_query(F.data.startswith("neg_"), flags={"idempotent": True})
 async def handle_negotiation_response(callback: types.CallbackQuery):
     await negotiation_response_logic(callback)
 
 
-@router.callback_query(CorsairChoice.making_choice)
-async def handle_corsair_choice(callback: types.CallbackQuery, state: FSMContext):
+@router.callback_query(F.data.startswith("np_page:"), flags={"throttle": "view"})
+async def handle_newspaper_archive_page(callback: types.CallbackQuery):
+    await newspaper_archive_page_logic(callback)
+
+
+@router.callback_query(CorsairChoice.making_choice, flags={"idempotent": True})
+async def handle_corsair_choice(callback: types.CallbackQuery, state: FSMContext, rng: random.Random):
     """Обрабатывает выбор агрессора: разграбить или сжечь город."""
     user_data = await state.get_data()
     await state.clear()
@@ -831,13 +868,16 @@ async def handle_corsair_choice(callback: types.CallbackQuery, state: FSMContext
         attacker['budget'] += stolen_amount
         target['budget'] -= stolen_amount
         city['level'], city['income'] = 0, 0
-        city['qol'] = max(0, city['qol'] - random.randint(25, 40))
+        city['qol'] = max(0, city['qol'] - rng.randint(25, 40))
 
         # --- ЛОГ ДЕЙСТВИЯ ---
         log_text = f"💰 <b>{attacker['country']}</b> разграбил(а) город <b>{city_name}</b> ({target['country']}), украв <code>${stolen_amount}</code>."
         await log_action(callback.bot, log_text)
         # ---------------------
 
+        game_state.record_event(event_log.CITY_LOOTED, actor=attacker, target=target, city=city_name,
+                                amount=stolen_amount)
+
         await callback.message.edit_text(
             f"✅ Город разграблен! Вы украли ${stolen_amount} из казны {target['country']}.")
         try:
@@ -857,13 +897,15 @@ async def handle_corsair_choice(callback: types.CallbackQuery, state: FSMContext
             min_qol = config.BUNKER_EFFECTS[bunker_level][0]
             city['qol'] = min_qol
         else:
-            city['qol'] = random.randint(1, 5)
+            city['qol'] = rng.randint(1, 5)
 
         # --- ЛОГ ДЕЙСТВИЯ ---
         log_text = f"🔥 <b>{attacker['country']}</b> сжёг(сожгла) дотла город <b>{city_name}</b> ({target['country']})."
         await log_action(callback.bot, log_text)
         # ---------------------
 
+        game_state.record_event(event_log.CITY_BURNED, actor=attacker, target=target, city=city_name)
+
         await callback.message.edit_text(f"✅ Город {city_name} сожжён дотла! Его экономика навсегда искалечена.")
         try:
             await callback.bot.send_message(target_id,
@@ -883,9 +925,7 @@ async def handle_corsair_choice(callback: types.CallbackQuery, state: FSMContext
         await log_action(callback.bot, log_text)
         # ---------------------
 
-        game_state.round_events.append(
-            {'type': 'COUNTRY_ELIMINATED', 'attacker': attacker['country'], 'country': target['country']}
-        )
+        game_state.record_event(event_log.COUNTRY_ELIMINATED, actor=attacker, target=target)
         await callback.bot.send_message(attacker_id,
                                         f"☠️ **ПОЛНОЕ УНИЧТОЖЕНИЕ!** Страна {target['country']} полностью разрушена вашими действиями!")
         try:
@@ -899,41 +939,18 @@ async def handle_corsair_choice(callback: types.CallbackQuery, state: FSMContext
 # --- ГАЗЕТА ---
 # =====================================================================================
 
+newspaper_editions = EditionCache()
+
+
 async def generate_newspaper_report():
-    if not game_state.round_events:
-        return None
-    priority_types = ['ATTACK_SUCCESS', 'ATTACK_SHIELDED', 'COUNTRY_ELIMINATED', 'SURRENDERED']
-    headlines = []
-    priority_events = [e for e in game_state.round_events if e['type'] in priority_types]
-    for event in priority_events:
-        template_info = TEMPLATES.get(event['type'])
-        if template_info:
-            template = random.choice(template_info[1])
-            headlines.append(f"⚡ {template.format(**event)}")
-    regular_events = [e for e in game_state.round_events if e['type'] not in priority_types]
-    event_counts = Counter(e['type'] for e in regular_events)
-    processed_types = set()
-    for event_type, count in event_counts.items():
-        if event_type in processed_types: continue
-        template_info = TEMPLATES.get(event_type)
-        if not template_info: continue
-        summary_threshold, specific_templates, summary_templates = template_info
-        if summary_threshold and count >= summary_threshold:
-            template = random.choice(summary_templates)
-            headlines.append(f"📌 {template}")
-            processed_types.add(event_type)
-        else:
-            specific_events_of_type = [e for e in regular_events if e['type'] == event_type]
-            for event in specific_events_of_type:
-                template = random.choice(specific_templates)
-                headlines.append(f"🔹 {template.format(**event)}")
-    if not headlines:
-        return None
-    random.shuffle(headlines)
-    newspaper = f"📰 **Le Monde Global - Итоги раунда №{game_state.current_round}** 📰\n"
-    newspaper += "================================\n\n"
-    newspaper += "\n\n".join(headlines)
-    return newspaper
+    """Выпуск газеты за текущий раунд. Пока журнал не менялся, возвращается уже готовый текст."""
+    round_number = game_state.current_round
+    log = game_state.event_log
+    return newspaper_editions.get_or_build(
+        (game_state.game_id, round_number, log.version),
+        lambda: build_newspaper(round_number, log.round_buckets(round_number),
+                                seed=f"{game_state.game_id}:{round_number}")
+    )
 
 
 # =====================================================================================
@@ -954,6 +971,39 @@ async def show_statistics_logic(message: types.Message):
     await message.answer(text, reply_markup=main_menu(message.from_user.id))
 
 
+async def show_history_logic(message: types.Message):
+    rows = timeseries.series.history(message.from_user.id, last=config.HISTORY_ROUNDS)
+    if not rows:
+        return await message.answer("📈 История появится после начала игры.",
+                                    reply_markup=main_menu(message.from_user.id))
+    lines = ["Р.   Бюджет   Доход  QoL  Ур. Ракеты Щиты"]
+    for round_number, budget, income, qol, level, nukes, shields in rows:
+        lines.append(f"{round_number:<3}{budget:>8}{income:>8}{qol:>5.0f}{level:>5.1f}{nukes:>7}{shields:>5}")
+    table = "\n".join(lines)
+    text = f"📈 <b>История вашей страны</b> (последние {len(rows)} р.):\n<pre>{table}</pre>"
+    await message.answer(text, parse_mode="HTML", reply_markup=main_menu(message.from_user.id))
+
+
+async def show_leaderboard_logic(message: types.Message):
+    uid = message.from_user.id
+    is_espionage_active = game_state.active_global_event and game_state.active_global_event.get(
+        'id') == 'GLOBAL_ESPIONAGE'
+    # Чужие бюджеты, уровень жизни и развитие — закрытые данные (как в «Обзоре стран»):
+    # видно только место, бюджеты открываются во время глобального шпионажа
+    public = {"cities"} | ({"budget"} if is_espionage_active else set())
+    text = f"🏆 <b>Рейтинг стран</b> (всего: {len(leaderboard)})\n"
+    for metric, (title, _) in LEADERBOARD_METRICS.items():
+        text += f"\n<b>{title}</b>\n"
+        for place, (player_id, value) in enumerate(leaderboard.top(metric, config.LEADERBOARD_TOP), 1):
+            country = game_state.players[player_id]['country']
+            shown = f" — {value}" if metric in public or player_id == uid else ""
+            text += f"{place}. {'<b>' + country + '</b>' if player_id == uid else country}{shown}\n"
+        own = leaderboard.rank(metric, uid)
+        if own and own[0] > config.LEADERBOARD_TOP:
+            text += f"…\n{own[0]}. <b>{game_state.players[uid]['country']}</b> — {own[1]}\n"
+    await message.answer(text, parse_mode="HTML", reply_markup=main_menu(uid))
+
+
 async def overview_countries_logic(message: types.Message):
     text = "🌍 Обзор всех стран:\n\n"
     active_players = [p for p in game_state.players.values() if p.get("country") and not p.get('eliminated')]
@@ -1002,7 +1052,7 @@ async def produce_nuclear_logic(message: types.Message):
         await log_action(message.bot, log_text)
         # ---------------------
 
-        game_state.round_events.append({'type': 'NUKE_PRODUCED', 'country': p['country']})
+        game_state.record_event(event_log.NUKE_PRODUCED, actor=p, amount=config.NUKE_COST)
 
         await message.answer(
             f"✅ Ядерная бомба запущена в производство.\n\n"
@@ -1038,7 +1088,7 @@ async def create_shield_logic(message: types.Message):
         await log_action(message.bot, log_text)
         # ---------------------
 
-        game_state.round_events.append({'type': 'SHIELD_BUILT', 'country': p['country']})
+        game_state.record_event(event_log.SHIELD_BUILT, actor=p, amount=config.SHIELD_COST)
 
         await message.answer(
             f"🛡️ Щит создан! Всего: {p['shields']}/{config.MAX_TOTAL_SHIELDS}.\n\n"
@@ -1049,7 +1099,7 @@ async def create_shield_logic(message: types.Message):
         await message.answer(f"Недостаточно бюджета ({config.SHIELD_COST}).", reply_markup=main_menu(user_id))
 
 
-async def upgrade_city_logic(message: types.Message):
+async def upgrade_city_logic(message: types.Message, rng: random.Random):
     user_id, city_name = message.from_user.id, message.text.strip()
     player = game_state.players[user_id]
     city_to_upgrade = player["cities"][city_name]
@@ -1069,16 +1119,16 @@ async def upgrade_city_logic(message: types.Message):
 
     old_qol_upgraded = city_to_upgrade['qol']
     if old_qol_upgraded >= 90:
-        qol_bonus = random.randint(2, 4)
+        qol_bonus = rng.randint(2, 4)
     elif old_qol_upgraded >= 80:
-        qol_bonus = random.randint(3, 5)
+        qol_bonus = rng.randint(3, 5)
     elif old_qol_upgraded >= 70:
-        qol_bonus = random.randint(3, 7)
+        qol_bonus = rng.randint(3, 7)
     else:
-        qol_bonus = random.randint(7, 15)
+        qol_bonus = rng.randint(7, 15)
     city_to_upgrade['qol'] = min(100, old_qol_upgraded + qol_bonus)
 
-    qol_penalty = random.randint(1, 3)
+    qol_penalty = rng.randint(1, 3)
     penalty_report_lines = []
     for city_name_loop, city_data in player["cities"].items():
         if city_name_loop != city_name:
@@ -1091,7 +1141,7 @@ async def upgrade_city_logic(message: types.Message):
     await log_action(message.bot, log_text)
     # ---------------------
 
-    game_state.round_events.append({'type': 'CITY_UPGRADED', 'country': player['country']})
+    game_state.record_event(event_log.CITY_UPGRADED, actor=player, city=city_name, amount=cost)
 
     response_text = (
         f"✅ Город **{city_name}** улучшен за **${cost}**!\n\n"
@@ -1114,7 +1164,7 @@ async def upgrade_city_logic(message: types.Message):
         await message.answer(f"🎉 **ПОЗДРАВЛЯЕМ!** {player['country']} победила в игре, достигнув 100% уровня жизни!")
 
 
-async def attack_final_step_logic(message: types.Message, target_uid: int, state: FSMContext):
+async def attack_final_step_logic(message: types.Message, target_uid: int, state: FSMContext, rng: random.Random):
     user_id = message.from_user.id
     city_name_raw = message.text.strip()
     attacker = game_state.players[user_id]
@@ -1147,8 +1197,8 @@ async def attack_final_step_logic(message: types.Message, target_uid: int, state
         await log_action(message.bot, log_text)
         # ---------------------
 
-        qol_penalty_main = random.randint(10, 15)
-        qol_penalty_other = random.randint(1, 3)
+        qol_penalty_main = rng.randint(10, 15)
+        qol_penalty_other = rng.randint(1, 3)
 
         if bunker_level > 0:
             bunker_panic_reduction = config.BUNKER_EFFECTS[bunker_level][1]
@@ -1161,8 +1211,7 @@ async def attack_final_step_logic(message: types.Message, target_uid: int, state
             city_data['qol'] = max(0, old_qol - penalty)
             report_lines.append(f"  • {city_loop_name}: {old_qol}% ↘️ {city_data['qol']}% (-{penalty}%)")
 
-        game_state.round_events.append(
-            {'type': 'ATTACK_SHIELDED', 'attacker': attacker['country'], 'target': target_player['country']})
+        game_state.record_event(event_log.ATTACK_SHIELDED, actor=attacker, target=target_player, city=city_name)
 
         await message.answer(f"💥 Атака на {target_player['country']} отражена щитом!", reply_markup=main_menu(user_id))
 
@@ -1190,6 +1239,8 @@ async def attack_final_step_logic(message: types.Message, target_uid: int, state
         await log_action(message.bot, log_text)
         # ---------------------
 
+        game_state.record_event(event_log.ATTACK_SUCCESS, actor=attacker, target=target_player, city=city_name)
+
         await message.answer(f"🚀 **Успех! Город {city_name} ({target_player['country']}) беззащитен!**",
                              reply_markup=main_menu(user_id))
 
@@ -1239,7 +1290,7 @@ async def surrender_logic(message: types.Message):
         await log_action(message.bot, log_text)
         # ---------------------
 
-        game_state.round_events.append({'type': 'SURRENDERED', 'country': player['country']})
+        game_state.record_event(event_log.SURRENDERED, actor=player)
         await message.answer("Вы капитулировали и выбыли из игры.", reply_markup=ReplyKeyboardRemove())
         try:
             await message.bot.send_message(config.ADMIN_ID,
@@ -1312,4 +1363,38 @@ async def negotiation_response_logic(callback: types.CallbackQuery):
     except Exception as e:
         print(f"Could not send negotiation response to initiator {initiator_id}: {e}")
     await callback.message.edit_text(responder_msg, parse_mode="HTML", reply_markup=None)
-    await callback.answer()
\ No newline at end of file
+    await callback.answer()
+
+
+ARCHIVE_TRUNCATED_MARK = "\n\n…"
+
+
+def archive_page_text(text):
+    """Страница архива — одно сообщение: слишком длинный выпуск показываем до последнего целого заголовка."""
+    chunks = split_message(text, limit=MAX_MESSAGE_LENGTH - len(ARCHIVE_TRUNCATED_MARK), markdown=True)
+    return chunks[0] + ARCHIVE_TRUNCATED_MARK if len(chunks) > 1 else chunks[0]
+
+
+async def newspaper_archive_logic(message: types.Message):
+    archive = game_state.newspaper_archive
+    round_number = archive.latest_round()
+    if round_number is None:
+        return await message.answer("🗞 Архив пока пуст: выпуски появляются по итогам каждого раунда.",
+                                    reply_markup=main_menu(message.from_user.id))
+    await message.answer(archive_page_text(archive.get(round_number)), parse_mode="Markdown",
+                         reply_markup=newspaper_archive_keyboard(*archive.neighbours(round_number)))
+
+
+async def newspaper_archive_page_logic(callback: types.CallbackQuery):
+    """Листает архив газет, редактируя одно и то же сообщение."""
+    round_number = int(callback.data.split(":")[1])
+    archive = game_state.newspaper_archive
+    text = archive.get(round_number)
+    if text is None:
+        return await callback.answer("Выпуск не найден.", show_alert=True)
+    try:
+        await callback.message.edit_text(archive_page_text(text), parse_mode="Markdown",
+                                         reply_markup=newspaper_archive_keyboard(*archive.neighbours(round_number)))
+    except Exception as e:
+        print(f"Error showing newspaper archive page {round_number}: {e}")
+    await callback.answer()
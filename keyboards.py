@@ -1,9 +1,9 @@
 # keyboards.py
 
-from aiogram.types import ReplyKeyboardMarkup, KeyboardButton
+from aiogram.types import ReplyKeyboardMarkup, KeyboardButton, InlineKeyboardMarkup, InlineKeyboardButton
 import config
 import game_state
-from global_events import EVENT_CLASSES
+import global_events
 
 def construction_menu():
     keyboard = [[KeyboardButton(text="Улучшить город"), KeyboardButton(text="🧱 Построить бункер")],
@@ -32,13 +32,45 @@ def main_menu(user_id):
     ready_button_text = "❌ Отменить готовность" if p.get("ready_for_next_round") else "✅ Я готов"
     base_keyboard_rows = [
         [KeyboardButton(text="Обзор стран"), KeyboardButton(text="Статистика")],
+        [KeyboardButton(text="🏆 Рейтинг"), KeyboardButton(text="📰 Архив газет"), KeyboardButton(text="📈 История")],
         [KeyboardButton(text="🏢 Строительство"), KeyboardButton(text="💥 Военное дело"), KeyboardButton(text="🏛️ Политика")],
         [KeyboardButton(text=ready_button_text), KeyboardButton(text="Вызвать админа")]
     ]
-    if game_state.active_global_event:
-        event_id = game_state.active_global_event.get('id')
-        event_class = EVENT_CLASSES.get(event_id)
-        if event_class and hasattr(event_class, 'type') and event_class.type in ['crisis', 'opportunity']:
-            button_text = getattr(event_class, "button_text", "🌍 Глобальное событие")
-            base_keyboard_rows.insert(0, [KeyboardButton(text=button_text)])
-    return ReplyKeyboardMarkup(keyboard=base_keyboard_rows, resize_keyboard=True)
\ No newline at end of file
+    event_button = global_events.runtime.button()
+    if event_button:
+        base_keyboard_rows.insert(0, [KeyboardButton(text=event_button)])
+    return ReplyKeyboardMarkup(keyboard=base_keyboard_rows, resize_keyboard=True)
+
+
+def newspaper_archive_keyboard(previous_round, next_round):
+    """Инлайн-листалка архива газет: кнопки на соседние выпуски."""
+    row = []
+    if previous_round is not None:
+        row.append(InlineKeyboardButton(text=f"◀️ Раунд {previous_round}", callback_data=f"np_page:{previous_round}"))
+    if next_round is not None:
+        row.append(InlineKeyboardButton(text=f"Раунд {next_round} ▶️", callback_data=f"np_page:{next_round}"))
+    return InlineKeyboardMarkup(inline_keyboard=[row]) if row else None
+
+
+STATS_FILTERS = {"all": "Все", "active": "Живые", "eliminated": "Выбывшие"}
+STATS_SORTS = {"budget": "💰 Бюджет", "nukes": "🚀 Ракеты", "qol": "😊 QoL"}
+
+
+def admin_stats_keyboard(filter_name, sort_key, page, pages):
+    """Инлайн-клавиатура статистики стран: фильтр, сортировка и страницы (callback ast:<фильтр>:<сортировка>:<страница>)."""
+    def button(text, f, s, p, selected=False):
+        return InlineKeyboardButton(text=f"• {text} •" if selected else text, callback_data=f"ast:{f}:{s}:{p}")
+
+    rows = [
+        [button(text, f, sort_key, 0, f == filter_name) for f, text in STATS_FILTERS.items()],
+        [button(text, filter_name, s, 0, s == sort_key) for s, text in STATS_SORTS.items()],
+    ]
+    if pages > 1:
+        nav = []
+        if page > 0:
+            nav.append(button("◀️", filter_name, sort_key, page - 1))
+        nav.append(button(f"{page + 1}/{pages}", filter_name, sort_key, page))
+        if page + 1 < pages:
+            nav.append(button("▶️", filter_name, sort_key, page + 1))
+        rows.append(nav)
+    return InlineKeyboardMarkup(inline_keyboard=rows)
@@ -0,0 +1,87 @@
+# leaderboard.py
+
+from bisect import bisect_left, insort
+
+import event_log
+import game_state
+from world_features import DirtyPlayers
+
+
+def _avg_qol(player):
+    cities = player.get('cities', {}).values()
+    return round(sum(c['qol'] for c in cities) / len(cities), 1) if cities else 0
+
+
+# Показатель рейтинга -> (название, функция значения игрока)
+METRICS = {
+    "budget": ("💰 Бюджет", lambda p: p.get('budget', 0)),
+    "qol": ("😊 Уровень жизни", _avg_qol),
+    "development": ("🏗 Развитие", lambda p: sum(c['level'] for c in p.get('cities', {}).values())),
+    "cities": ("🏙 Уцелевшие города", lambda p: sum(1 for c in p.get('cities', {}).values() if not c.get('ruined'))),
+}
+
+
+class Leaderboard:
+    """
+    Рейтинг живых стран по каждому показателю. Для каждого показателя ведётся
+    отсортированный список ключей (-значение, uid): обновление игрока — два
+    бинарных поиска, топ-k — срез первых k, место игрока — один бинарный поиск.
+    Пересчитываются только игроки, помеченные журналом событий.
+    """
+
+    def __init__(self):
+        self.dirty = DirtyPlayers()
+        self._players = None
+        self._reset()
+
+    def _reset(self):
+        self._sorted = {metric: [] for metric in METRICS}  # показатель -> [(-значение, uid), ...]
+        self._keys = {}  # uid -> {показатель: ключ в списке}
+
+    def _remove(self, uid):
+        keys = self._keys.pop(uid, None)
+        if keys is None:
+            return
+        for metric, key in keys.items():
+            ranking = self._sorted[metric]
+            del ranking[bisect_left(ranking, key)]
+
+    def _add(self, uid, player):
+        keys = self._keys[uid] = {}
+        for metric, (_, value_of) in METRICS.items():
+            key = keys[metric] = (-value_of(player), uid)
+            insort(self._sorted[metric], key)
+
+    def _refresh(self):
+        players = game_state.players
+        everyone, dirty = self.dirty.take()
+        if everyone or players is not self._players:
+            self._reset()
+            self._players = players
+            dirty = players.keys()
+        for uid in list(dirty):
+            self._remove(uid)
+            player = players.get(uid)
+            if player and player.get("country") and not player.get("eliminated"):
+                self._add(uid, player)
+
+    def top(self, metric: str, k: int) -> list:
+        """Первые k мест: [(uid, значение), ...]."""
+        self._refresh()
+        return [(uid, -value) for value, uid in self._sorted[metric][:k]]
+
+    def rank(self, metric: str, uid: int):
+        """Место игрока (с 1) и значение, или None, если игрока нет в рейтинге."""
+        self._refresh()
+        key = self._keys.get(uid, {}).get(metric)
+        if key is None:
+            return None
+        return bisect_left(self._sorted[metric], key) + 1, -key[0]
+
+    def __len__(self):
+        self._refresh()
+        return len(self._keys)
+
+
+leaderboard = Leaderboard()
+event_log.subscribe(leaderboard.dirty.on_event)
@@ -0,0 +1,133 @@
+# live_progress.py
+
+import asyncio
+import time
+
+import config
+import global_events
+import metrics
+
+BAR_LENGTH = 10
+
+
+def render_progress(event_object) -> str:
+    """Текст живого сообщения: сколько собрано в фонд события."""
+    goal = event_object.goal_amount
+    progress = event_object.data.get('progress', 0)
+    filled = min(BAR_LENGTH, progress * BAR_LENGTH // goal) if goal else BAR_LENGTH
+    bar = "🟩" * filled + "⬜" * (BAR_LENGTH - filled)
+    return (f"📊 **{event_object.name}**\n\n{bar}\n"
+            f"Собрано: **${progress} / ${goal}**\n"
+            f"Осталось раундов: {event_object.data.get('rounds_left', 0)}")
+
+
+class LiveProgress:
+    """
+    Живое сообщение с прогрессом фонда у каждого участника события.
+    Бот не пишет новое сообщение на каждый взнос, а редактирует закреплённое,
+    причём не чаще раза в `interval` секунд на чат: серия взносов даёт одну правку
+    с актуальной суммой. ID сообщений хранятся в данных события (попадают в снимок).
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._last_edit = {}  # chat_id -> время последней правки
+        self._last_text = {}  # chat_id -> текст, который сейчас в сообщении
+        self._scheduled = {}  # chat_id -> задача отложенной правки
+
+    @staticmethod
+    def _messages(event_object) -> dict:
+        """ID живых сообщений события. Только чтение: после close() словарь не создаётся заново."""
+        return event_object.data.get('live_messages', {})
+
+    @staticmethod
+    def _is_active(event_object) -> bool:
+        # Обработчик мог взять объект события до того, как другой взнос завершил событие
+        return global_events.runtime.current() is event_object
+
+    async def attach(self, bot, chat_id, event_object):
+        """Присылает участнику живое сообщение и закрепляет его (если его ещё нет и событие идёт)."""
+        if not self._is_active(event_object) or chat_id in self._messages(event_object):
+            return
+        try:
+            sent_text = render_progress(event_object)
+            sent = await bot.send_message(chat_id, sent_text, parse_mode="Markdown")
+        except Exception as e:
+            print(f"Error sending live progress to {chat_id}: {e}")
+            return
+        if not self._is_active(event_object):
+            # Событие закончилось, пока сообщение отправлялось: close() его уже не увидит
+            try:
+                await bot.delete_message(chat_id, sent.message_id)
+            except Exception as e:
+                print(f"Error deleting stale live progress for {chat_id}: {e}")
+            return
+        event_object.data.setdefault('live_messages', {})[chat_id] = sent.message_id
+        self._last_edit[chat_id] = time.monotonic()
+        self._last_text[chat_id] = sent_text
+        try:
+            await bot.pin_chat_message(chat_id, sent.message_id, disable_notification=True)
+            if not self._is_active(event_object):
+                # close() мог открепить сообщения раньше, чем дошло это закрепление
+                await bot.unpin_chat_message(chat_id, message_id=sent.message_id)
+        except Exception as e:
+            print(f"Error pinning live progress for {chat_id}: {e}")
+
+    def refresh(self, bot, event_object):
+        """Планирует обновление живых сообщений у всех участников."""
+        if not self._is_active(event_object):
+            return
+        for chat_id in self._messages(event_object):
+            if chat_id in self._scheduled:
+                metrics.inc("live_progress_coalesced")
+                continue
+            self._scheduled[chat_id] = asyncio.create_task(self._edit_later(bot, chat_id, event_object))
+
+    async def _edit_later(self, bot, chat_id, event_object):
+        delay = self._last_edit.get(chat_id, 0) + self.interval - time.monotonic()
+        try:
+            if delay > 0:
+                await asyncio.sleep(delay)
+        finally:
+            self._scheduled.pop(chat_id, None)
+        if not self._is_active(event_object):
+            return
+        # Текст берётся в момент правки: все взносы за время ожидания попадут в неё.
+        # Если он не изменился (например, сразу после attach), правка не нужна
+        text = render_progress(event_object)
+        if text == self._last_text.get(chat_id):
+            metrics.inc("live_progress_unchanged")
+            return
+        self._last_edit[chat_id] = time.monotonic()
+        await self._edit(bot, chat_id, event_object, text)
+
+    async def _edit(self, bot, chat_id, event_object, text):
+        message_id = self._messages(event_object).get(chat_id)
+        if message_id is None:
+            return
+        try:
+            await bot.edit_message_text(text, chat_id=chat_id, message_id=message_id, parse_mode="Markdown")
+            self._last_text[chat_id] = text
+            metrics.inc("live_progress_edits")
+        except Exception as e:
+            # "message is not modified" и удалённые сообщения не мешают игре
+            print(f"Error editing live progress for {chat_id}: {e}")
+
+    async def close(self, bot, event_object, outcome: str):
+        """Финальная правка с итогом события и открепление сообщений."""
+        messages = event_object.data.pop('live_messages', {})
+        for task in self._scheduled.values():
+            task.cancel()
+        self._scheduled.clear()
+        self._last_edit.clear()
+        self._last_text.clear()
+        final_text = f"{render_progress(event_object)}\n\n{outcome}"
+        for chat_id, message_id in messages.items():
+            try:
+                await bot.edit_message_text(final_text, chat_id=chat_id, message_id=message_id, parse_mode="Markdown")
+                await bot.unpin_chat_message(chat_id, message_id=message_id)
+            except Exception as e:
+                print(f"Error closing live progress for {chat_id}: {e}")
+
+
+tracker = LiveProgress(config.LIVE_PROGRESS_EDIT_INTERVAL)
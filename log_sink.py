@@ -0,0 +1,62 @@
+# log_sink.py
+
+import asyncio
+
+import config
+import metrics
+
+# Очередь исходящих сообщений в лог-канал. Обработчики кладут текст и не ждут Telegram.
+queue = asyncio.Queue(maxsize=config.LOG_QUEUE_SIZE)
+# Сообщение, взятое из очереди и ещё не отправленное: при отмене задачи во время
+# отправки оно не теряется, а досылается при остановке или перезапуске задачи
+_in_flight = []
+
+
+def enqueue(text: str):
+    """Ставит сообщение в очередь лог-канала. При переполнении сообщение теряется."""
+    try:
+        queue.put_nowait(text)
+    except asyncio.QueueFull:
+        metrics.inc("log_dropped")
+        print(f"Log queue is full, dropped: {text}")
+
+
+async def _send(bot, text):
+    try:
+        await bot.send_message(config.LOG_CHANNEL_ID, text, parse_mode="HTML")
+        metrics.inc("log_sent")
+    except Exception as e:
+        print(f"Error sending log to channel: {e}")
+
+
+async def log_sink_task(bot):
+    """Фоновая задача: отправляет сообщения из очереди в лог-канал."""
+    # Сообщение, прерванное при прошлом запуске задачи, уходит первым
+    while _in_flight:
+        await _send(bot, _in_flight[0])
+        _in_flight.pop(0)
+    while True:
+        text = await queue.get()
+        _in_flight.append(text)
+        try:
+            await _send(bot, text)
+            _in_flight.remove(text)
+        finally:
+            queue.task_done()
+
+
+async def drain(bot, timeout: float):
+    """Досылает оставшиеся сообщения при остановке бота, но не дольше `timeout` секунд."""
+    async def _drain():
+        # Сначала то, что задача уже взяла из очереди, но не успела отправить до отмены
+        while _in_flight:
+            await _send(bot, _in_flight[0])
+            _in_flight.pop(0)
+        while not queue.empty():
+            await _send(bot, queue.get_nowait())
+            queue.task_done()
+
+    try:
+        await asyncio.wait_for(_drain(), timeout=timeout)
+    except asyncio.TimeoutError:
+        print(f"Не успели дослать {len(_in_flight) + queue.qsize()} сообщений в лог-канал при остановке.")
@@ -6,15 +6,60 @@ from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 
 
+import audit_log
 import config
 import game_state
+import delivery
+from delivery import deliver
+import log_sink
+from leaderboard import leaderboard
+import memory_report
+import persistence
+import replay
+import round_charts
+import world_features
 from handlers import router as player_router # <-- Переименовываем для ясности
 from admin_handlers import admin_router
+from middlewares import UpdateDedupMiddleware, CallbackDedupMiddleware, ThrottlingMiddleware, ReachabilityMiddleware, \
+    ReplayMiddleware, DirtyTrackingMiddleware
+from throttling import Throttler
+from ttl_cache import TTLCache
+from supervisor import TaskSupervisor
+from metrics_server import metrics_server_task
+from dashboard import dashboard_task
+from rate_limiter import RateLimitRequestMiddleware, limiter
+from webhook import run_webhook
 # Инициализация Aiogram
 storage = MemoryStorage()
 bot = Bot(token=config.TOKEN)
+bot.session.middleware(RateLimitRequestMiddleware(limiter))
 dp = Dispatcher(storage=storage)
 
+# Общий кэш для отсева повторных апдейтов и двойных нажатий
+dedup_cache = TTLCache(maxsize=config.DEDUP_MAX_KEYS, ttl=config.DEDUP_TTL)
+dp.update.outer_middleware(UpdateDedupMiddleware(dedup_cache))
+# Игрок, заблокировавший бота, снова получает рассылки, как только напишет боту
+dp.update.outer_middleware(ReachabilityMiddleware())
+# Снимок состояния, рейтинг и признаки мира пересчитывают только игроков, помеченных изменёнными
+dp.update.outer_middleware(DirtyTrackingMiddleware(persistence.freezer.dirty, leaderboard.dirty,
+                                                   world_features.features.dirty))
+dp.callback_query.middleware(CallbackDedupMiddleware(dedup_cache))
+
+# Анти-флуд: вёдра токенов по классам кнопок
+throttler = Throttler(config.THROTTLE_RATES, idle_ttl=config.THROTTLE_IDLE_TTL,
+                      merge_window=config.THROTTLE_VIEW_MERGE_WINDOW)
+dp.message.middleware(ThrottlingMiddleware(throttler))
+dp.callback_query.middleware(ThrottlingMiddleware(throttler))
+
+# Что ещё показывать в отчёте о памяти (/memory)
+memory_report.register("fsm_storage", lambda: [storage.storage])
+memory_report.register("dedup_cache", lambda: [dedup_cache])
+memory_report.register("throttler", lambda: [throttler])
+
+# Генератор кубиков для каждого апдейта; при включённом реплее апдейт пишется вместе с его seed
+dp.message.middleware(ReplayMiddleware())
+dp.callback_query.middleware(ReplayMiddleware())
+
 
 # =====================================================================================
 # --- ФОНОВЫЕ ЗАДАЧИ (ТАЙМЕР РАУНДА) ---
@@ -24,11 +69,7 @@ async def broadcast_to_active_players(message_text, parse_mode=None, exclude_adm
     """Отправляет сообщение всем активным игрокам."""
     p_ids = [uid for uid, p in game_state.players.items() if p.get("country") and not p.get("eliminated")]
     if exclude_admin: p_ids = [uid for uid in p_ids if uid != config.ADMIN_ID]
-    for uid in p_ids:
-        try:
-            await bot.send_message(uid, message_text, parse_mode=parse_mode)
-        except Exception as e:
-            print(f"Ошибка широковещательной рассылки игроку {uid}: {e}")
+    return await deliver(bot, p_ids, [message_text], parse_mode=parse_mode)
 
 
 async def round_timer_task():
@@ -55,8 +96,39 @@ async def main():
     dp.include_router(player_router)
     dp.include_router(admin_router)
 
-    asyncio.create_task(round_timer_task())
-    await dp.start_polling(bot)
+    if persistence.load_snapshot():
+        print(f"Состояние игры восстановлено из {config.SNAPSHOT_PATH} (раунд {game_state.current_round}).")
+
+    supervisor = TaskSupervisor()
+    supervisor.start("round_timer", round_timer_task)
+    supervisor.start("log_sink", lambda: log_sink.log_sink_task(bot))
+    supervisor.start("snapshot_flusher", persistence.snapshot_flusher_task)
+    supervisor.start("audit_writer", audit_log.audit_writer_task)
+    if config.REPLAY_DIR:
+        supervisor.start("replay_writer", replay.replay_writer_task)
+    if config.METRICS_PORT:
+        supervisor.start("metrics_server", metrics_server_task)
+    if config.DASHBOARD_PORT:
+        supervisor.start("dashboard", dashboard_task)
+
+    try:
+        if config.BOT_MODE == "webhook":
+            await run_webhook(dp, bot)
+        else:
+            # start_polling сам перехватывает SIGINT/SIGTERM и возвращает управление
+            await dp.start_polling(bot, close_bot_session=False)
+    finally:
+        print("Остановка бота: досылаем очередь и сохраняем состояние...")
+        await supervisor.shutdown(timeout=config.SHUTDOWN_DRAIN_TIMEOUT)
+        # Рассылки из обработчиков и таймера (включая ждущие в лимитере отправки) — до закрытия сессии
+        await delivery.drain(timeout=config.SHUTDOWN_DRAIN_TIMEOUT)
+        round_charts.charts.shutdown()
+        await log_sink.drain(bot, timeout=config.SHUTDOWN_DRAIN_TIMEOUT)
+        try:
+            persistence.save_snapshot()
+        except Exception as e:
+            print(f"Ошибка сохранения финального снимка: {e}")
+        await bot.session.close()
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
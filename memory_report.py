@@ -0,0 +1,177 @@
+# memory_report.py
+
+import asyncio
+import sys
+import time
+import tracemalloc
+from collections import deque
+from types import BuiltinFunctionType, FunctionType, MethodType, ModuleType
+
+from aiogram import Bot
+
+import audit_log
+import config
+import event_log
+import game_state
+import leaderboard
+import log_sink
+import persistence
+import replay
+import world_features
+
+# Объекты, внутрь которых обход не заходит: они не принадлежат состоянию игры
+OPAQUE_TYPES = (type, ModuleType, FunctionType, BuiltinFunctionType, MethodType,
+                asyncio.AbstractEventLoop, asyncio.Future, Bot)
+ATOMIC_TYPES = {int, float, str, bool, bytes, type(None)}
+CONTAINER_TYPES = {dict, list, tuple, set}
+
+
+async def deep_sizeof(roots, seen: set) -> tuple:
+    """
+    Размер объектов, достижимых из `roots`, в байтах и их число.
+    Объекты из `seen` не считаются повторно: так подсистемы делят общий учёт.
+    Каждые MEMORY_REPORT_STEP объектов обход уступает цикл событий: большая
+    игра не замирает, а цифры получаются приблизительными, что для отчёта нормально.
+    """
+    total = count = 0
+    stack = list(roots)
+    getsizeof = sys.getsizeof
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        cls = type(obj)
+        if cls not in ATOMIC_TYPES and cls not in CONTAINER_TYPES and isinstance(obj, OPAQUE_TYPES):
+            continue
+        seen.add(id(obj))
+        total += getsizeof(obj)
+        count += 1
+        if count % config.MEMORY_REPORT_STEP == 0:
+            await asyncio.sleep(0)
+        if cls in ATOMIC_TYPES:
+            continue
+        if isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(obj)
+        else:
+            if hasattr(obj, "__dict__"):
+                stack.append(obj.__dict__)
+            for slot in getattr(cls, "__slots__", ()):
+                if hasattr(obj, slot):
+                    stack.append(getattr(obj, slot))
+    return total, count
+
+
+def _sessions():
+    return [game_state.attack_sessions, game_state.admin_attack_session, game_state.admin_modify_session,
+            game_state.admin_broadcast_session, game_state.negotiation_sessions, game_state.nickname_sessions,
+            game_state.surrender_sessions]
+
+
+# Подсистема -> функция, возвращающая её корневые объекты. Порядок важен:
+# города считаются раньше игроков, поэтому в "players" их размер не входит.
+SUBSYSTEMS = {
+    "cities": lambda: [p.get("cities") for p in game_state.players.values()],
+    "players": lambda: [game_state.players],
+    "sessions": _sessions,
+    "admin_bans": lambda: [game_state.call_admin_bans],
+    "event_log": lambda: [game_state.event_log],
+    "newspaper_archive": lambda: [game_state.newspaper_archive],
+    "global_event": lambda: [game_state.active_global_event, game_state.event_cooldowns],
+    "world_features": lambda: [world_features.features],
+    "leaderboard": lambda: [leaderboard.leaderboard],
+    "snapshot_cache": lambda: [persistence.freezer],
+    "queues": lambda: [audit_log._pending, replay._pending, log_sink.queue._queue],
+}
+
+
+def register(name: str, roots):
+    """Добавляет подсистему в отчёт (FSM-хранилище, кэши — их создают другие модули)."""
+    SUBSYSTEMS[name] = roots
+
+
+class MemoryReport:
+    """
+    Отчёт о памяти по подсистемам. Обход объектов идёт в цикле событий
+    (живое состояние нельзя обходить из потока) и стоит сотни миллисекунд
+    на большой игре, поэтому результат кэшируется на MEMORY_REPORT_MAX_AGE секунд.
+    """
+
+    def __init__(self):
+        self.rows = []  # (подсистема, байт, объектов)
+        self.built_at = 0.0
+        self.elapsed = 0.0
+
+    async def get(self, fresh=False):
+        if fresh or time.time() - self.built_at > config.MEMORY_REPORT_MAX_AGE:
+            started = time.perf_counter()
+            seen, rows = set(), []
+            for name, roots in SUBSYSTEMS.items():
+                size, count = await deep_sizeof([root for root in roots() if root is not None], seen)
+                rows.append((name, size, count))
+            self.rows, self.built_at = rows, time.time()
+            self.elapsed = time.perf_counter() - started
+        return self.rows
+
+    async def gauges(self) -> dict:
+        return {f"memory_{name}_bytes": size for name, size, _ in await self.get()}
+
+    async def render(self, fresh=True) -> str:
+        rows = await self.get(fresh)
+        lines = [f"{name:<18} {size / 1024:>10.1f} КБ {count:>9} объектов" for name, size, count in rows]
+        total = sum(size for _, size, _ in rows)
+        lines.append(f"{'Всего':<18} {total / 1024:>10.1f} КБ (подсчёт {self.elapsed * 1000:.1f} мс)")
+        if tracemalloc.is_tracing():
+            current, peak = tracemalloc.get_traced_memory()
+            lines.append(f"tracemalloc: сейчас {current / 1048576:.1f} МБ, пик {peak / 1048576:.1f} МБ")
+        return "\n".join(lines)
+
+
+report = MemoryReport()
+
+
+# --- Выборочная трассировка выделений (tracemalloc) ---
+
+# Последние снимки tracemalloc на границах раундов: (подпись, снимок)
+_round_snapshots = deque(maxlen=2)
+_IGNORED = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"))
+
+
+def start_tracing():
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(config.TRACEMALLOC_FRAMES)
+
+
+def stop_tracing():
+    tracemalloc.stop()
+    _round_snapshots.clear()
+
+
+def _take_snapshot():
+    return tracemalloc.take_snapshot().filter_traces(_IGNORED)
+
+
+def top_allocations(limit=None) -> list:
+    """Строки с наибольшим объёмом живых выделений."""
+    stats = _take_snapshot().statistics("lineno")
+    return [str(stat) for stat in stats[:limit or config.MEMORY_TOP_LIMIT]]
+
+
+def round_diff(limit=None):
+    """Разница выделений между двумя последними границами раундов: (подписи, строки) или None."""
+    if len(_round_snapshots) < 2:
+        return None
+    (old_label, old), (new_label, new) = _round_snapshots
+    stats = new.compare_to(old, "lineno")
+    return (old_label, new_label), [str(stat) for stat in stats[:limit or config.MEMORY_TOP_LIMIT]]
+
+
+def on_event(event):
+    """Подписчик журнала: при включённой трассировке снимает память на начале раунда и рестарте игры."""
+    if tracemalloc.is_tracing() and event.type in (event_log.ROUND_STARTED, event_log.GAME_RESTARTED):
+        _round_snapshots.append((f"игра {game_state.game_id}, раунд {event.round}", _take_snapshot()))
+
+
+event_log.subscribe(on_event)
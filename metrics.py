@@ -0,0 +1,31 @@
+# metrics.py
+
+from collections import Counter
+
+# --- Счётчики событий бота (отброшенные дубли, троттлинг и т.д.) ---
+counters = Counter()
+
+# --- Текущие значения (размеры очередей, время пауз и т.д.) ---
+gauges = {}
+
+
+def inc(name: str, value: int = 1):
+    """Увеличивает именованный счётчик."""
+    counters[name] += value
+
+
+def set_gauge(name: str, value):
+    """Запоминает текущее значение метрики."""
+    gauges[name] = value
+
+
+def snapshot() -> dict:
+    """Возвращает копию всех счётчиков и значений для отображения."""
+    data = dict(counters)
+    data.update(gauges)
+    return data
+
+
+def render_text() -> str:
+    """Форматирует метрики построчно (`имя значение`), как их ждёт Prometheus."""
+    return "".join(f"bot_{name} {value}\n" for name, value in sorted(snapshot().items()))
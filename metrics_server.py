@@ -0,0 +1,39 @@
+# metrics_server.py
+
+import asyncio
+from aiohttp import web
+
+import config
+import memory_report
+import metrics
+import log_sink
+
+
+async def handle_metrics(request):
+    metrics.set_gauge("log_queue_size", log_sink.queue.qsize())
+    for name, value in (await memory_report.report.gauges()).items():
+        metrics.set_gauge(name, value)
+    return web.Response(text=metrics.render_text())
+
+
+async def handle_memory(request):
+    text = await memory_report.report.render(fresh=False)
+    if memory_report.tracemalloc.is_tracing():
+        text += "\n\nТоп выделений:\n" + "\n".join(memory_report.top_allocations())
+    return web.Response(text=text)
+
+
+async def metrics_server_task():
+    """Фоновая задача: локальный HTTP-сервер с метриками бота."""
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    app.router.add_get("/memory", handle_memory)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, config.METRICS_HOST, config.METRICS_PORT)
+    await site.start()
+    print(f"Сервер метрик слушает http://{config.METRICS_HOST}:{config.METRICS_PORT}/metrics")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
@@ -0,0 +1,169 @@
+# middlewares.py
+
+from aiogram import BaseMiddleware
+from aiogram.dispatcher.flags import get_flag
+from aiogram.types import Update, Message, CallbackQuery
+
+import config
+import game_state
+import metrics
+import replay
+
+
+class UpdateDedupMiddleware(BaseMiddleware):
+    """
+    Внешний middleware для апдейтов: отбрасывает повторно доставленные
+    апдейты (по update_id) и повторы одного и того же сообщения (по chat_id + message_id).
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    async def __call__(self, handler, event: Update, data):
+        if not self.cache.add(("update", event.update_id)):
+            metrics.inc("dedup_dropped_updates")
+            return None
+        message = event.message
+        if message is not None and not self.cache.add(("message", message.chat.id, message.message_id)):
+            metrics.inc("dedup_dropped_messages")
+            return None
+        return await handler(event, data)
+
+
+class CallbackDedupMiddleware(BaseMiddleware):
+    """
+    Внутренний middleware для коллбэков. Для обработчиков с флагом `idempotent`
+    пропускает только первое нажатие на кнопки одного сообщения: двойной тап
+    не может разграбить город дважды или отправить два ответа на переговоры.
+    Ключ ставится до обработчика (он же отметка «обрабатывается» для параллельных
+    нажатий) и снимается, если обработчик упал: повторное нажатие снова сработает.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    async def __call__(self, handler, event: CallbackQuery, data):
+        if not get_flag(data, "idempotent"):
+            return await handler(event, data)
+        if event.message is not None:
+            key = ("callback", event.message.chat.id, event.message.message_id)
+        else:
+            key = ("callback", event.id)
+        if not self.cache.add(key):
+            metrics.inc("dedup_dropped_callbacks")
+            try:
+                await event.answer()
+            except Exception:
+                pass
+            return None
+        try:
+            return await handler(event, data)
+        except Exception:
+            self.cache.discard(key)
+            metrics.inc("dedup_released_callbacks")
+            raise
+
+
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Внутренний middleware анти-флуда. Класс кнопки берётся из флага `throttle`
+    обработчика ("view" — тяжёлые экраны-отчёты, по умолчанию "action"), все запросы
+    админа идут по классу "admin". Повторный запрос того же экрана в коротком
+    окне склеивается с предыдущим: игрок и так видит свежий ответ.
+    Навигация по меню ("nav") только переключает клавиатуру и не ограничивается:
+    потерянное нажатие оставило бы игрока не на той клавиатуре.
+    """
+
+    def __init__(self, throttler):
+        self.throttler = throttler
+
+    async def __call__(self, handler, event, data):
+        user = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+        kind = get_flag(data, "throttle", default="action")
+        if kind == "nav":
+            return await handler(event, data)
+        if user.id == config.ADMIN_ID:
+            kind = "admin"
+
+        if kind == "view" and isinstance(event, Message) and self.throttler.is_repeat_view(user.id, event.text):
+            return None
+
+        if self.throttler.allow(user.id, kind):
+            return await handler(event, data)
+
+        bucket = self.throttler.bucket(user.id, kind)
+        if kind == "view":
+            # Экран не показан: говорим об этом, а не молчим (кнопки — всплывающим уведомлением)
+            text = "⏳ Слишком часто. Откройте экран через пару секунд."
+            if isinstance(event, Message) and bucket.warned:
+                return None
+        elif bucket.warned:
+            # О действиях предупреждаем один раз за серию
+            return None
+        else:
+            text = "⏳ Слишком много запросов. Подождите пару секунд."
+        bucket.warned = True
+        try:
+            await event.answer(text)
+        except Exception as e:
+            print(f"Error sending throttle warning to {user.id}: {e}")
+        return None
+
+
+class ReachabilityMiddleware(BaseMiddleware):
+    """
+    Внешний middleware для апдейтов: игрок, которого рассылка пометила
+    недоступным (заблокировал бота), снова доступен, как только пишет боту.
+    """
+
+    async def __call__(self, handler, event: Update, data):
+        user = data.get("event_from_user")
+        if user is not None and user.id in game_state.unreachable:
+            game_state.unreachable.discard(user.id)
+            metrics.inc("delivery_unblocked")
+        return await handler(event, data)
+
+
+class DirtyTrackingMiddleware(BaseMiddleware):
+    """
+    Внешний middleware для апдейтов: помечает отправителя изменённым в инкрементальных
+    подсистемах (снимок состояния, рейтинг, признаки мира) — до обработчика и после:
+    обработчик мог поменять данные игрока, не записав событие в журнал, или после await.
+    """
+
+    def __init__(self, *trackers):
+        self.trackers = trackers  # world_features.DirtyPlayers
+
+    async def __call__(self, handler, event: Update, data):
+        user = data.get("event_from_user")
+        if user is None:
+            return await handler(event, data)
+        for tracker in self.trackers:
+            tracker.mark(user.id)
+        try:
+            return await handler(event, data)
+        finally:
+            for tracker in self.trackers:
+                tracker.mark(user.id)
+
+
+class ReplayMiddleware(BaseMiddleware):
+    """
+    Внутренний middleware реплея. Даёт обработчику собственный генератор
+    случайных чисел data["rng"] и записывает апдейт с его seed в реплей, а после
+    обработчика — отпечаток состояния отправителя для сверки при воспроизведении.
+    Регистрируется последним, поэтому видит только апдейты, которые
+    действительно дошли до обработчика.
+    """
+
+    async def __call__(self, handler, event, data):
+        update = data["event_update"]
+        data["rng"] = replay.record(update)
+        try:
+            return await handler(event, data)
+        finally:
+            user = data.get("event_from_user")
+            if user is not None:
+                replay.record_outcome(update, user.id)
@@ -0,0 +1,72 @@
+# newspaper.py
+
+import random
+from collections import OrderedDict
+
+import event_log
+from newspaper_templates import COMPILED_TEMPLATES
+
+# Срочные новости: заголовок на каждое событие, без обобщения
+PRIORITY_TYPES = (event_log.ATTACK_SUCCESS, event_log.ATTACK_SHIELDED,
+                  event_log.COUNTRY_ELIMINATED, event_log.SURRENDERED)
+# Остальные типы из шаблонов в фиксированном порядке — результат зависит только от seed
+REGULAR_TYPES = tuple(t for t in COMPILED_TEMPLATES if t not in PRIORITY_TYPES)
+
+
+def build_newspaper(round_number: int, buckets: dict, seed) -> str:
+    """
+    Собирает выпуск газеты из записей раунда, уже разложенных по типам
+    (см. EventLog.round_buckets). Каждая запись читается один раз.
+    При одинаковом `seed` и одинаковых записях выпуск получается одинаковым.
+    """
+    rng = random.Random(seed)
+    headlines = []
+
+    for event_type in PRIORITY_TYPES:
+        specific_templates = COMPILED_TEMPLATES[event_type][1]
+        for event in buckets.get(event_type, ()):
+            render = rng.choice(specific_templates)
+            headlines.append(f"⚡ {render(event.template_fields())}")
+
+    for event_type in REGULAR_TYPES:
+        events = buckets.get(event_type)
+        if not events:
+            continue
+        summary_threshold, specific_templates, summary_templates = COMPILED_TEMPLATES[event_type]
+        if summary_threshold and len(events) >= summary_threshold:
+            render = rng.choice(summary_templates)
+            headlines.append(f"📌 {render(None)}")
+        else:
+            for event in events:
+                render = rng.choice(specific_templates)
+                headlines.append(f"🔹 {render(event.template_fields())}")
+
+    if not headlines:
+        return None
+    rng.shuffle(headlines)
+    newspaper = f"📰 **Le Monde Global - Итоги раунда №{round_number}** 📰\n"
+    newspaper += "================================\n\n"
+    newspaper += "\n\n".join(headlines)
+    return newspaper
+
+
+class EditionCache:
+    """
+    Кэш готовых выпусков по ключу (игра, раунд, версия журнала). Предпросмотр
+    админа, рассылка и архив получают один и тот же текст, а шаблоны
+    отрисовываются только когда в журнале появились новые записи.
+    """
+
+    def __init__(self, maxsize: int = 8):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+
+    def get_or_build(self, key, build):
+        if key in self._items:
+            self._items.move_to_end(key)
+            return self._items[key]
+        edition = build()
+        self._items[key] = edition
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+        return edition
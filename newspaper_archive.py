@@ -0,0 +1,104 @@
+# newspaper_archive.py
+
+import os
+import struct
+from collections import OrderedDict
+
+# Заголовок записи в файле архива: номер раунда и длина текста в байтах
+RECORD_HEADER = struct.Struct("<II")
+
+
+class NewspaperArchive:
+    """
+    Архив выпусков газеты. Выпуски дописываются в один файл подряд, в памяти
+    держится только индекс смещений и несколько последних выпусков.
+    Любая страница читается одним seek, без просмотра файла.
+    """
+
+    def __init__(self, directory: str, keep_in_memory: int = 3):
+        self.directory = directory
+        self.keep_in_memory = keep_in_memory
+        self._offsets = {}  # раунд -> (смещение текста, длина)
+        self._rounds = []  # раунды в порядке выпуска
+        self._positions = {}  # раунд -> позиция в self._rounds
+        self._recent = OrderedDict()  # раунд -> текст
+        if os.path.exists(self.path):
+            self._rebuild_index()
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, "editions.bin")
+
+    def _rebuild_index(self):
+        with open(self.path, "rb") as f:
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                round_number, length = RECORD_HEADER.unpack(header)
+                self._index(round_number, f.tell(), length)
+                f.seek(length, os.SEEK_CUR)
+
+    def _index(self, round_number, offset, length):
+        if round_number not in self._offsets:
+            self._positions[round_number] = len(self._rounds)
+            self._rounds.append(round_number)
+        self._offsets[round_number] = (offset, length)
+
+    def _remember(self, round_number, text):
+        self._recent[round_number] = text
+        self._recent.move_to_end(round_number)
+        while len(self._recent) > self.keep_in_memory:
+            self._recent.popitem(last=False)
+
+    def add(self, round_number: int, text: str):
+        """Сохраняет выпуск за раунд в архив."""
+        payload = text.encode("utf-8")
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.write(RECORD_HEADER.pack(round_number, len(payload)))
+            offset = f.tell()
+            f.write(payload)
+        self._index(round_number, offset, len(payload))
+        self._remember(round_number, text)
+
+    def get(self, round_number: int):
+        """Текст выпуска за раунд или None, если выпуска нет."""
+        text = self._recent.get(round_number)
+        if text is not None:
+            self._recent.move_to_end(round_number)
+            return text
+        location = self._offsets.get(round_number)
+        if location is None:
+            return None
+        offset, length = location
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            text = f.read(length).decode("utf-8")
+        self._remember(round_number, text)
+        return text
+
+    def latest_round(self):
+        return self._rounds[-1] if self._rounds else None
+
+    def neighbours(self, round_number: int):
+        """Предыдущий и следующий раунды с выпусками (или None)."""
+        position = self._positions.get(round_number)
+        if position is None:
+            return None, None
+        previous_round = self._rounds[position - 1] if position > 0 else None
+        next_round = self._rounds[position + 1] if position + 1 < len(self._rounds) else None
+        return previous_round, next_round
+
+    def __len__(self):
+        return len(self._rounds)
+
+    def frozen_copy(self) -> "NewspaperArchive":
+        """Копия индекса архива для снимка состояния (сам файл архива только дописывается)."""
+        clone = NewspaperArchive.__new__(NewspaperArchive)
+        clone.__dict__.update(self.__dict__)
+        clone._offsets = dict(self._offsets)
+        clone._rounds = self._rounds[:]
+        clone._positions = dict(self._positions)
+        clone._recent = OrderedDict(self._recent)
+        return clone
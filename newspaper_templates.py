@@ -1,6 +1,7 @@
 # newspaper_templates.py
 
 import random
+import string
 
 TEMPLATES = {
     # Ключ: (Порог для обобщения, Шаблоны для единичных, Шаблоны для обобщения)
@@ -115,4 +116,57 @@ def get_random_template(event_type, is_summary=False):
         return random.choice(summary_templates)
     elif not is_summary and specific_templates:
         return random.choice(specific_templates)
-    return None
\ No newline at end of file
+    return None
+
+
+# =====================================================================================
+# --- ПРЕДКОМПИЛЯЦИЯ ШАБЛОНОВ ---
+# =====================================================================================
+
+# Какие поля события может использовать шаблон каждого типа (по умолчанию — только {country})
+ALLOWED_FIELDS = {
+    "ATTACK_SUCCESS": {"attacker", "target", "city"},
+    "ATTACK_SHIELDED": {"attacker", "target"},
+    "COUNTRY_ELIMINATED": {"country", "attacker"},
+}
+DEFAULT_ALLOWED_FIELDS = {"country"}
+
+
+def compile_template(text, allowed_fields):
+    """
+    Разбирает шаблон один раз и возвращает функцию отрисовки `render(fields) -> str`.
+    Поле, которого нет в `allowed_fields`, или спецификатор формата — ошибка при импорте.
+    """
+    parts = []
+    for literal, field_name, format_spec, conversion in string.Formatter().parse(text):
+        if literal:
+            parts.append((literal, None))
+        if field_name is None:
+            continue
+        if field_name not in allowed_fields or format_spec or conversion:
+            raise ValueError(f"Недопустимое поле '{{{field_name}}}' в шаблоне газеты: {text!r}")
+        parts.append((None, field_name))
+
+    if all(field_name is None for _, field_name in parts):
+        static_text = "".join(literal for literal, _ in parts)
+        return lambda fields: static_text
+
+    def render(fields):
+        return "".join(literal if field_name is None else fields[field_name] for literal, field_name in parts)
+    return render
+
+
+def _compile_all():
+    compiled = {}
+    for event_type, (threshold, specific_templates, summary_templates) in TEMPLATES.items():
+        allowed = ALLOWED_FIELDS.get(event_type, DEFAULT_ALLOWED_FIELDS)
+        compiled[event_type] = (
+            threshold,
+            [compile_template(t, allowed) for t in specific_templates],
+            [compile_template(t, set()) for t in summary_templates] if summary_templates else None,
+        )
+    return compiled
+
+
+# Ключ: (Порог для обобщения, Функции для единичных, Функции для обобщения)
+COMPILED_TEMPLATES = _compile_all()
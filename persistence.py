@@ -0,0 +1,174 @@
+# persistence.py
+
+import asyncio
+import gzip
+import os
+import pickle
+import tempfile
+import time
+
+import config
+import event_log
+import game_state
+import metrics
+from world_features import DirtyPlayers
+
+# Поля game_state, которые переживают перезапуск бота
+SNAPSHOT_FIELDS = [
+    "players", "call_admin_bans", "event_cooldowns",
+    "current_round", "round_end_time", "round_notifications",
+    "game_id", "event_log", "newspaper_archive", "active_global_event",
+    "unreachable",
+]
+SNAPSHOT_FORMAT_VERSION = 2
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def build_snapshot() -> dict:
+    """Собирает словарь с сохраняемыми полями game_state."""
+    data = {name: getattr(game_state, name) for name in SNAPSHOT_FIELDS}
+    data["__version__"] = SNAPSHOT_FORMAT_VERSION
+    return data
+
+
+def write_atomic(path: str, payload: bytes):
+    """Пишет файл через временный файл и rename, чтобы не оставить обрезанный снимок."""
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def serialize(data: dict) -> bytes:
+    """Pickle + gzip. Работает только с копией состояния, поэтому выполняется в потоке."""
+    return gzip.compress(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL),
+                         compresslevel=config.SNAPSHOT_COMPRESS_LEVEL)
+
+
+def save_snapshot(path: str = None):
+    """Сохраняет текущее состояние игры на диск (синхронно — при остановке бота)."""
+    path = path or config.SNAPSHOT_PATH
+    write_atomic(path, serialize(build_snapshot()))
+
+
+_ATOMIC = {int, float, str, bool, type(None)}
+
+
+def _copy(value):
+    """Глубокая копия данных игры: словари, списки и множества копируются, остальное неизменяемо."""
+    cls = type(value)
+    if cls is dict:
+        return {key: item if type(item) in _ATOMIC else _copy(item) for key, item in value.items()}
+    if cls is list:
+        return [item if type(item) in _ATOMIC else _copy(item) for item in value]
+    if cls is set:
+        return set(value)
+    return value
+
+
+class SnapshotFreezer:
+    """
+    Замораживает согласованную копию game_state для снимка. Копии игроков
+    кэшируются и переиспользуются между снимками (структурное разделение):
+    заново копируются только игроки, помеченные изменёнными — журналом событий
+    или апдейтом от самого игрока. Замороженные копии никогда не меняются.
+    """
+
+    def __init__(self):
+        self._players = None  # Словарь игроков, с которого сняты копии
+        self._copies = {}  # uid -> замороженная копия игрока
+        self.dirty = DirtyPlayers()
+
+    def mark_dirty(self, uid):
+        self.dirty.mark(uid)
+
+    def mark_all_dirty(self):
+        self.dirty.mark_all()
+
+    def _frozen_players(self) -> dict:
+        players = game_state.players
+        everyone, dirty = self.dirty.take()
+        if everyone or players is not self._players:
+            self._players = players
+            self._copies = {uid: _copy(p) for uid, p in players.items()}
+        else:
+            for uid in dirty:
+                if uid in players:
+                    self._copies[uid] = _copy(players[uid])
+                else:
+                    self._copies.pop(uid, None)
+        return dict(self._copies)
+
+    def freeze(self) -> dict:
+        """Копия сохраняемых полей. Вызывать под game_state.lock: между шагами нет await."""
+        data = {name: _copy(getattr(game_state, name)) for name in SNAPSHOT_FIELDS
+                if name not in ("players", "event_log", "newspaper_archive")}
+        data["players"] = self._frozen_players()
+        data["event_log"] = game_state.event_log.frozen_copy()
+        data["newspaper_archive"] = game_state.newspaper_archive.frozen_copy()
+        data["__version__"] = SNAPSHOT_FORMAT_VERSION
+        return data
+
+
+freezer = SnapshotFreezer()
+event_log.subscribe(freezer.dirty.on_event)
+
+
+async def save_snapshot_async(path: str = None):
+    """
+    Снимок без остановки цикла событий: под game_state.lock снимается копия
+    (время паузы — в метрике snapshot_pause_ms), сериализация, сжатие
+    и атомарная запись идут в потоке.
+    """
+    path = path or config.SNAPSHOT_PATH
+    async with game_state.lock:
+        started = time.perf_counter()
+        data = freezer.freeze()
+        pause = time.perf_counter() - started
+    metrics.set_gauge("snapshot_pause_ms", round(pause * 1000, 3))
+    started = time.perf_counter()
+    await asyncio.to_thread(lambda: write_atomic(path, serialize(data)))
+    metrics.set_gauge("snapshot_write_ms", round((time.perf_counter() - started) * 1000, 1))
+
+
+def load_snapshot(path: str = None) -> bool:
+    """Восстанавливает состояние игры из снимка. Возвращает False, если снимка нет."""
+    path = path or config.SNAPSHOT_PATH
+    if not os.path.exists(path):
+        return False
+    try:
+        with open(path, "rb") as f:
+            payload = f.read()
+        if payload[:2] == GZIP_MAGIC:
+            payload = gzip.decompress(payload)
+        data = pickle.loads(payload)
+    except Exception as e:
+        print(f"Не удалось прочитать снимок состояния {path}: {e}")
+        return False
+    if data.get("__version__") != SNAPSHOT_FORMAT_VERSION:
+        print(f"Снимок {path} имеет несовместимую версию формата, пропускаем.")
+        return False
+    for name in SNAPSHOT_FIELDS:
+        if name in data:
+            setattr(game_state, name, data[name])
+    freezer.mark_all_dirty()
+    return True
+
+
+async def snapshot_flusher_task():
+    """Фоновая задача: периодически сохраняет состояние игры."""
+    while True:
+        await asyncio.sleep(config.SNAPSHOT_INTERVAL)
+        try:
+            await save_snapshot_async()
+        except Exception as e:
+            print(f"Ошибка сохранения снимка состояния: {e}")
@@ -0,0 +1,86 @@
+# rate_limiter.py
+
+import asyncio
+import time
+from collections import OrderedDict
+
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+
+import config
+import metrics
+from throttling import TokenBucket
+
+
+class SendRateLimiter:
+    """
+    Общий лимит исходящих сообщений бота: не больше `global_rate` в секунду
+    на весь бот и не больше `per_chat_rate` в секунду в один чат (лимиты Telegram).
+    """
+
+    def __init__(self, global_rate: float, global_burst: float, per_chat_rate: float, per_chat_burst: float,
+                 idle_ttl: float = 60):
+        now = time.monotonic()
+        self._global = TokenBucket(global_rate, global_burst, now)
+        self.per_chat_rate = per_chat_rate
+        self.per_chat_burst = per_chat_burst
+        self.idle_ttl = idle_ttl
+        self._chats = OrderedDict()  # chat_id -> TokenBucket
+
+    def _chat_bucket(self, chat_id, now):
+        chats = self._chats
+        while chats:
+            oldest = next(iter(chats.values()))
+            if now - oldest.updated_at < self.idle_ttl:
+                break
+            chats.popitem(last=False)
+        bucket = chats.get(chat_id)
+        if bucket is None:
+            bucket = chats[chat_id] = TokenBucket(self.per_chat_rate, self.per_chat_burst, now)
+        else:
+            chats.move_to_end(chat_id)
+        return bucket
+
+    async def acquire(self, chat_id=None):
+        """Ждёт, пока отправка в `chat_id` не уложится в оба лимита."""
+        while True:
+            now = time.monotonic()
+            chat_bucket = self._chat_bucket(chat_id, now) if chat_id is not None else None
+            wait = self._global.delay(now)
+            if chat_bucket is not None:
+                wait = max(wait, chat_bucket.delay(now))
+            if wait <= 0:
+                self._global.consume(now)
+                if chat_bucket is not None:
+                    chat_bucket.consume(now)
+                return
+            metrics.inc("send_rate_limited")
+            await asyncio.sleep(wait)
+
+
+class RateLimitRequestMiddleware(BaseRequestMiddleware):
+    """
+    Middleware сессии бота: каждый исходящий запрос с chat_id проходит через общий
+    лимитер, а ответ 429 (RetryAfter) переживается одной повторной попыткой.
+    """
+
+    def __init__(self, limiter: SendRateLimiter):
+        self.limiter = limiter
+
+    async def __call__(self, make_request, bot, method):
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is not None:
+            await self.limiter.acquire(chat_id)
+        try:
+            return await make_request(bot, method)
+        except TelegramRetryAfter as e:
+            metrics.inc("send_retry_after")
+            await asyncio.sleep(e.retry_after)
+            if chat_id is not None:
+                await self.limiter.acquire(chat_id)
+            return await make_request(bot, method)
+
+
+# Единственный лимитер на процесс: через него идут все отправки бота
+limiter = SendRateLimiter(global_rate=config.SEND_GLOBAL_RATE, global_burst=config.SEND_GLOBAL_BURST,
+                          per_chat_rate=config.SEND_PER_CHAT_RATE, per_chat_burst=config.SEND_PER_CHAT_BURST)
@@ -0,0 +1,282 @@
+# replay.py
+#
+# Запись и воспроизведение игры. Каждый апдейт, дошедший до обработчика
+# (после отсева дублей и анти-флуда), пишется в реплей вместе с seed генератора
+# случайных чисел, которым обработчик бросал кубики. Файл — gzip JSONL,
+# по одному файлу на игру: data/replays/<game_id>.jsonl.gz.
+#
+# Строки файла:
+#   {"replay": 1, "game_id": ..., "started": ...}   — заголовок
+#   {"seed": ..., "ts": ..., "update": {...}}       — апдейт Telegram как есть
+#   {"round": N}                                    — начался раунд N (для сверки)
+#   {"outcome": update_id, "user": ..., "digest": ...} — состояние отправителя после обработчика
+#
+# Воспроизведение прогоняет апдейты через настоящие обработчики без сети:
+#   python replay.py data/replays/<game_id>.jsonl.gz --snapshot replayed.pickle
+# Не воспроизводится то, чего нет в апдейтах: содержимое загруженных админом
+# документов и время (таймер раунда).
+#
+# Что гарантируется: кубики каждый обработчик бросает своим генератором
+# random.Random(seed) из data["rng"], поэтому одинаковое состояние и тот же
+# апдейт дают те же броски. Что не гарантируется: в живой игре обработчики
+# работают параллельно и перемежаются на await, а воспроизведение подаёт апдейты
+# строго по очереди. Обработчик, который читает общее состояние до await и пишет
+# после (раунд, ещё идущий у админа, проверки is_processing_next_round), может
+# закончиться иначе. Такие места находит сверка: после каждого апдейта в реплей
+# пишется отпечаток состояния отправителя, и воспроизведение сообщает о каждом
+# апдейте, после которого отпечаток не совпал, а не только о сдвиге раундов.
+
+import argparse
+import asyncio
+import datetime
+import gzip
+import json
+import os
+import random
+import tempfile
+import time
+import typing
+import zlib
+
+import config
+import event_log
+import game_state
+import metrics
+
+REPLAY_FORMAT_VERSION = 1
+
+# Записи, ещё не сброшенные на диск: (game_id, строка JSON или None, seed, время, апдейт)
+_pending = []
+_seed_source = random.Random()
+
+
+def record(update) -> random.Random:
+    """
+    Вызывается перед обработчиком: возвращает генератор случайных чисел этого
+    апдейта и, если реплей включён, ставит апдейт с его seed в очередь записи.
+    Сериализация — в фоновой задаче.
+    """
+    seed = _seed_source.getrandbits(32)
+    if config.REPLAY_DIR:
+        _pending.append((game_state.game_id, None, seed, time.time(), update))
+    return random.Random(seed)
+
+
+def player_digest(user_id):
+    """Отпечаток состояния игрока (CRC32 его данных) или None, если игрока нет."""
+    player = game_state.players.get(user_id)
+    if player is None:
+        return None
+    return zlib.crc32(json.dumps(player, sort_keys=True, ensure_ascii=False, default=str).encode("utf-8"))
+
+
+def record_outcome(update, user_id):
+    """Вызывается сразу после обработчика (без await): пишет отпечаток состояния отправителя."""
+    if config.REPLAY_DIR:
+        line = json.dumps({"outcome": update.update_id, "user": user_id, "digest": player_digest(user_id)})
+        _pending.append((game_state.game_id, line, None, None, None))
+
+
+def on_event(event):
+    """Подписчик журнала: отмечает в реплее начало раунда."""
+    if event.type == event_log.ROUND_STARTED:
+        _pending.append((game_state.game_id, json.dumps({"round": event.round}), None, None, None))
+
+
+event_log.subscribe(on_event)
+
+
+def replay_path(game):
+    return os.path.join(config.REPLAY_DIR, f"{game}.jsonl.gz")
+
+
+def write_batch(batch):
+    """Дописывает пачку записей в файлы игр (вызывается в потоке). Каждая пачка — отдельный gzip-member."""
+    lines_by_game = {}
+    for game, line, seed, ts, update in batch:
+        if line is None:
+            update_json = update.model_dump_json(exclude_none=True)
+            line = f'{{"seed": {seed}, "ts": {ts:.3f}, "update": {update_json}}}'
+        lines_by_game.setdefault(game, []).append(line)
+    os.makedirs(config.REPLAY_DIR, exist_ok=True)
+    for game, lines in lines_by_game.items():
+        path = replay_path(game)
+        if not os.path.exists(path):
+            header = {"replay": REPLAY_FORMAT_VERSION, "game_id": game, "started": time.time()}
+            lines.insert(0, json.dumps(header))
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+
+
+async def flush():
+    """Забирает накопленные записи и пишет их на диск в отдельном потоке."""
+    if not _pending:
+        return
+    batch = _pending[:]
+    del _pending[:len(batch)]
+    try:
+        await asyncio.to_thread(write_batch, batch)
+        metrics.inc("replay_written", len(batch))
+    except Exception as e:
+        _pending[:0] = batch
+        print(f"Ошибка записи реплея: {e}")
+
+
+async def replay_writer_task():
+    """Фоновая задача: периодически дописывает реплей на диск."""
+    try:
+        while True:
+            await asyncio.sleep(config.REPLAY_FLUSH_INTERVAL)
+            await flush()
+    finally:
+        await flush()
+
+
+def read_replay(path):
+    """Читает файл реплея: (заголовок, итератор записей)."""
+    f = gzip.open(path, "rt", encoding="utf-8")
+    header = json.loads(f.readline())
+    if header.get("replay") != REPLAY_FORMAT_VERSION:
+        f.close()
+        raise ValueError(f"{path}: неподдерживаемая версия реплея {header.get('replay')}")
+
+    def records():
+        with f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+    return header, records()
+
+
+# =====================================================================================
+# --- ВОСПРОИЗВЕДЕНИЕ ---
+# =====================================================================================
+
+def _isolate_data_dir():
+    """
+    Переносит все пути данных во временный каталог: воспроизведение не должно
+    трогать файлы живого бота. Пути в config собраны из DATA_DIR при импорте,
+    поэтому каждый переопределяется явно.
+    """
+    data_dir = tempfile.mkdtemp(prefix="replay-")
+    config.DATA_DIR = data_dir
+    config.SNAPSHOT_PATH = os.path.join(data_dir, "game_state.pickle")
+    config.AUDIT_DB_PATH = os.path.join(data_dir, "audit.sqlite3")
+    config.REPLAY_DIR = ""  # Воспроизведение не пишет новый реплей
+    return data_dir
+
+
+def _replay_session_class():
+    from aiogram.client.session.base import BaseSession
+    from aiogram.types import Chat, Message
+
+    class ReplaySession(BaseSession):
+        """Сессия без сети: на отправку сообщения отвечает правдоподобным Message, на остальное — True/None."""
+
+        def __init__(self):
+            super().__init__()
+            self.requests = 0
+
+        async def make_request(self, bot, method, timeout=None):
+            self.requests += 1
+            returning = method.__returning__
+            types_ = typing.get_args(returning) or (returning,)
+            if Message in types_:
+                chat_id = getattr(method, "chat_id", None)
+                chat_id = chat_id if isinstance(chat_id, int) else 0
+                return Message(message_id=self.requests, date=datetime.datetime.now(),
+                               chat=Chat(id=chat_id, type="private"))
+            if bool in types_:
+                return True
+            return None
+
+        async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+            yield b""
+
+        async def close(self):
+            pass
+
+    return ReplaySession
+
+
+async def replay(path, until_round=None):
+    """
+    Воспроизводит реплей в текущем процессе через настоящие обработчики.
+    Состояние игры должно быть пустым (отдельный процесс).
+    Возвращает (число апдейтов, число апдейтов с расхождением).
+    """
+    from aiogram import Bot, Dispatcher
+    from aiogram.fsm.storage.memory import MemoryStorage
+    from aiogram.types import Update
+
+    import log_sink
+    from admin_handlers import admin_router
+    from handlers import router as player_router
+
+    header, records = read_replay(path)
+    _isolate_data_dir()
+    game_state.game_id = header["game_id"]
+    game_state.event_log = game_state.new_event_log(game_state.game_id)
+    game_state.newspaper_archive = game_state.new_newspaper_archive(game_state.game_id)
+
+    bot = Bot(token="0:replay", session=_replay_session_class()())
+    dp = Dispatcher(storage=MemoryStorage())
+    dp.include_router(player_router)
+    dp.include_router(admin_router)
+    log_task = asyncio.create_task(log_sink.log_sink_task(bot))
+
+    count = diverged = 0
+    replayed = {}  # update_id -> отпечаток отправителя после воспроизведения
+    try:
+        for item in records:
+            if "outcome" in item:
+                digest = replayed.pop(item["outcome"], None)
+                if digest is not None and digest[1] != item["digest"]:
+                    diverged += 1
+                    if diverged <= config.REPLAY_MAX_DIVERGENCE_REPORTS:
+                        print(f"Расхождение: после апдейта {item['outcome']} состояние игрока "
+                              f"{item['user']} отличается от записанного (раунд {game_state.current_round})")
+                continue
+            if "round" in item:
+                if item["round"] != game_state.current_round:
+                    print(f"Расхождение: в реплее начался раунд {item['round']}, "
+                          f"а в воспроизведении текущий раунд {game_state.current_round}")
+                if until_round is not None and item["round"] >= until_round:
+                    break
+                continue
+            update = Update.model_validate(item["update"], context={"bot": bot})
+            user = getattr(update.event, "from_user", None)
+            try:
+                await dp.feed_update(bot, update, rng=random.Random(item["seed"]))
+            except Exception as e:
+                print(f"Апдейт {update.update_id}: ошибка обработчика {e!r}")
+            if user is not None:
+                replayed[update.update_id] = (user.id, player_digest(user.id))
+            count += 1
+    finally:
+        log_task.cancel()
+    return count, diverged
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Воспроизведение реплея игры через обработчики бота")
+    parser.add_argument("path", help="файл реплея .jsonl.gz")
+    parser.add_argument("--until-round", type=int, help="остановиться сразу после начала раунда N")
+    parser.add_argument("--snapshot", help="сохранить итоговое состояние в этот файл (формат persistence)")
+    args = parser.parse_args()
+
+    import persistence
+
+    started = time.perf_counter()
+    count, diverged = asyncio.run(replay(args.path, args.until_round))
+    print(f"Воспроизведено апдейтов: {count} за {time.perf_counter() - started:.2f} сек; "
+          f"игра {game_state.game_id}, раунд {game_state.current_round}, игроков {len(game_state.players)}; "
+          f"расхождений с записью: {diverged}")
+    if args.snapshot:
+        persistence.save_snapshot(args.snapshot)
+        print(f"Состояние сохранено в {args.snapshot}")
+
+
+if __name__ == "__main__":
+    main()
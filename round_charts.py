@@ -0,0 +1,136 @@
+# round_charts.py
+#
+# Необязательный график итогов раунда: бюджеты и уровень жизни стран по
+# истории timeseries. Рисует matplotlib в отдельном процессе, чтобы цикл
+# событий не ждал отрисовку. Картинка раунда рисуется и загружается в Telegram
+# один раз, остальным получателям уходит по file_id.
+# Включается переменной окружения ROUND_CHARTS=1 (нужен matplotlib): график
+# показывает всем чужие бюджеты, которые иначе видны только при шпионаже.
+
+import asyncio
+import importlib.util
+import io
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from aiogram.types import BufferedInputFile
+
+import config
+import game_state
+import metrics
+import timeseries
+from delivery import send_photo_one
+from leaderboard import leaderboard
+
+AVAILABLE = importlib.util.find_spec("matplotlib") is not None
+
+
+def render_chart(round_number: int, series: list) -> bytes:
+    """
+    Рисует PNG: бюджеты и средний QoL стран по раундам.
+    `series` — [(страна, [раунды], [бюджеты], [QoL]), ...]. Выполняется в дочернем процессе.
+    """
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, (budget_ax, qol_ax) = plt.subplots(2, 1, figsize=(8, 7), sharex=True)
+    for country, rounds, budgets, qols in series:
+        budget_ax.plot(rounds, budgets, marker="o", markersize=3, label=country)
+        qol_ax.plot(rounds, qols, marker="o", markersize=3)
+    budget_ax.set_title(f"Итоги: начало раунда {round_number}")
+    budget_ax.set_ylabel("Бюджет, $")
+    qol_ax.set_ylabel("Средний уровень жизни, %")
+    qol_ax.set_xlabel("Раунд")
+    budget_ax.legend(fontsize=8, ncol=2)
+    for ax in (budget_ax, qol_ax):
+        ax.grid(alpha=0.3)
+    fig.tight_layout()
+    out = io.BytesIO()
+    fig.savefig(out, format="png", dpi=100)
+    plt.close(fig)
+    return out.getvalue()
+
+
+def chart_series() -> list:
+    """История CHART_MAX_COUNTRIES самых богатых живых стран для графика."""
+    series = []
+    for uid, _ in leaderboard.top("budget", config.CHART_MAX_COUNTRIES):
+        rows = timeseries.series.history(uid)
+        if rows:
+            series.append((game_state.players[uid]['country'], [r[0] for r in rows],
+                           [r[1] for r in rows], [round(r[3], 1) for r in rows]))
+    return series
+
+
+class RoundCharts:
+    """Графики раундов: отрисовка в пуле процессов, кэш PNG и file_id по (игра, раунд)."""
+
+    def __init__(self, cache_size=4):
+        self.cache_size = cache_size
+        self._executor = None
+        self._png = OrderedDict()  # (игра, раунд) -> bytes
+        self._file_ids = {}  # (игра, раунд) -> file_id загруженной картинки
+
+    @property
+    def enabled(self):
+        return config.ROUND_CHARTS and AVAILABLE
+
+    async def render(self, round_number: int):
+        """PNG графика раунда (из кэша или из пула процессов), None — если рисовать нечего."""
+        key = (game_state.game_id, round_number)
+        png = self._png.get(key)
+        if png is not None:
+            return png
+        series = chart_series()
+        if not series:
+            return None
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=config.CHART_WORKERS)
+        loop = asyncio.get_running_loop()
+        png = await loop.run_in_executor(self._executor, render_chart, round_number, series)
+        metrics.inc("charts_rendered")
+        self._png[key] = png
+        while len(self._png) > self.cache_size:
+            old_key, _ = self._png.popitem(last=False)
+            self._file_ids.pop(old_key, None)
+        return png
+
+    async def send(self, bot, chat_ids, round_number: int):
+        """Рассылает график раунда: первому получателю — загрузка файла, остальным — file_id."""
+        if not self.enabled:
+            return
+        try:
+            png = await self.render(round_number)
+        except Exception as e:
+            print(f"Ошибка отрисовки графика раунда {round_number}: {e}")
+            return
+        if png is None:
+            return
+        key = (game_state.game_id, round_number)
+        caption = f"📊 Бюджеты и уровень жизни стран к раунду {round_number}"
+        pending = list(chat_ids)
+        while key not in self._file_ids and pending:
+            sent = await send_photo_one(bot, pending.pop(0), BufferedInputFile(png, filename=f"round_{round_number}.png"),
+                                        caption=caption)
+            if sent is not None and sent.photo:
+                self._file_ids[key] = sent.photo[-1].file_id
+                metrics.inc("charts_uploaded")
+        file_id = self._file_ids.get(key)
+        if file_id is None:
+            return
+        semaphore = asyncio.Semaphore(config.DELIVERY_CONCURRENCY)
+
+        async def send_to(chat_id):
+            async with semaphore:
+                await send_photo_one(bot, chat_id, file_id, caption=caption)
+
+        await asyncio.gather(*(send_to(chat_id) for chat_id in pending))
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+charts = RoundCharts()
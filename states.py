@@ -55,4 +55,5 @@ class Espionage(StatesGroup):
     choosing_target = State()
 
 class AdminTools(StatesGroup):
-    choosing_event_to_force = State()
\ No newline at end of file
+    choosing_event_to_force = State()
+    uploading_bulk_document = State()
\ No newline at end of file
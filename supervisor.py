@@ -0,0 +1,57 @@
+# supervisor.py
+
+import asyncio
+import traceback
+
+import metrics
+
+
+class TaskSupervisor:
+    """
+    Владеет фоновыми задачами бота (таймер раунда, лог-канал, сохранение состояния,
+    сервер метрик). Упавшая задача перезапускается с экспоненциальной задержкой.
+    """
+
+    def __init__(self, base_delay: float = 1.0, max_delay: float = 60.0):
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._tasks = {}
+        self._stopping = False
+
+    def start(self, name: str, factory):
+        """Запускает задачу под надзором. `factory` — функция без аргументов, возвращающая корутину."""
+        self._tasks[name] = asyncio.create_task(self._run(name, factory), name=name)
+
+    async def _run(self, name, factory):
+        loop = asyncio.get_running_loop()
+        delay = self.base_delay
+        while not self._stopping:
+            started_at = loop.time()
+            try:
+                await factory()
+                return  # Задача завершилась штатно — перезапуск не нужен
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Если задача долго проработала без ошибок, начинаем отсчёт задержки заново
+                if loop.time() - started_at > self.max_delay:
+                    delay = self.base_delay
+                print(f"Фоновая задача '{name}' упала: {e!r}. Перезапуск через {delay:.0f} сек.")
+                traceback.print_exc()
+                metrics.inc(f"task_restarts_{name}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_delay)
+
+    def is_running(self, name: str) -> bool:
+        task = self._tasks.get(name)
+        return task is not None and not task.done()
+
+    async def shutdown(self, timeout: float):
+        """Останавливает все задачи и ждёт их завершения не дольше `timeout` секунд."""
+        self._stopping = True
+        tasks = [t for t in self._tasks.values() if not t.done()]
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+        self._tasks.clear()
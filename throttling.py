@@ -0,0 +1,95 @@
+# throttling.py
+
+import time
+from collections import OrderedDict
+
+import metrics
+from ttl_cache import TTLCache
+
+
+class TokenBucket:
+    """Классическое ведро токенов: `rate` токенов в секунду, не больше `capacity`."""
+    __slots__ = ("rate", "capacity", "tokens", "updated_at", "warned")
+
+    def __init__(self, rate: float, capacity: float, now: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = now
+        self.warned = False
+
+    def _refill(self, now):
+        elapsed = now - self.updated_at
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+            self.updated_at = now
+
+    def consume(self, now: float, amount: float = 1) -> bool:
+        """Пытается забрать токены. Возвращает False, если их не хватает."""
+        self._refill(now)
+        if self.tokens >= amount:
+            self.tokens -= amount
+            return True
+        return False
+
+    def delay(self, now: float, amount: float = 1) -> float:
+        """Сколько секунд ждать, пока в ведре не наберётся `amount` токенов."""
+        self._refill(now)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+
+class Throttler:
+    """
+    Вёдра токенов для каждой пары (игрок, класс кнопки).
+    Вёдра, к которым давно не обращались, вытесняются, поэтому память
+    ограничена числом недавно активных игроков.
+    """
+
+    def __init__(self, rates: dict, idle_ttl: float, merge_window: float, max_merge_keys: int = 10000):
+        self.rates = rates  # класс -> (токенов в секунду, ёмкость)
+        self.idle_ttl = idle_ttl
+        self._buckets = OrderedDict()  # (user_id, класс) -> TokenBucket
+        self._recent_views = TTLCache(maxsize=max_merge_keys, ttl=merge_window)
+
+    def _evict_idle(self, now):
+        buckets = self._buckets
+        while buckets:
+            bucket = next(iter(buckets.values()))
+            if now - bucket.updated_at < self.idle_ttl:
+                break
+            buckets.popitem(last=False)
+            metrics.inc("throttle_buckets_evicted")
+
+    def bucket(self, user_id, kind, now=None) -> TokenBucket:
+        now = time.monotonic() if now is None else now
+        self._evict_idle(now)
+        key = (user_id, kind)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            rate, capacity = self.rates[kind]
+            bucket = self._buckets[key] = TokenBucket(rate, capacity, now)
+        else:
+            self._buckets.move_to_end(key)
+        return bucket
+
+    def allow(self, user_id, kind, now=None) -> bool:
+        """Списывает токен из ведра игрока. False — запрос нужно отбросить."""
+        now = time.monotonic() if now is None else now
+        bucket = self.bucket(user_id, kind, now)
+        if bucket.consume(now):
+            bucket.warned = False
+            return True
+        metrics.inc(f"throttled_{kind}")
+        return False
+
+    def is_repeat_view(self, user_id, view_key) -> bool:
+        """True, если игрок уже запрашивал этот же экран в окне склейки."""
+        if self._recent_views.add((user_id, view_key)):
+            return False
+        metrics.inc("throttle_merged_views")
+        return True
+
+    def __len__(self) -> int:
+        return len(self._buckets)
@@ -0,0 +1,184 @@
+# timeseries.py
+
+import asyncio
+import csv
+import io
+import os
+import struct
+import sys
+from array import array
+
+import config
+import game_state
+
+# Колонки: имя -> тип элемента array. Строка — один игрок в одном раунде.
+COLUMNS = (
+    ("round", "H"),
+    ("uid", "q"),
+    ("budget", "q"),
+    ("income", "q"),
+    ("avg_qol", "f"),
+    ("avg_level", "f"),
+    ("nukes", "i"),
+    ("shields", "i"),
+)
+# Заголовок блока в файле: номер раунда и число строк; за ним колонки блока подряд
+BLOCK_HEADER = struct.Struct("<HI")
+ROW_SIZE = sum(array(code).itemsize for _, code in COLUMNS)
+
+
+class TimeSeries:
+    """
+    История стран по раундам в колоночном виде: каждая колонка — типизированный
+    array, строка добавляется за O(1) без словарей на каждый раунд. На диск
+    раунды дописываются блоками сырых байт колонок, по файлу на игру.
+    """
+
+    def __init__(self):
+        self.game_id = None
+        self._reset()
+
+    def _reset(self):
+        self.columns = {name: array(code) for name, code in COLUMNS}
+        self._rows_by_uid = {}  # uid -> array номеров строк этого игрока
+        self._saved = 0  # Сколько строк уже на диске
+
+    @property
+    def path(self):
+        return os.path.join(config.DATA_DIR, "timeseries", f"{self.game_id}.bin")
+
+    def _ensure_game(self):
+        """История привязана к игре: после рестарта или загрузки снимка переключаемся на её файл."""
+        if self.game_id == game_state.game_id:
+            return
+        self.game_id = game_state.game_id
+        self._reset()
+        if os.path.exists(self.path):
+            self._load()
+
+    def __len__(self):
+        self._ensure_game()
+        return len(self.columns["round"])
+
+    def append(self, round_number: int, uid: int, player: dict, income: int = 0):
+        """Записывает состояние игрока на начало раунда."""
+        self._ensure_game()
+        cities = player.get('cities', {}).values()
+        columns = self.columns
+        row = len(columns["round"])
+        columns["round"].append(round_number)
+        columns["uid"].append(uid)
+        columns["budget"].append(player.get('budget', 0))
+        columns["income"].append(income)
+        columns["avg_qol"].append(sum(c['qol'] for c in cities) / len(cities) if cities else 0)
+        columns["avg_level"].append(sum(c['level'] for c in cities) / len(cities) if cities else 0)
+        columns["nukes"].append(player.get('ready_nukes', 0) + player.get('pending_nukes', 0))
+        columns["shields"].append(player.get('shields', 0))
+        rows = self._rows_by_uid.get(uid)
+        if rows is None:
+            rows = self._rows_by_uid[uid] = array("I")
+        rows.append(row)
+
+    def history(self, uid: int, last: int = None) -> list:
+        """Строки игрока по раундам: [(раунд, бюджет, доход, QoL, уровень, ракеты, щиты), ...]."""
+        self._ensure_game()
+        rows = self._rows_by_uid.get(uid, ())
+        if last:
+            rows = rows[-last:]
+        c = self.columns
+        return [(c["round"][i], c["budget"][i], c["income"][i], c["avg_qol"][i], c["avg_level"][i],
+                 c["nukes"][i], c["shields"][i]) for i in rows]
+
+    def to_csv(self) -> str:
+        """Вся история игры в CSV (страна — по текущим данным игрока)."""
+        self._ensure_game()
+        out = io.StringIO()
+        writer = csv.writer(out)
+        names = [name for name, _ in COLUMNS]
+        writer.writerow(["country"] + names)
+        countries = {uid: p.get('country') for uid, p in game_state.players.items()}
+        for row in zip(*(self.columns[name] for name in names)):
+            writer.writerow([countries.get(row[1], "")] + [round(v, 2) if isinstance(v, float) else v for v in row])
+        return out.getvalue()
+
+    # --- Хранение на диске ---
+
+    def _blocks(self, start, stop):
+        """Несохранённые строки, разбитые на блоки по раундам (строки раунда идут подряд)."""
+        rounds = self.columns["round"]
+        while start < stop:
+            end = start
+            while end < stop and rounds[end] == rounds[start]:
+                end += 1
+            parts = [BLOCK_HEADER.pack(rounds[start], end - start)]
+            for name, _ in COLUMNS:
+                chunk = self.columns[name][start:end]
+                if sys.byteorder != "little":
+                    chunk.byteswap()
+                parts.append(chunk.tobytes())
+            yield b"".join(parts)
+            start = end
+
+    async def flush(self):
+        """Дописывает новые строки в файл игры. Байты готовятся в цикле, запись — в потоке."""
+        self._ensure_game()
+        stop = len(self.columns["round"])
+        if stop == self._saved:
+            return
+        payload = b"".join(self._blocks(self._saved, stop))
+        path = self.path
+        try:
+            await asyncio.to_thread(_append_file, path, payload)
+            self._saved = stop
+        except Exception as e:
+            print(f"Ошибка записи истории раундов {path}: {e}")
+
+    def _load(self):
+        """
+        Читает файл игры. Если бот упал между записью блока и снимком состояния,
+        раунд после перезапуска записывается заново и в файле оказывается дважды:
+        у каждого раунда берётся последний блок, а блоки раундов позже текущего
+        (их снимок ещё не видел) пропускаются — они будут записаны заново.
+        """
+        with open(self.path, "rb") as f:
+            data = f.read()
+        blocks = []  # (раунд, смещение колонок, число строк)
+        offset = 0
+        while offset + BLOCK_HEADER.size <= len(data):
+            round_number, count = BLOCK_HEADER.unpack_from(data, offset)
+            offset += BLOCK_HEADER.size
+            if offset + count * ROW_SIZE > len(data):
+                print(f"История раундов {self.path}: последний блок обрезан, пропускаем его.")
+                break
+            blocks.append((round_number, offset, count))
+            offset += count * ROW_SIZE
+        last_block = {round_number: i for i, (round_number, _, _) in enumerate(blocks)}
+        skipped = 0
+        for i, (round_number, offset, count) in enumerate(blocks):
+            if last_block[round_number] != i or round_number > game_state.current_round:
+                skipped += 1
+                continue
+            start = len(self.columns["round"])
+            for name, code in COLUMNS:
+                chunk = array(code)
+                size = chunk.itemsize * count
+                chunk.frombytes(data[offset:offset + size])
+                if sys.byteorder != "little":
+                    chunk.byteswap()
+                self.columns[name].extend(chunk)
+                offset += size
+            for row in range(start, start + count):
+                uid = self.columns["uid"][row]
+                self._rows_by_uid.setdefault(uid, array("I")).append(row)
+        if skipped:
+            print(f"История раундов {self.path}: пропущено устаревших блоков (раунд записан заново): {skipped}.")
+        self._saved = len(self.columns["round"])
+
+
+def _append_file(path, payload):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "ab") as f:
+        f.write(payload)
+
+
+series = TimeSeries()
@@ -0,0 +1,46 @@
+# ttl_cache.py
+
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """
+    Ограниченный по размеру набор ключей со временем жизни.
+    Время жизни у всех ключей одинаковое, поэтому порядок вставки совпадает
+    с порядком истечения: проверка и вытеснение работают за O(1).
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._items = OrderedDict()  # ключ -> время истечения
+
+    def _evict(self, now):
+        items = self._items
+        while items:
+            key, expires_at = next(iter(items.items()))
+            if expires_at > now and len(items) <= self.maxsize:
+                break
+            items.popitem(last=False)
+
+    def add(self, key) -> bool:
+        """Запоминает ключ. Возвращает False, если ключ уже был виден и ещё не истёк."""
+        now = time.monotonic()
+        self._evict(now)
+        if key in self._items:
+            return False
+        self._items[key] = now + self.ttl
+        self._evict(now)
+        return True
+
+    def discard(self, key):
+        """Забывает ключ (например, если его обработка не удалась и повтор нужно пропустить)."""
+        self._items.pop(key, None)
+
+    def __contains__(self, key) -> bool:
+        expires_at = self._items.get(key)
+        return expires_at is not None and expires_at > time.monotonic()
+
+    def __len__(self) -> int:
+        return len(self._items)
@@ -0,0 +1,90 @@
+# webhook.py
+
+import asyncio
+import signal
+
+from aiohttp import web
+from aiogram.webhook.aiohttp_server import SimpleRequestHandler, setup_application
+
+import config
+import metrics
+
+
+class QueuedRequestHandler(SimpleRequestHandler):
+    """
+    Обработчик вебхука aiogram, который не создаёт задачу на каждый апдейт,
+    а кладёт апдейт в ограниченную очередь. Если очередь полна дольше
+    WEBHOOK_ENQUEUE_TIMEOUT, Telegram получает 503 и повторит доставку позже.
+    """
+
+    def __init__(self, dispatcher, bot, queue: asyncio.Queue, **kwargs):
+        super().__init__(dispatcher=dispatcher, bot=bot, handle_in_background=True, **kwargs)
+        self.queue = queue
+
+    async def _handle_request_background(self, bot, request: web.Request) -> web.Response:
+        update = await request.json(loads=bot.session.json_loads)
+        try:
+            await asyncio.wait_for(self.queue.put(update), timeout=config.WEBHOOK_ENQUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            metrics.inc("webhook_rejected")
+            return web.Response(status=503, text="Update queue is full")
+        metrics.inc("webhook_accepted")
+        return web.json_response({}, dumps=bot.session.json_dumps)
+
+
+async def _update_worker(dp, bot, queue: asyncio.Queue):
+    """Обрабатывает апдейты из очереди по одному."""
+    while True:
+        update = await queue.get()
+        try:
+            await dp.feed_raw_update(bot, update)
+        except Exception as e:
+            print(f"Ошибка обработки апдейта из вебхука: {e}")
+        finally:
+            queue.task_done()
+
+
+def _wait_for_stop_signal() -> asyncio.Event:
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except NotImplementedError:
+            pass  # Windows: остаётся остановка через KeyboardInterrupt
+    return stop_event
+
+
+async def run_webhook(dp, bot):
+    """Запускает приём апдейтов через вебхук и работает до сигнала остановки."""
+    queue = asyncio.Queue(maxsize=config.WEBHOOK_QUEUE_SIZE)
+    app = web.Application()
+    QueuedRequestHandler(dp, bot, queue, secret_token=config.WEBHOOK_SECRET or None).register(
+        app, path=config.WEBHOOK_PATH)
+    setup_application(app, dp, bot=bot)
+
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, config.WEBHOOK_HOST, config.WEBHOOK_PORT)
+    await site.start()
+    workers = [asyncio.create_task(_update_worker(dp, bot, queue)) for _ in range(config.WEBHOOK_WORKERS)]
+
+    if config.WEBHOOK_BASE_URL:
+        await bot.set_webhook(config.WEBHOOK_BASE_URL.rstrip("/") + config.WEBHOOK_PATH,
+                              secret_token=config.WEBHOOK_SECRET or None)
+    print(f"Вебхук слушает {config.WEBHOOK_HOST}:{config.WEBHOOK_PORT}{config.WEBHOOK_PATH}")
+
+    stop_event = _wait_for_stop_signal()
+    try:
+        await stop_event.wait()
+    finally:
+        # Перестаём принимать новые апдейты и дорабатываем то, что уже в очереди
+        await site.stop()
+        try:
+            await asyncio.wait_for(queue.join(), timeout=config.SHUTDOWN_DRAIN_TIMEOUT)
+        except asyncio.TimeoutError:
+            print(f"Не успели обработать {queue.qsize()} апдейтов из очереди вебхука при остановке.")
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        await runner.cleanup()
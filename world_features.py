@@ -0,0 +1,152 @@
+# world_features.py
+
+from bisect import bisect_left, insort
+
+import event_log
+import game_state
+
+DEFAULT_AVG_QOL = 70  # Уровень жизни "мирного" мира без городов
+
+# События, которые меняют всех игроков сразу (доход раунда, эффекты глобальных событий, рестарт)
+WORLD_EVENTS = {
+    event_log.ROUND_STARTED, event_log.GAME_STARTED, event_log.GAME_RESTARTED,
+    event_log.GLOBAL_EVENT_STARTED, event_log.GLOBAL_EVENT_SUCCEEDED, event_log.GLOBAL_EVENT_FAILED,
+}
+
+
+class DirtyPlayers:
+    """
+    Игроки, изменившиеся с прошлого пересчёта, по записям журнала событий:
+    запись помечает инициатора и цель, а события всего мира — всех сразу.
+    """
+
+    def __init__(self):
+        self.ids = set()
+        self.all = True
+
+    def on_event(self, event):
+        """Подписчик журнала."""
+        if event.type in WORLD_EVENTS or (event.actor_id is None and event.target_id is None):
+            self.all = True
+            return
+        if event.actor_id is not None:
+            self.ids.add(event.actor_id)
+        if event.target_id is not None:
+            self.ids.add(event.target_id)
+
+    def mark(self, uid):
+        self.ids.add(uid)
+
+    def mark_all(self):
+        self.all = True
+
+    def take(self):
+        """Забирает пометки: (все ли изменились, множество изменившихся)."""
+        marked = (self.all, self.ids)
+        self.ids, self.all = set(), False
+        return marked
+
+
+class PlayerContribution:
+    """Вклад одного живого игрока в признаки мира."""
+    __slots__ = ("nukes", "qol_sum", "cities", "ruined", "budget")
+
+    def __init__(self, player):
+        cities = player.get('cities', {}).values()
+        self.nukes = player.get('ready_nukes', 0) + player.get('pending_nukes', 0)
+        self.qol_sum = sum(city.get('qol', 50) for city in cities)
+        self.cities = len(cities)
+        self.ruined = sum(1 for city in cities if city.get('ruined'))
+        self.budget = player.get('budget', 0)
+
+
+class WorldFeatures:
+    """
+    Признаки мира для выбора глобальных событий (всего ракет, средний QoL,
+    разрушенные города, неравенство бюджетов). Суммы ведутся инкрементально:
+    журнал событий помечает изменившихся игроков, и при запросе пересчитываются
+    только они. Бюджеты хранятся отсортированными, чтобы Джини не требовал сортировки.
+    """
+
+    def __init__(self, players_source=None):
+        # Откуда брать игроков: по умолчанию текущая игра, для симулятора — любой словарь
+        self._source = players_source or (lambda: game_state.players)
+        self.dirty = DirtyPlayers()
+        self._reset()
+
+    def _reset(self):
+        self._players = None  # Словарь игроков, по которому посчитаны суммы
+        self._contributions = {}  # uid -> PlayerContribution
+        self.total_nukes = 0
+        self.qol_sum = 0
+        self.city_count = 0
+        self.ruined_cities = 0
+        self._budgets = []  # Бюджеты живых игроков по возрастанию
+        self._gini = None
+
+    def _remove(self, uid):
+        old = self._contributions.pop(uid, None)
+        if old is None:
+            return
+        self.total_nukes -= old.nukes
+        self.qol_sum -= old.qol_sum
+        self.city_count -= old.cities
+        self.ruined_cities -= old.ruined
+        del self._budgets[bisect_left(self._budgets, old.budget)]
+        self._gini = None
+
+    def _add(self, uid, player):
+        new = PlayerContribution(player)
+        self._contributions[uid] = new
+        self.total_nukes += new.nukes
+        self.qol_sum += new.qol_sum
+        self.city_count += new.cities
+        self.ruined_cities += new.ruined
+        insort(self._budgets, new.budget)
+        self._gini = None
+
+    def _refresh(self):
+        players = self._source()
+        everyone, dirty = self.dirty.take()
+        if everyone or players is not self._players:
+            # Рестарт или загрузка снимка подменяют словарь игроков — считаем заново
+            self._reset()
+            self._players = players
+            dirty = players.keys()
+        for uid in list(dirty):
+            self._remove(uid)
+            player = players.get(uid)
+            if player and player.get("country") and not player.get("eliminated"):
+                self._add(uid, player)
+
+    @property
+    def budget_gini(self) -> float:
+        if self._gini is None:
+            budgets, n = self._budgets, len(self._budgets)
+            total = sum(budgets)
+            if n < 2 or total <= 0:
+                self._gini = 0.0
+            else:
+                weighted = sum(i * budget for i, budget in enumerate(budgets, 1))
+                self._gini = 2 * weighted / (n * total) - (n + 1) / n
+        return self._gini
+
+    def snapshot(self) -> dict:
+        """Текущие значения признаков по именам (их используют правила весов событий)."""
+        self._refresh()
+        return {
+            'active_players': len(self._contributions),
+            'total_nukes': self.total_nukes,
+            'avg_qol': self.qol_sum / self.city_count if self.city_count else DEFAULT_AVG_QOL,
+            'ruined_cities': self.ruined_cities,
+            'budget_gini': round(self.budget_gini, 3),
+        }
+
+
+def compute(players: dict) -> dict:
+    """Признаки мира для произвольного словаря игроков (сценарии, симулятор)."""
+    return WorldFeatures(lambda: players).snapshot()
+
+
+features = WorldFeatures()
+event_log.subscribe(features.dirty.on_event)